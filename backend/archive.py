@@ -0,0 +1,78 @@
+"""
+Archival of closed maintenance requests
+
+Moves REPAIRED and SCRAP requests that have been closed for longer than
+ARCHIVE_AFTER_DAYS from maintenance_requests into maintenance_requests_archive
+in small batches, so the hot table only holds recent and open work.
+
+Run once from the command line with `python archive.py`.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import MaintenanceRequest, MaintenanceRequestArchive, RequestStatus, log_request_changes
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+CLOSED_STATUSES = [RequestStatus.REPAIRED, RequestStatus.SCRAP]
+
+# Columns copied verbatim; archived_at is filled by the archive table default
+_ARCHIVED_COLUMNS = [
+    column.name for column in MaintenanceRequest.__table__.columns
+    if column.name in MaintenanceRequestArchive.__table__.columns
+]
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move one batch of requests closed before cutoff; returns rows moved"""
+    closed_at = func.coalesce(MaintenanceRequest.updated_at, MaintenanceRequest.created_at)
+    ids = db.execute(
+        select(MaintenanceRequest.id)
+        .where(
+            MaintenanceRequest.status.in_(CLOSED_STATUSES),
+            closed_at < cutoff,
+        )
+        .order_by(MaintenanceRequest.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    source = MaintenanceRequest.__table__
+    archive = MaintenanceRequestArchive.__table__
+    db.execute(
+        insert(archive).from_select(
+            _ARCHIVED_COLUMNS,
+            select(*[source.c[name] for name in _ARCHIVED_COLUMNS]).where(source.c.id.in_(ids)),
+        )
+    )
+    # Sync clients drop archived requests like deleted ones
+    log_request_changes(db, source.c.id.in_(ids), deleted=True)
+    db.execute(delete(source).where(source.c.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive_closed_requests(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive every eligible request, one short transaction per batch"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    moved = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = archive_batch(db, cutoff, batch_size)
+            moved += count
+            if count < batch_size:
+                return moved
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"📦 Archived {archive_closed_requests()} closed maintenance requests")
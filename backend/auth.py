@@ -6,11 +6,12 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import bcrypt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_read_db
 from models import User, UserRole
+from metrics import PASSWORD_VERIFY_DURATION
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-32-chars")
@@ -23,13 +24,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    try:
-        # Try passlib first
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        return pwd_context.verify(plain_password, hashed_password)
-    except:
-        # Fallback to bcrypt directly
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    with PASSWORD_VERIFY_DURATION.time():
+        try:
+            # Try passlib first
+            pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+            return pwd_context.verify(plain_password, hashed_password)
+        except:
+            # Fallback to bcrypt directly
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
 def get_password_hash(password: str) -> str:
@@ -57,8 +59,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
     """Get current authenticated user from JWT token"""
+    # Sub-requests of POST /api/batch reuse the user the batch already authenticated
+    batch_user = getattr(request.state, "authenticated_user", None)
+    if batch_user is not None:
+        return batch_user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -76,6 +82,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    # Detach the user and end the lookup's transaction, so a route writing
+    # through get_db doesn't hold this read connection until after responding
+    db.expunge(user)
+    db.rollback()
     return user
 
 
@@ -0,0 +1,26 @@
+"""
+Auto-fill of team and technician for maintenance requests created in bulk
+
+Mirrors create_maintenance_request: the team comes from the equipment's
+maintenance team and the technician from its default technician, who must
+belong to that team. Where the API rejects such a request with 403, bulk
+creation (preventive plans, telemetry rules) leaves it unassigned instead.
+"""
+from sqlalchemy import and_, case, exists, null
+
+from models import Equipment, TeamMember
+
+
+def auto_fill_columns() -> dict:
+    """Column expressions for an INSERT ... SELECT that joins Equipment"""
+    technician_outside_team = and_(
+        Equipment.maintenance_team_id.isnot(None),
+        ~exists().where(
+            TeamMember.team_id == Equipment.maintenance_team_id,
+            TeamMember.user_id == Equipment.default_technician_id,
+        ),
+    )
+    return {
+        "auto_filled_team_id": Equipment.maintenance_team_id,
+        "assigned_technician_id": case((technician_outside_team, null()), else_=Equipment.default_technician_id),
+    }
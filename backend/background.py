@@ -0,0 +1,43 @@
+"""
+Periodic background jobs run inside the API worker
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, List
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("uvicorn.error")
+
+# Set to "false" on all but one worker (or run the job scripts from cron instead)
+BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() == "true"
+
+_jobs: List[tuple[str, float, Callable[[], object]]] = []
+
+
+def register_job(name: str, interval_seconds: float, func: Callable[[], object]):
+    """Run func (a blocking callable) every interval_seconds once the app starts"""
+    _jobs.append((name, interval_seconds, func))
+
+
+async def _run_periodically(name: str, interval_seconds: float, func: Callable[[], object]):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await run_in_threadpool(func)
+            logger.debug("Background job %s finished: %s", name, result)
+        except Exception:
+            logger.exception("Background job %s failed", name)
+
+
+def start_jobs() -> List[asyncio.Task]:
+    if not BACKGROUND_JOBS_ENABLED:
+        return []
+    return [asyncio.create_task(_run_periodically(*job)) for job in _jobs]
+
+
+async def stop_jobs(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
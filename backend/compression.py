@@ -0,0 +1,178 @@
+"""
+Response compression with brotli/gzip negotiation
+
+Bodies of compressible content types at least COMPRESSION_MIN_SIZE bytes
+long are compressed with the best encoding the client accepts (brotli when
+the brotli package is installed, else gzip). Bodies of COMPRESSION_OFFLOAD_SIZE
+bytes or more are compressed in the threadpool so the event loop keeps
+serving other requests meanwhile.
+
+Compressed bodies are kept in an LRU keyed by a digest of the uncompressed
+bytes, bounded by COMPRESSION_CACHE_BYTES. When a response repeats one sent
+recently, such as a tablet polling an unchanged list, the stored bytes are
+reused instead of compressing again.
+
+Streaming responses and responses that already carry a Content-Encoding pass
+through untouched.
+"""
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip alone is offered without it
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", "262144"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Preferred first when the client weighs them equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the encoding to use for an Accept-Encoding header, honouring q-values"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/") or
+        media_type in _COMPRESSIBLE_TYPES or
+        media_type.endswith(("+json", "+xml"))
+    )
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (encoding, digest of the uncompressed body).
+
+    Only touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple[str, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(body: bytes, encoding: str) -> tuple[str, bytes]:
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key) -> Optional[bytes]:
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self._entries.move_to_end(key)
+        return compressed
+
+    def put(self, key, compressed: bytes):
+        if len(compressed) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = compressed
+        self.size += len(compressed)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+body_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing whole response bodies per Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, offload_size: int = COMPRESSION_OFFLOAD_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming, or too small to be worth it
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            key = body_cache.key(body, encoding)
+            compressed = body_cache.get(key)
+            if compressed is None:
+                if len(body) >= self.offload_size:
+                    compressed = await run_in_threadpool(compress, body, encoding)
+                else:
+                    compressed = compress(body, encoding)
+                body_cache.put(key, compressed)
+
+            headers = MutableHeaders(scope=start_message)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,45 +1,235 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import OperationalError
+from fastapi import Request, Response
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import math
 import os
+import time
 
 # Use SQLite for local development if DATABASE_URL is not set
 # This allows the app to run without PostgreSQL setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gearguard.db")
 
-# SQLite requires check_same_thread=False
-connect_args = {}
-if "sqlite" in DATABASE_URL:
-    connect_args = {"check_same_thread": False}
-else:
+# Multi-plant deployments keep each site's data in its own database, e.g.
+# SITE_DATABASE_URLS="north=postgresql://db-north/gearguard,south=postgresql://db-south/gearguard".
+# DATABASE_URL is DEFAULT_SITE's database, used when nothing names a site.
+DEFAULT_SITE = os.getenv("DEFAULT_SITE", "main")
+
+
+def _parse_site_urls(value: str) -> dict:
+    urls = {}
+    for entry in value.split(","):
+        site, _, url = entry.strip().partition("=")
+        if site and url:
+            urls[site.strip()] = url.strip()
+    return urls
+
+
+SITE_DATABASE_URLS = {DEFAULT_SITE: DATABASE_URL, **_parse_site_urls(os.getenv("SITE_DATABASE_URLS", ""))}
+
+# Optional read replica for GET endpoints (e.g. sqlite:///./gearguard_replica.db locally)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+# Reads go to the primary for this long after a client's own write, and the
+# replica is bypassed entirely while its measured lag exceeds it
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+RECENT_WRITE_COOKIE = "gg_last_write"
+
+
+def _connect_args(url: str) -> dict:
+    # SQLite requires check_same_thread=False
+    if "sqlite" in url:
+        return {"check_same_thread": False}
     # PostgreSQL connection pool settings
-    connect_args = {
+    return {
         "connect_timeout": 10,
         "options": "-c statement_timeout=30000"
     }
 
-# Create engine with pool pre-ping to verify connections
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_recycle=300,     # Recycle connections after 5 minutes
-    echo=False
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, ON DELETE rules included, unless enabled per connection.
+    # Only the app's engines do this: migrations rebuild tables, and DROP TABLE would cascade.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _create_engine(url: str):
+    # Create engine with pool pre-ping to verify connections.
+    # No connection is opened here; the pool connects on first checkout.
+    engine = create_engine(
+        url,
+        connect_args=_connect_args(url),
+        pool_pre_ping=True,  # Verify connections before using
+        pool_recycle=300,     # Recycle connections after 5 minutes
+        echo=False
+    )
+    if "sqlite" in url:
+        event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    return engine
+
+
+engine = _create_engine(SITE_DATABASE_URLS[DEFAULT_SITE])
+site_engines = {
+    site: engine if site == DEFAULT_SITE else _create_engine(url) for site, url in SITE_DATABASE_URLS.items()
+}
+
+# Site whose database new sessions use: set per request by sites.SiteMiddleware
+# from the token, and by use_site() for jobs and cross-site reads
+current_site: ContextVar[str] = ContextVar("current_site", default=DEFAULT_SITE)
+
+
+def current_site_name() -> str:
+    """Column default stamping new rows with the site they were written for"""
+    return current_site.get()
+
+
+@contextmanager
+def use_site(site: str):
+    """Route sessions created inside the block to site's database"""
+    if site not in site_engines:
+        raise KeyError(f"Unknown site {site!r}")
+    token = current_site.set(site)
+    try:
+        yield
+    finally:
+        current_site.reset(token)
+
+
+class SiteSession(Session):
+    """Session bound to the database of the site current when it is created"""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind if bind is not None else site_engines[current_site.get()], **kwargs)
+
+
+SessionLocal = sessionmaker(class_=SiteSession, autocommit=False, autoflush=False)
+
+# The replica serves DEFAULT_SITE only; other sites read from their own database
+read_engine = _create_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
 
 Base = declarative_base()
 
+# Updated by check_replica_lag(); None until measured
+replica_lag_seconds: Optional[float] = None
+
 
-def get_db():
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session):
+    """Tell the client it just wrote, so its next reads can see the write"""
+    response = session.info.get("response")
+    if response is not None:
+        response.set_cookie(
+            RECENT_WRITE_COOKIE,
+            str(time.time()),
+            max_age=math.ceil(REPLICA_MAX_LAG_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+class SessionReleasedError(RuntimeError):
+    """A session was used after release_session(), e.g. by a lazy load during serialization"""
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _refuse_released(session, transaction):
+    if session.info.get("released"):
+        raise SessionReleasedError("Session used after release; load everything before serializing")
+
+
+def release_session(db: Session):
+    """Close db once the handler has loaded everything it returns, so its
+    connection is back in the pool before the response is serialized and sent.
+
+    Objects loaded through db become detached: their loaded attributes stay
+    readable, while lazy loads raise DetachedInstanceError and any further use
+    of the session raises SessionReleasedError.
+    """
+    db.close()
+    db.info["released"] = True
+
+
+def forward_cookies(db: Session, response: Response):
+    """Copy cookies set on the response get_db injected (the recent-write
+    marker) onto a Response the route returns itself, which FastAPI sends as is"""
+    injected = db.info.get("response")
+    if injected is not None:
+        response.raw_headers.extend(
+            (name, value) for name, value in injected.raw_headers if name == b"set-cookie"
+        )
+
+
+def get_db(response: Response):
     """Dependency for getting database session"""
-    db = SessionLocal()
+    db = SessionLocal(info={"response": response})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def dialect_insert(db):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _wrote_recently(request: Request) -> bool:
+    last_write = request.cookies.get(RECENT_WRITE_COOKIE)
+    if not last_write:
+        return False
+    try:
+        return time.time() - float(last_write) < REPLICA_MAX_LAG_SECONDS
+    except ValueError:
+        return False
+
+
+def replica_usable() -> bool:
+    if ReadSessionLocal is None or current_site.get() != DEFAULT_SITE:
+        return False
+    return replica_lag_seconds is None or replica_lag_seconds <= REPLICA_MAX_LAG_SECONDS
+
+
+def get_read_db(request: Request):
+    """Dependency for read-only routes: the replica when configured and fresh
+    enough, otherwise (or right after this client's own write) the primary"""
+    if not replica_usable() or _wrote_recently(request):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+
+def check_replica_lag() -> Optional[float]:
+    """Measure replication lag (PostgreSQL streaming replicas only)"""
+    global replica_lag_seconds
+    if read_engine is None or read_engine.dialect.name != "postgresql":
+        return None
+    try:
+        with read_engine.connect() as conn:
+            # A fully caught-up replica reports 0 even if the primary has been idle
+            lag = conn.execute(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )).scalar()
+        replica_lag_seconds = float(lag)
+    except OperationalError:
+        # Unreachable replica: route reads to the primary until it recovers
+        replica_lag_seconds = math.inf
+    return replica_lag_seconds
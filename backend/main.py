@@ -1,18 +1,64 @@
 """
 FastAPI main application
+
+Schema changes are applied by an explicit migration step (`alembic upgrade head`),
+never at import, so workers start without touching the database.
 """
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, equipment, maintenance_team, maintenance_request, reports
+from metrics import PrometheusMiddleware, STARTUP_SECONDS, render_metrics
+from background import register_job, start_jobs, stop_jobs
+from archive import ARCHIVE_INTERVAL_SECONDS, archive_closed_requests
+from database import read_engine, check_replica_lag
+from sync_log import SYNC_LOG_COMPACT_INTERVAL_SECONDS, compact_request_changes
+from rollups import ROLLUP_INTERVAL_SECONDS, refresh_request_rollups
+from risk import RISK_SCORE_INTERVAL_SECONDS, score_equipment
+from preventive import PREVENTIVE_GENERATE_INTERVAL_SECONDS, generate_preventive_requests
+from telemetry import TELEMETRY_PRUNE_INTERVAL_SECONDS, prune_telemetry
+from purge import PURGE_INTERVAL_SECONDS, purge_pending_equipment
+from profiler import ProfilingMiddleware
+from compression import CompressionMiddleware
+from sites import SiteMiddleware, for_each_site
+from routers import auth, batch, equipment, maintenance_team, maintenance_request, preventive_plans, reports, telemetry, profiling
+
+logger = logging.getLogger("uvicorn.error")
+
+# Jobs run against every site's database in turn
+register_job("archive_closed_requests", ARCHIVE_INTERVAL_SECONDS, for_each_site(archive_closed_requests))
+register_job("compact_request_changes", SYNC_LOG_COMPACT_INTERVAL_SECONDS, for_each_site(compact_request_changes))
+register_job("refresh_request_rollups", ROLLUP_INTERVAL_SECONDS, for_each_site(refresh_request_rollups))
+register_job("score_equipment", RISK_SCORE_INTERVAL_SECONDS, for_each_site(score_equipment))
+register_job("generate_preventive_requests", PREVENTIVE_GENERATE_INTERVAL_SECONDS, for_each_site(generate_preventive_requests))
+register_job("prune_telemetry", TELEMETRY_PRUNE_INTERVAL_SECONDS, for_each_site(prune_telemetry))
+register_job("purge_pending_equipment", PURGE_INTERVAL_SECONDS, for_each_site(purge_pending_equipment))
+if read_engine is not None:
+    register_job("check_replica_lag", 10, check_replica_lag)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Report cold-start time and run background jobs; the engine connects lazily"""
+    startup_seconds = time.perf_counter() - _import_started
+    STARTUP_SECONDS.set(startup_seconds)
+    logger.info("GearGuard API ready in %.1f ms", startup_seconds * 1000)
+    jobs = start_jobs()
+    yield
+    await stop_jobs(jobs)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="GearGuard API",
     description="Maintenance Management System API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -26,14 +72,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Request versions, sent back as If-Match
 )
 
+# Route the request's database sessions to its token's site
+app.add_middleware(SiteMiddleware)
+
+# Response compression (inside metrics and profiling, so both see its cost)
+app.add_middleware(CompressionMiddleware)
+
+# Profiling hook (a no-op unless an admin has armed a capture)
+app.add_middleware(ProfilingMiddleware)
+
+# Metrics middleware (outermost, so it times the full request)
+app.add_middleware(PrometheusMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(equipment.router, prefix="/api/equipment", tags=["Equipment"])
 app.include_router(maintenance_team.router, prefix="/api/maintenance-teams", tags=["Maintenance Teams"])
 app.include_router(maintenance_request.router, prefix="/api/maintenance-requests", tags=["Maintenance Requests"])
+app.include_router(preventive_plans.router, prefix="/api/preventive-plans", tags=["Preventive Plans"])
+app.include_router(telemetry.router, prefix="/api/telemetry", tags=["Telemetry"])
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(profiling.router, prefix="/api/admin/profile", tags=["Admin"])
+app.include_router(batch.router, prefix="/api/batch", tags=["Batch"])
 
 
 @app.get("/")
@@ -45,3 +108,8 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,182 @@
+"""
+Prometheus metrics for HTTP routes, the DB pool, auth and business events
+"""
+import time
+from datetime import date
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func, select
+
+from database import SessionLocal, engine, site_engines, use_site
+from models import MaintenanceRequest, RequestStatus
+
+# HTTP metrics
+HTTP_REQUEST_DURATION = Histogram(
+    "gearguard_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS = Counter(
+    "gearguard_http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "gearguard_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+STARTUP_SECONDS = Gauge(
+    "gearguard_startup_seconds",
+    "Time from importing the app to being ready to serve",
+)
+
+# Database pool metrics
+DB_CHECKOUTS = Counter(
+    "gearguard_db_pool_checkouts_total",
+    "Connections checked out of the pool",
+)
+DB_CONNECTION_HOLD = Histogram(
+    "gearguard_db_connection_hold_seconds",
+    "Time a pooled connection stays checked out",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+# Auth metrics
+PASSWORD_VERIFY_DURATION = Histogram(
+    "gearguard_password_verify_seconds",
+    "Time spent verifying bcrypt password hashes",
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+
+# Business metrics
+REQUESTS_CREATED = Counter(
+    "gearguard_maintenance_requests_created_total",
+    "Maintenance requests created",
+    ["request_type"],
+)
+STATUS_TRANSITIONS = Counter(
+    "gearguard_maintenance_request_status_transitions_total",
+    "Maintenance request status transitions",
+    ["from_status", "to_status"],
+)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, status codes and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_CHECKOUTS.inc()
+    connection_record.info["checkout_time"] = time.perf_counter()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    checkout_time = connection_record.info.pop("checkout_time", None)
+    if checkout_time is not None:
+        DB_CONNECTION_HOLD.observe(time.perf_counter() - checkout_time)
+
+
+for _site_engine in site_engines.values():
+    event.listen(_site_engine, "checkout", _on_checkout)
+    event.listen(_site_engine, "checkin", _on_checkin)
+
+
+class _ScrapeTimeCollector:
+    """Gauges computed only when /metrics is scraped, never on the request path"""
+
+    def describe(self):
+        # Declared up front so registering the collector doesn't query the database
+        return [
+            GaugeMetricFamily("gearguard_db_pool_checked_out", ""),
+            GaugeMetricFamily("gearguard_db_pool_size", ""),
+            GaugeMetricFamily("gearguard_db_pool_overflow", ""),
+            GaugeMetricFamily("gearguard_maintenance_requests_overdue", ""),
+        ]
+
+    def collect(self):
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            checked_out = GaugeMetricFamily(
+                "gearguard_db_pool_checked_out",
+                "Connections currently checked out of the pool",
+            )
+            checked_out.add_metric([], pool.checkedout())
+            yield checked_out
+
+            size = GaugeMetricFamily("gearguard_db_pool_size", "Configured pool size")
+            size.add_metric([], pool.size())
+            yield size
+
+            overflow = GaugeMetricFamily(
+                "gearguard_db_pool_overflow",
+                "Connections opened beyond the pool size",
+            )
+            overflow.add_metric([], pool.overflow())
+            yield overflow
+
+        overdue = GaugeMetricFamily(
+            "gearguard_maintenance_requests_overdue",
+            "Open maintenance requests past their scheduled date",
+        )
+        overdue.add_metric([], count_overdue_requests())
+        yield overdue
+
+
+def count_overdue_requests() -> int:
+    """Count open requests whose scheduled date has passed, across all sites"""
+    overdue = 0
+    for site in site_engines:
+        with use_site(site):
+            db = SessionLocal()
+            try:
+                overdue += db.execute(
+                    select(func.count(MaintenanceRequest.id)).where(
+                        MaintenanceRequest.scheduled_date < date.today(),
+                        MaintenanceRequest.status.notin_([RequestStatus.REPAIRED, RequestStatus.SCRAP]),
+                    )
+                ).scalar_one()
+            finally:
+                db.close()
+    return overdue
+
+
+REGISTRY.register(_ScrapeTimeCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all registered metrics in the Prometheus text format"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,61 @@
+"""
+Alembic environment - runs migrations against DATABASE_URL, or against one
+site's database with `alembic -x site=north upgrade head`
+"""
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+from alembic import context
+
+from database import DEFAULT_SITE, SITE_DATABASE_URLS, Base
+import models  # noqa: F401 - registers tables on Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+SITE = context.get_x_argument(as_dictionary=True).get("site", DEFAULT_SITE)
+if SITE not in SITE_DATABASE_URLS:
+    raise SystemExit(f"Unknown site {SITE!r}; configured sites: {', '.join(SITE_DATABASE_URLS)}")
+DATABASE_URL = SITE_DATABASE_URLS[SITE]
+# Migrations backfilling the site column read it from here
+config.attributes["site"] = SITE
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL to stdout without connecting"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the live database"""
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't ALTER most constraints; batch mode recreates tables instead
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,128 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 11:25:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('maintenance_teams',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('team_name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_maintenance_teams_id'), 'maintenance_teams', ['id'], unique=False)
+    op.create_index(op.f('ix_maintenance_teams_team_name'), 'maintenance_teams', ['team_name'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('role', sa.Enum('ADMIN', 'MANAGER', 'TECHNICIAN', 'USER', name='userrole'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+    op.create_table('equipment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('serial_number', sa.String(), nullable=True),
+    sa.Column('department', sa.String(), nullable=True),
+    sa.Column('assigned_employee_id', sa.Integer(), nullable=True),
+    sa.Column('purchase_date', sa.Date(), nullable=True),
+    sa.Column('warranty_expiry', sa.Date(), nullable=True),
+    sa.Column('location', sa.String(), nullable=True),
+    sa.Column('maintenance_team_id', sa.Integer(), nullable=True),
+    sa.Column('default_technician_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'SCRAPPED', name='equipmentstatus'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_employee_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['default_technician_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['maintenance_team_id'], ['maintenance_teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_equipment_id'), 'equipment', ['id'], unique=False)
+    op.create_index(op.f('ix_equipment_name'), 'equipment', ['name'], unique=False)
+    op.create_index(op.f('ix_equipment_serial_number'), 'equipment', ['serial_number'], unique=True)
+
+    op.create_table('team_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('display_name', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['team_id'], ['maintenance_teams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_team_members_id'), 'team_members', ['id'], unique=False)
+
+    op.create_table('maintenance_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('auto_filled_team_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_technician_id', sa.Integer(), nullable=True),
+    sa.Column('request_type', sa.Enum('CORRECTIVE', 'PREVENTIVE', name='requesttype'), nullable=False),
+    sa.Column('scheduled_date', sa.Date(), nullable=True),
+    sa.Column('duration_hours', sa.Float(), nullable=True),
+    sa.Column('status', sa.Enum('NEW', 'IN_PROGRESS', 'REPAIRED', 'SCRAP', name='requeststatus'), nullable=False),
+    sa.Column('scrap_reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_technician_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['auto_filled_team_id'], ['maintenance_teams.id'], ),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_maintenance_requests_id'), 'maintenance_requests', ['id'], unique=False)
+    op.create_index(op.f('ix_maintenance_requests_subject'), 'maintenance_requests', ['subject'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_maintenance_requests_subject'), table_name='maintenance_requests')
+    op.drop_index(op.f('ix_maintenance_requests_id'), table_name='maintenance_requests')
+    op.drop_table('maintenance_requests')
+
+    op.drop_index(op.f('ix_team_members_id'), table_name='team_members')
+    op.drop_table('team_members')
+
+    op.drop_index(op.f('ix_equipment_serial_number'), table_name='equipment')
+    op.drop_index(op.f('ix_equipment_name'), table_name='equipment')
+    op.drop_index(op.f('ix_equipment_id'), table_name='equipment')
+    op.drop_table('equipment')
+
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+
+    op.drop_index(op.f('ix_maintenance_teams_team_name'), table_name='maintenance_teams')
+    op.drop_index(op.f('ix_maintenance_teams_id'), table_name='maintenance_teams')
+    op.drop_table('maintenance_teams')
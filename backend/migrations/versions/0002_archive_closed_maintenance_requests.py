@@ -0,0 +1,50 @@
+"""Archive closed maintenance requests
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 11:26:50
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('maintenance_requests_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('auto_filled_team_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_technician_id', sa.Integer(), nullable=True),
+    sa.Column('request_type', postgresql.ENUM('CORRECTIVE', 'PREVENTIVE', name='requesttype', create_type=False), nullable=False),
+    sa.Column('scheduled_date', sa.Date(), nullable=True),
+    sa.Column('duration_hours', sa.Float(), nullable=True),
+    sa.Column('status', postgresql.ENUM('NEW', 'IN_PROGRESS', 'REPAIRED', 'SCRAP', name='requeststatus', create_type=False), nullable=False),
+    sa.Column('scrap_reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_technician_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['auto_filled_team_id'], ['maintenance_teams.id'], ),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_maintenance_requests_archive_equipment_id'), 'maintenance_requests_archive', ['equipment_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_maintenance_requests_archive_equipment_id'), table_name='maintenance_requests_archive')
+    op.drop_table('maintenance_requests_archive')
@@ -0,0 +1,45 @@
+"""Request change log for delta sync
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:30:18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('request_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.Column('auto_filled_team_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_technician_id', sa.Integer(), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_request_changes_request_id'), 'request_changes', ['request_id'], unique=False)
+
+    # Seed the log with existing requests so a sync from cursor 0 returns everything
+    op.execute(
+        "INSERT INTO request_changes (request_id, deleted, auto_filled_team_id, assigned_technician_id, created_by_id) "
+        "SELECT id, false, auto_filled_team_id, assigned_technician_id, created_by_id "
+        "FROM maintenance_requests ORDER BY id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_request_changes_request_id'), table_name='request_changes')
+    op.drop_table('request_changes')
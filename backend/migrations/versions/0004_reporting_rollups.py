@@ -0,0 +1,44 @@
+"""Reporting rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:31:44
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('request_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('request_type', postgresql.ENUM('CORRECTIVE', 'PREVENTIVE', name='requesttype', create_type=False), nullable=False),
+    sa.Column('department', sa.String(), nullable=True),
+    sa.Column('request_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'team_id', 'equipment_id', 'request_type')
+    )
+    op.create_index(op.f('ix_request_daily_rollups_department'), 'request_daily_rollups', ['department'], unique=False)
+
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('last_request_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_index(op.f('ix_request_daily_rollups_department'), table_name='request_daily_rollups')
+    op.drop_table('request_daily_rollups')
@@ -0,0 +1,59 @@
+"""Request status events
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:34:38
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('request_status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=False),
+    sa.Column('equipment_id', sa.Integer(), nullable=True),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('request_type', postgresql.ENUM('CORRECTIVE', 'PREVENTIVE', name='requesttype', create_type=False), nullable=False),
+    sa.Column('from_status', postgresql.ENUM('NEW', 'IN_PROGRESS', 'REPAIRED', 'SCRAP', name='requeststatus', create_type=False), nullable=True),
+    sa.Column('to_status', postgresql.ENUM('NEW', 'IN_PROGRESS', 'REPAIRED', 'SCRAP', name='requeststatus', create_type=False), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_status_events_request_id'), 'request_status_events', ['request_id'], unique=False)
+    op.create_index('ix_request_status_events_to_status_changed_at', 'request_status_events', ['to_status', 'changed_at'], unique=False)
+
+    # Approximate history for existing requests: their creation and, if they
+    # have moved on, a single jump from NEW to the current status
+    for table in ('maintenance_requests', 'maintenance_requests_archive'):
+        op.execute(
+            "INSERT INTO request_status_events "
+            "(request_id, equipment_id, team_id, request_type, from_status, to_status, changed_at) "
+            "SELECT id, equipment_id, auto_filled_team_id, request_type, NULL, 'NEW', "
+            "COALESCE(created_at, CURRENT_TIMESTAMP) "
+            f"FROM {table} ORDER BY id"
+        )
+        op.execute(
+            "INSERT INTO request_status_events "
+            "(request_id, equipment_id, team_id, request_type, from_status, to_status, changed_at) "
+            "SELECT id, equipment_id, auto_filled_team_id, request_type, 'NEW', status, "
+            "COALESCE(updated_at, created_at, CURRENT_TIMESTAMP) "
+            f"FROM {table} WHERE status <> 'NEW' ORDER BY id"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_request_status_events_to_status_changed_at', table_name='request_status_events')
+    op.drop_index(op.f('ix_request_status_events_request_id'), table_name='request_status_events')
+    op.drop_table('request_status_events')
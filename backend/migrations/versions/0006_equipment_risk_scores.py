@@ -0,0 +1,42 @@
+"""Equipment risk scores
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:36:16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('equipment_risk_scores',
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('corrective_last_year', sa.Integer(), nullable=False),
+    sa.Column('mean_repair_hours', sa.Float(), nullable=True),
+    sa.Column('age_years', sa.Float(), nullable=True),
+    sa.Column('out_of_warranty', sa.Boolean(), nullable=False),
+    sa.Column('scored_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('equipment_id')
+    )
+    op.create_index(op.f('ix_equipment_risk_scores_score'), 'equipment_risk_scores', ['score'], unique=False)
+
+    op.create_index(op.f('ix_maintenance_requests_equipment_id'), 'maintenance_requests', ['equipment_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_maintenance_requests_equipment_id'), table_name='maintenance_requests')
+
+    op.drop_index(op.f('ix_equipment_risk_scores_score'), table_name='equipment_risk_scores')
+    op.drop_table('equipment_risk_scores')
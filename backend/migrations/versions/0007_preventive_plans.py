@@ -0,0 +1,64 @@
+"""Preventive plans
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:38:18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('preventive_plans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('interval_unit', sa.Enum('DAY', 'WEEK', 'MONTH', name='planintervalunit'), nullable=False),
+    sa.Column('interval_count', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('duration_hours', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('generated_through', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_preventive_plans_equipment_id'), 'preventive_plans', ['equipment_id'], unique=False)
+    op.create_index(op.f('ix_preventive_plans_id'), 'preventive_plans', ['id'], unique=False)
+
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preventive_plan_id', sa.Integer(), nullable=True))
+        batch_op.create_index('uq_maintenance_requests_plan_date', ['preventive_plan_id', 'scheduled_date'], unique=True)
+        batch_op.create_foreign_key('fk_maintenance_requests_preventive_plan_id', 'preventive_plans', ['preventive_plan_id'], ['id'], ondelete='SET NULL')
+
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preventive_plan_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.drop_column('preventive_plan_id')
+
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_maintenance_requests_preventive_plan_id', type_='foreignkey')
+        batch_op.drop_index('uq_maintenance_requests_plan_date')
+        batch_op.drop_column('preventive_plan_id')
+
+    op.drop_index(op.f('ix_preventive_plans_id'), table_name='preventive_plans')
+    op.drop_index(op.f('ix_preventive_plans_equipment_id'), table_name='preventive_plans')
+    op.drop_table('preventive_plans')
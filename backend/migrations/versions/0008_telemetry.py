@@ -0,0 +1,75 @@
+"""Telemetry
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 11:44:48
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('telemetry_readings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_telemetry_readings_equipment_metric_time', 'telemetry_readings', ['equipment_id', 'metric', 'recorded_at'], unique=False)
+
+    op.create_table('telemetry_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=64), nullable=False),
+    sa.Column('operator', sa.Enum('GT', 'GTE', 'LT', 'LTE', name='telemetryoperator'), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('last_triggered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_triggered_value', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_telemetry_rules_equipment_metric', 'telemetry_rules', ['equipment_id', 'metric'], unique=False)
+    op.create_index(op.f('ix_telemetry_rules_id'), 'telemetry_rules', ['id'], unique=False)
+
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('telemetry_rule_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_maintenance_requests_telemetry_rule_id'), ['telemetry_rule_id'], unique=False)
+        batch_op.create_foreign_key('fk_maintenance_requests_telemetry_rule_id', 'telemetry_rules', ['telemetry_rule_id'], ['id'], ondelete='SET NULL')
+
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('telemetry_rule_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.drop_column('telemetry_rule_id')
+
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_maintenance_requests_telemetry_rule_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_maintenance_requests_telemetry_rule_id'))
+        batch_op.drop_column('telemetry_rule_id')
+
+    op.drop_index(op.f('ix_telemetry_rules_id'), table_name='telemetry_rules')
+    op.drop_index('ix_telemetry_rules_equipment_metric', table_name='telemetry_rules')
+    op.drop_table('telemetry_rules')
+
+    op.drop_index('ix_telemetry_readings_equipment_metric_time', table_name='telemetry_readings')
+    op.drop_table('telemetry_readings')
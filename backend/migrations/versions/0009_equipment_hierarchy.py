@@ -0,0 +1,48 @@
+"""Equipment hierarchy
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 11:47:35
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('equipment_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index(op.f('ix_equipment_closure_descendant_id'), 'equipment_closure', ['descendant_id'], unique=False)
+
+    with op.batch_alter_table('equipment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_equipment_parent_id'), ['parent_id'], unique=False)
+        batch_op.create_foreign_key('fk_equipment_parent_id', 'equipment', ['parent_id'], ['id'], ondelete='SET NULL')
+
+    # Existing equipment is flat: every piece is the root of its own subtree
+    op.execute("INSERT INTO equipment_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM equipment")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('equipment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_equipment_parent_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_equipment_parent_id'))
+        batch_op.drop_column('parent_id')
+
+    op.drop_index(op.f('ix_equipment_closure_descendant_id'), table_name='equipment_closure')
+    op.drop_table('equipment_closure')
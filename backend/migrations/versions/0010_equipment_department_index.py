@@ -0,0 +1,25 @@
+"""Equipment department index
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 11:50:41
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_equipment_department'), 'equipment', ['department'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_equipment_department'), table_name='equipment')
@@ -0,0 +1,34 @@
+"""Maintenance request version
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 12:07:48
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('maintenance_requests_archive', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,67 @@
+"""Database level cascades and equipment purges
+
+Foreign keys to users and teams become ON DELETE SET NULL so deleting one
+no longer needs the ORM to load and detach everything that references it.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 12:11:47
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Foreign keys created without a name are addressed by the name PostgreSQL gives them
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+# (table, column, referenced table) of each foreign key that becomes ON DELETE SET NULL
+SET_NULL_FOREIGN_KEYS = [
+    ("equipment", "assigned_employee_id", "users"),
+    ("equipment", "maintenance_team_id", "maintenance_teams"),
+    ("equipment", "default_technician_id", "users"),
+    ("maintenance_requests", "auto_filled_team_id", "maintenance_teams"),
+    ("maintenance_requests", "assigned_technician_id", "users"),
+    ("maintenance_requests", "created_by_id", "users"),
+    ("maintenance_requests_archive", "auto_filled_team_id", "maintenance_teams"),
+    ("maintenance_requests_archive", "assigned_technician_id", "users"),
+    ("maintenance_requests_archive", "created_by_id", "users"),
+    ("preventive_plans", "created_by_id", "users"),
+    ("telemetry_rules", "created_by_id", "users"),
+]
+
+
+def _replace_foreign_keys(ondelete) -> None:
+    tables = {}
+    for table, column, referent in SET_NULL_FOREIGN_KEYS:
+        tables.setdefault(table, []).append((column, referent))
+    for table, columns in tables.items():
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referent in columns:
+                name = f"{table}_{column}_fkey"
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    op.create_table('equipment_purges',
+    sa.Column('equipment_id', sa.Integer(), nullable=False),
+    sa.Column('requested_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('equipment_id')
+    )
+    _replace_foreign_keys('SET NULL')
+
+
+def downgrade() -> None:
+    _replace_foreign_keys(None)
+    op.drop_table('equipment_purges')
@@ -0,0 +1,41 @@
+"""Site column
+
+Existing rows belong to the site being migrated (alembic -x site=...). The
+server default only backfills them and is dropped again, so every site's
+schema is the same and an INSERT that leaves out site fails instead of being
+stamped silently; the ORM default fills it for new rows.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 12:23:57
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['equipment', 'maintenance_requests', 'maintenance_requests_archive', 'maintenance_teams']
+
+
+def upgrade() -> None:
+    site = context.config.attributes.get('site', 'main')
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('site', sa.String(), server_default=site, nullable=False))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('site', server_default=None)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('site')
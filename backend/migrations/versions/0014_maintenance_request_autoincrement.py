@@ -0,0 +1,55 @@
+"""Maintenance request autoincrement
+
+Without AUTOINCREMENT SQLite hands out max(id) + 1, so once the newest
+request is deleted or archived its id is issued again. Archived requests
+keep their id, so a reused one collides in the archive, and the rollup
+watermark skips requests given an id below it. PostgreSQL sequences never
+go back, so this only rebuilds the SQLite table.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 14:02:16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild(autoincrement: bool) -> None:
+    with op.batch_alter_table(
+        'maintenance_requests', schema=None, recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement},
+    ) as batch_op:
+        pass
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(True)
+    # Continue after every id issued so far, archived ones included
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        "SELECT 'maintenance_requests', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'maintenance_requests')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(id), 0) FROM maintenance_requests), "
+        "(SELECT coalesce(max(id), 0) FROM maintenance_requests_archive)) "
+        "WHERE name = 'maintenance_requests'"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(False)
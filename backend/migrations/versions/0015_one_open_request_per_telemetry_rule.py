@@ -0,0 +1,43 @@
+"""One open request per telemetry rule
+
+Concurrent ingests could each find no open request for a breached rule and
+both open one. Duplicates already open keep their request but lose the link
+to the rule (the oldest stays linked), so the index can be built.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 14:41:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0015'
+down_revision: Union[str, None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OPEN = "status IN ('NEW', 'IN_PROGRESS')"
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE maintenance_requests SET telemetry_rule_id = NULL "
+        f"WHERE telemetry_rule_id IS NOT NULL AND {OPEN} AND id > ("
+        "SELECT min(oldest.id) FROM maintenance_requests AS oldest "
+        "WHERE oldest.telemetry_rule_id = maintenance_requests.telemetry_rule_id "
+        "AND oldest.status IN ('NEW', 'IN_PROGRESS'))"
+    )
+    op.create_index(
+        'uq_maintenance_requests_open_telemetry_rule', 'maintenance_requests', ['telemetry_rule_id'], unique=True,
+        postgresql_where=sa.text(OPEN), sqlite_where=sa.text(OPEN),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_maintenance_requests_open_telemetry_rule', table_name='maintenance_requests')
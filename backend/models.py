@@ -1,11 +1,11 @@
 """
 SQLAlchemy models for GearGuard Maintenance Management System
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, Text, Date, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, Text, Date, Float, Index, delete, event, insert, inspect, literal, null, select, text, true, update
+from sqlalchemy.orm import relationship, Session
 from sqlalchemy.sql import func
 from sqlalchemy.ext.associationproxy import association_proxy
-from database import Base
+from database import Base, current_site_name
 import enum
 
 
@@ -37,6 +37,21 @@ class RequestStatus(str, enum.Enum):
     SCRAP = "SCRAP"
 
 
+class PlanIntervalUnit(str, enum.Enum):
+    """Recurrence unit of a preventive plan; MONTH keeps the start date's day of month"""
+    DAY = "DAY"
+    WEEK = "WEEK"
+    MONTH = "MONTH"
+
+
+class TelemetryOperator(str, enum.Enum):
+    """Comparison a telemetry rule applies between a reading and its threshold"""
+    GT = "GT"
+    GTE = "GTE"
+    LT = "LT"
+    LTE = "LTE"
+
+
 class User(Base):
     """User model with role-based access"""
     __tablename__ = "users"
@@ -52,9 +67,10 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    assigned_equipment = relationship("Equipment", back_populates="assigned_employee_rel", foreign_keys="Equipment.assigned_employee_id")
-    maintenance_requests = relationship("MaintenanceRequest", back_populates="assigned_technician", foreign_keys="MaintenanceRequest.assigned_technician_id")
-    team_memberships = relationship("TeamMember", back_populates="user")
+    # passive_deletes: the database's ON DELETE rules handle dependents, nothing is loaded to delete a row
+    assigned_equipment = relationship("Equipment", back_populates="assigned_employee_rel", foreign_keys="Equipment.assigned_employee_id", passive_deletes=True)
+    maintenance_requests = relationship("MaintenanceRequest", back_populates="assigned_technician", foreign_keys="MaintenanceRequest.assigned_technician_id", passive_deletes=True)
+    team_memberships = relationship("TeamMember", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class MaintenanceTeam(Base):
@@ -62,14 +78,15 @@ class MaintenanceTeam(Base):
     __tablename__ = "maintenance_teams"
 
     id = Column(Integer, primary_key=True, index=True)
+    site = Column(String, nullable=False, default=current_site_name)  # Plant the team works at
     team_name = Column(String, nullable=False, unique=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    equipment = relationship("Equipment", back_populates="maintenance_team")
-    maintenance_requests = relationship("MaintenanceRequest", back_populates="maintenance_team")
-    team_members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
+    equipment = relationship("Equipment", back_populates="maintenance_team", passive_deletes=True)
+    maintenance_requests = relationship("MaintenanceRequest", back_populates="maintenance_team", passive_deletes=True)
+    team_members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class TeamMember(Base):
@@ -92,24 +109,49 @@ class Equipment(Base):
     __tablename__ = "equipment"
 
     id = Column(Integer, primary_key=True, index=True)
+    site = Column(String, nullable=False, default=current_site_name)  # Plant, see database.SITE_DATABASE_URLS
     name = Column(String, nullable=False, index=True)
     serial_number = Column(String, unique=True, index=True, nullable=True)
-    department = Column(String, nullable=True)
-    assigned_employee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    department = Column(String, nullable=True, index=True)
+    assigned_employee_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     purchase_date = Column(Date, nullable=True)
     warranty_expiry = Column(Date, nullable=True)
     location = Column(String, nullable=True)
-    maintenance_team_id = Column(Integer, ForeignKey("maintenance_teams.id"), nullable=True)
-    default_technician_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    maintenance_team_id = Column(Integer, ForeignKey("maintenance_teams.id", ondelete="SET NULL"), nullable=True)
+    default_technician_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     status = Column(Enum(EquipmentStatus), default=EquipmentStatus.ACTIVE, nullable=False)
+    parent_id = Column(Integer, ForeignKey("equipment.id", ondelete="SET NULL"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
+    parent = relationship("Equipment", remote_side=[id], back_populates="children")
+    children = relationship("Equipment", back_populates="parent", passive_deletes=True)
     assigned_employee_rel = relationship("User", foreign_keys=[assigned_employee_id], back_populates="assigned_equipment")
     maintenance_team = relationship("MaintenanceTeam", back_populates="equipment")
     default_technician = relationship("User", foreign_keys=[default_technician_id])
-    maintenance_requests = relationship("MaintenanceRequest", back_populates="equipment", cascade="all, delete-orphan")
+    # Dependents go by ON DELETE CASCADE; deleting equipment never loads them
+    maintenance_requests = relationship("MaintenanceRequest", back_populates="equipment", cascade="all, delete-orphan", passive_deletes=True)
+    risk = relationship("EquipmentRiskScore", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    preventive_plans = relationship("PreventivePlan", back_populates="equipment", cascade="all, delete-orphan", passive_deletes=True)
+    telemetry_rules = relationship("TelemetryRule", back_populates="equipment", cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def risk_score(self):
+        return self.risk.score if self.risk is not None else None
+
+
+class EquipmentClosure(Base):
+    """Every ancestor/descendant pair of the equipment hierarchy.
+
+    Each piece of equipment is its own ancestor at depth 0, so a subtree is
+    all rows with a given ancestor_id. Maintained by the ORM listener below.
+    """
+    __tablename__ = "equipment_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
 
 
 class MaintenanceRequest(Base):
@@ -117,11 +159,12 @@ class MaintenanceRequest(Base):
     __tablename__ = "maintenance_requests"
 
     id = Column(Integer, primary_key=True, index=True)
+    site = Column(String, nullable=False, default=current_site_name)
     subject = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False)
-    auto_filled_team_id = Column(Integer, ForeignKey("maintenance_teams.id"), nullable=True)
-    assigned_technician_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    auto_filled_team_id = Column(Integer, ForeignKey("maintenance_teams.id", ondelete="SET NULL"), nullable=True)
+    assigned_technician_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     request_type = Column(Enum(RequestType), nullable=False)
     scheduled_date = Column(Date, nullable=True)  # Required for PREVENTIVE
     duration_hours = Column(Float, nullable=True)
@@ -129,7 +172,24 @@ class MaintenanceRequest(Base):
     scrap_reason = Column(Text, nullable=True)  # Log reason when scrapped
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    preventive_plan_id = Column(Integer, ForeignKey("preventive_plans.id", ondelete="SET NULL"), nullable=True)
+    telemetry_rule_id = Column(Integer, ForeignKey("telemetry_rules.id", ondelete="SET NULL"), nullable=True, index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped by every update; compare-and-swap token
+
+    # A plan never schedules two requests on the same day, so regeneration is idempotent.
+    # Ids must never be reused (archived requests and the rollup watermark keep them),
+    # which SQLite only guarantees with AUTOINCREMENT.
+    __table_args__ = (
+        Index("uq_maintenance_requests_plan_date", "preventive_plan_id", "scheduled_date", unique=True),
+        # A telemetry rule has at most one open request; concurrent ingests can't both open one
+        Index(
+            "uq_maintenance_requests_open_telemetry_rule", "telemetry_rule_id", unique=True,
+            postgresql_where=text("status IN ('NEW', 'IN_PROGRESS')"),
+            sqlite_where=text("status IN ('NEW', 'IN_PROGRESS')"),
+        ),
+        {"sqlite_autoincrement": True},
+    )
 
     # Relationships
     equipment = relationship("Equipment", back_populates="maintenance_requests")
@@ -137,3 +197,414 @@ class MaintenanceRequest(Base):
     assigned_technician = relationship("User", foreign_keys=[assigned_technician_id], back_populates="maintenance_requests")
     created_by = relationship("User", foreign_keys=[created_by_id])
 
+
+class PreventivePlan(Base):
+    """Recurring preventive maintenance for one piece of equipment"""
+    __tablename__ = "preventive_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    subject = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    interval_unit = Column(Enum(PlanIntervalUnit), nullable=False)
+    interval_count = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+    duration_hours = Column(Float, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    generated_through = Column(Date, nullable=True)  # Requests exist up to this date
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    equipment = relationship("Equipment", back_populates="preventive_plans")
+
+
+class TelemetryReading(Base):
+    """Append-only condition readings pushed by equipment.
+
+    Rows are never updated; the only index serves per-equipment metric series.
+    Readings go when their equipment does (ON DELETE CASCADE) or age out.
+    """
+    __tablename__ = "telemetry_readings"
+    __table_args__ = (
+        Index("ix_telemetry_readings_equipment_metric_time", "equipment_id", "metric", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False)
+    metric = Column(String(64), nullable=False)
+    value = Column(Float, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class TelemetryRule(Base):
+    """Threshold on one equipment metric that opens a corrective request when breached"""
+    __tablename__ = "telemetry_rules"
+    __table_args__ = (
+        Index("ix_telemetry_rules_equipment_metric", "equipment_id", "metric"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False)
+    metric = Column(String(64), nullable=False)
+    operator = Column(Enum(TelemetryOperator), nullable=False)
+    threshold = Column(Float, nullable=False)
+    subject = Column(String, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    last_triggered_at = Column(DateTime(timezone=True), nullable=True)
+    last_triggered_value = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    equipment = relationship("Equipment", back_populates="telemetry_rules")
+
+
+class MaintenanceRequestArchive(Base):
+    """Closed maintenance requests moved out of the hot table by the archiver"""
+    __tablename__ = "maintenance_requests_archive"
+
+    is_archived = True
+
+    id = Column(Integer, primary_key=True)  # Same id the request had in maintenance_requests
+    site = Column(String, nullable=False, default=current_site_name)
+    subject = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    auto_filled_team_id = Column(Integer, ForeignKey("maintenance_teams.id", ondelete="SET NULL"), nullable=True)
+    assigned_technician_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    request_type = Column(Enum(RequestType), nullable=False)
+    scheduled_date = Column(Date, nullable=True)
+    duration_hours = Column(Float, nullable=True)
+    status = Column(Enum(RequestStatus), nullable=False)
+    scrap_reason = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    preventive_plan_id = Column(Integer, nullable=True)
+    telemetry_rule_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    equipment = relationship("Equipment")
+    maintenance_team = relationship("MaintenanceTeam")
+    assigned_technician = relationship("User", foreign_keys=[assigned_technician_id])
+    created_by = relationship("User", foreign_keys=[created_by_id])
+
+
+class RequestChange(Base):
+    """Append-only change log of maintenance requests, read by delta sync clients.
+
+    The id is the sync cursor. Each entry snapshots the columns that decide
+    visibility so tombstones can be filtered per user after the row is gone.
+    """
+    __tablename__ = "request_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # Never reuse ids, cursors must only grow
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False, index=True)
+    deleted = Column(Boolean, default=False, nullable=False)
+    auto_filled_team_id = Column(Integer, nullable=True)
+    assigned_technician_id = Column(Integer, nullable=True)
+    created_by_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RequestStatusEvent(Base):
+    """Append-only log of maintenance request status transitions.
+
+    from_status is NULL for the event recording a request's creation. Team,
+    equipment and type are copied in so analytics never join back to requests.
+    """
+    __tablename__ = "request_status_events"
+    __table_args__ = (
+        Index("ix_request_status_events_to_status_changed_at", "to_status", "changed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False, index=True)
+    equipment_id = Column(Integer, nullable=True)
+    team_id = Column(Integer, nullable=True)
+    request_type = Column(Enum(RequestType), nullable=False)
+    from_status = Column(Enum(RequestStatus), nullable=True)
+    to_status = Column(Enum(RequestStatus), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EquipmentRiskScore(Base):
+    """Latest predicted failure risk of a piece of equipment, written by the scoring job"""
+    __tablename__ = "equipment_risk_scores"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False, index=True)  # 0-100, higher fails sooner
+    corrective_last_year = Column(Integer, nullable=False, default=0)
+    mean_repair_hours = Column(Float, nullable=True)
+    age_years = Column(Float, nullable=True)
+    out_of_warranty = Column(Boolean, nullable=False, default=False)
+    scored_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class EquipmentPurge(Base):
+    """Equipment being deleted in batches by the purge job; the row goes with the equipment"""
+    __tablename__ = "equipment_purges"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True)
+    requested_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RequestDailyRollup(Base):
+    """Requests created per day, team, equipment and type, maintained incrementally"""
+    __tablename__ = "request_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    team_id = Column(Integer, primary_key=True)  # 0 when the request had no team
+    equipment_id = Column(Integer, primary_key=True)
+    request_type = Column(Enum(RequestType), primary_key=True)
+    department = Column(String, nullable=True, index=True)
+    request_count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Highest maintenance request id already folded into a rollup"""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_request_id = Column(Integer, nullable=False, default=0)
+
+
+# Equipment hierarchy: ORM inserts, moves and deletes of equipment keep equipment_closure in step
+
+def _attach_subtree(connection, equipment_id, parent_id):
+    """Link equipment_id and everything under it to parent_id and its ancestors"""
+    closure = EquipmentClosure.__table__
+    above = closure.alias("above")
+    below = closure.alias("below")
+    connection.execute(
+        insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above.join(below, true()))
+            .where(above.c.descendant_id == parent_id, below.c.ancestor_id == equipment_id)
+        )
+    )
+
+
+def _detach_subtree(connection, equipment_id, include_self=False):
+    """Unlink equipment_id's subtree from the ancestors above it (and from equipment_id itself if include_self)"""
+    closure = EquipmentClosure.__table__
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == equipment_id)
+    if include_self:
+        above = select(closure.c.ancestor_id).where(closure.c.descendant_id == equipment_id)
+    else:
+        above = select(closure.c.ancestor_id).where(closure.c.descendant_id == equipment_id, closure.c.depth > 0)
+    connection.execute(
+        delete(closure).where(closure.c.descendant_id.in_(subtree), closure.c.ancestor_id.in_(above))
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _detach_deleted_equipment(session, flush_context, instances):
+    # Runs before the DELETE so the rows still exist; children become roots of their own subtrees
+    connection = None
+    for obj in session.deleted:
+        if isinstance(obj, Equipment) and obj.id is not None:
+            connection = connection or session.connection()
+            _detach_subtree(connection, obj.id, include_self=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_equipment_closure(session, flush_context):
+    new = [obj for obj in session.new if isinstance(obj, Equipment)]
+    moved = []
+    for obj in session.dirty:
+        if isinstance(obj, Equipment) and obj not in session.deleted:
+            history = inspect(obj).attrs.parent_id.history
+            if history.has_changes() and history.deleted != history.added:
+                moved.append(obj)
+    if not new and not moved:
+        return
+    connection = session.connection()
+    if new:
+        connection.execute(
+            insert(EquipmentClosure.__table__),
+            [{"ancestor_id": obj.id, "descendant_id": obj.id, "depth": 0} for obj in new]
+        )
+        # New equipment has no descendants yet: copy the parent's ancestor rows, one
+        # INSERT ... SELECT per level so parents added in the same flush go first
+        closure = EquipmentClosure.__table__
+        pending = {obj.id: obj.parent_id for obj in new if obj.parent_id is not None}
+        while pending:
+            ready = [id_ for id_, parent_id in pending.items() if parent_id not in pending] or list(pending)
+            connection.execute(
+                insert(closure).from_select(
+                    ["ancestor_id", "descendant_id", "depth"],
+                    select(closure.c.ancestor_id, Equipment.id, closure.c.depth + 1)
+                    .join(closure, closure.c.descendant_id == Equipment.parent_id)
+                    .where(Equipment.id.in_(ready))
+                )
+            )
+            for id_ in ready:
+                del pending[id_]
+    for obj in moved:
+        _detach_subtree(connection, obj.id)
+        if obj.parent_id is not None:
+            _attach_subtree(connection, obj.id, obj.parent_id)
+
+
+def link_equipment(session, equipment_id, parent_id=None):
+    """Closure rows for equipment inserted set-based, bypassing the ORM, in one INSERT ... SELECT"""
+    closure = EquipmentClosure.__table__
+    rows = select(literal(equipment_id), literal(equipment_id), literal(0))
+    if parent_id is not None:
+        rows = rows.union_all(
+            select(closure.c.ancestor_id, literal(equipment_id), closure.c.depth + 1)
+            .where(closure.c.descendant_id == parent_id)
+        )
+    session.execute(insert(closure).from_select(["ancestor_id", "descendant_id", "depth"], rows))
+
+
+def unlink_equipment(session, equipment_id):
+    """Drop equipment_id's closure rows before a set-based DELETE; its children become roots"""
+    _detach_subtree(session.connection(), equipment_id, include_self=True)
+
+
+def move_equipment(session, equipment_id, parent_id):
+    """Relink equipment_id's subtree under parent_id after a set-based UPDATE of its parent"""
+    connection = session.connection()
+    _detach_subtree(connection, equipment_id)
+    if parent_id is not None:
+        _attach_subtree(connection, equipment_id, parent_id)
+
+
+# Change tracking: every ORM write to a maintenance request appends to request_changes
+
+def _change_row(request, deleted, team_id=None, technician_id=None):
+    return {
+        "request_id": request.id,
+        "deleted": deleted,
+        "auto_filled_team_id": team_id if team_id is not None else request.auto_filled_team_id,
+        "assigned_technician_id": technician_id if technician_id is not None else request.assigned_technician_id,
+        "created_by_id": request.created_by_id,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _log_request_changes(session, flush_context):
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, MaintenanceRequest):
+            rows.append(_change_row(obj, False))
+    for obj in session.dirty:
+        if isinstance(obj, MaintenanceRequest) and session.is_modified(obj):
+            # Tombstone for whoever could see the old team/technician, then the new state
+            state = inspect(obj)
+            old_team = state.attrs.auto_filled_team_id.history.deleted
+            old_technician = state.attrs.assigned_technician_id.history.deleted
+            if (old_team and old_team[0] is not None) or (old_technician and old_technician[0] is not None):
+                rows.append(_change_row(
+                    obj, True,
+                    team_id=old_team[0] if old_team else None,
+                    technician_id=old_technician[0] if old_technician else None
+                ))
+            rows.append(_change_row(obj, False))
+    for obj in session.deleted:
+        if isinstance(obj, MaintenanceRequest):
+            rows.append(_change_row(obj, True))
+    if rows:
+        session.connection().execute(insert(RequestChange.__table__), rows)
+
+
+def log_request_changes(session, where_clause, deleted: bool = False):
+    """Log changes for a set-based write that bypasses the ORM, in one INSERT ... SELECT.
+
+    Call after an UPDATE (or before a DELETE) with the WHERE clause it used.
+    """
+    requests = MaintenanceRequest.__table__
+    session.execute(
+        insert(RequestChange.__table__).from_select(
+            ["request_id", "deleted", "auto_filled_team_id", "assigned_technician_id", "created_by_id"],
+            select(
+                requests.c.id,
+                literal(deleted),
+                requests.c.auto_filled_team_id,
+                requests.c.assigned_technician_id,
+                requests.c.created_by_id
+            ).where(where_clause)
+        )
+    )
+
+
+# Status history: every ORM status transition appends to request_status_events
+
+def _status_event_row(request, from_status):
+    return {
+        "request_id": request.id,
+        "equipment_id": request.equipment_id,
+        "team_id": request.auto_filled_team_id,
+        "request_type": request.request_type,
+        "from_status": from_status,
+        "to_status": request.status,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _log_status_events(session, flush_context):
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, MaintenanceRequest):
+            rows.append(_status_event_row(obj, None))
+    for obj in session.dirty:
+        if isinstance(obj, MaintenanceRequest):
+            old_status = inspect(obj).attrs.status.history.deleted
+            if old_status and old_status[0] != obj.status:
+                rows.append(_status_event_row(obj, old_status[0]))
+    if rows:
+        session.connection().execute(insert(RequestStatusEvent.__table__), rows)
+
+
+def log_status_events(session, where_clause, to_status=None):
+    """Log status events for a set-based write that bypasses the ORM, in one INSERT ... SELECT.
+
+    Without to_status, logs the creation of inserted requests (call after the
+    INSERT). With to_status, logs the transition (call before the UPDATE).
+    """
+    requests = MaintenanceRequest.__table__
+    if to_status is None:
+        from_status, new_status = null(), requests.c.status
+    else:
+        from_status, new_status = requests.c.status, literal(to_status, type_=requests.c.status.type)
+    session.execute(
+        insert(RequestStatusEvent.__table__).from_select(
+            ["request_id", "equipment_id", "team_id", "request_type", "from_status", "to_status"],
+            select(
+                requests.c.id,
+                requests.c.equipment_id,
+                requests.c.auto_filled_team_id,
+                requests.c.request_type,
+                from_status,
+                new_status
+            ).where(where_clause)
+        )
+    )
+
+
+def unassign_requests(session, column: str, value):
+    """Clear a team or technician column on every request referencing value, ahead of deleting it.
+
+    ON DELETE SET NULL would do the same without touching the version or
+    telling sync clients, so it is done here: a tombstone for whoever could
+    see the request through value, the UPDATE, then the new state.
+    """
+    requests = MaintenanceRequest.__table__
+    changes = RequestChange.__table__
+    before = session.execute(select(func.coalesce(func.max(changes.c.id), 0))).scalar()
+    where = requests.c[column] == value
+    log_request_changes(session, where, deleted=True)
+    session.execute(update(requests).where(where).values({column: None, "version": requests.c.version + 1}))
+    # The tombstones just logged name the requests the UPDATE touched
+    log_request_changes(session, requests.c.id.in_(
+        select(changes.c.request_id).where(changes.c.id > before, changes.c.deleted.is_(True))
+    ))
@@ -0,0 +1,198 @@
+"""
+Generation of preventive maintenance requests from recurring plans
+
+Active plans are processed in id-ordered chunks. Occurrence dates between a
+plan's generated_through watermark and the horizon are expanded with NumPy
+and handed to the database as one array parameter; a single INSERT ... SELECT
+per chunk joins them to the plans and equipment, auto-filling team and
+technician the same way create_maintenance_request does. ON CONFLICT DO
+NOTHING on (preventive_plan_id, scheduled_date) makes re-running harmless.
+
+Run once from the command line with `python preventive.py [horizon_days]`.
+"""
+import json
+import os
+import sys
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Date, Integer, and_, func, literal, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from autofill import auto_fill_columns
+from database import SessionLocal, dialect_insert
+from metrics import REQUESTS_CREATED
+from models import (
+    Equipment, EquipmentStatus, MaintenanceRequest, PlanIntervalUnit, PreventivePlan,
+    RequestStatus, RequestType, log_request_changes, log_status_events
+)
+
+PREVENTIVE_HORIZON_DAYS = int(os.getenv("PREVENTIVE_HORIZON_DAYS", "90"))
+PREVENTIVE_GENERATE_INTERVAL_SECONDS = int(os.getenv("PREVENTIVE_GENERATE_INTERVAL_SECONDS", "3600"))
+PREVENTIVE_CHUNK_SIZE = int(os.getenv("PREVENTIVE_CHUNK_SIZE", "2000"))
+
+
+def expand_occurrences(plans, first: np.ndarray, last: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Every scheduled date of every plan within [first, last], as (plan ids, dates).
+
+    Schedules are anchored at start_date. DAY and WEEK plans step by a fixed
+    number of days; MONTH plans keep the start day, clamped to short months.
+    """
+    ids = np.array([plan.id for plan in plans], dtype=np.int64)
+    start = np.array([plan.start_date for plan in plans], dtype="datetime64[D]")
+    counts = np.array([plan.interval_count for plan in plans], dtype=np.int64)
+    monthly = np.array([plan.interval_unit == PlanIntervalUnit.MONTH for plan in plans])
+    weekly = np.array([plan.interval_unit == PlanIntervalUnit.WEEK for plan in plans])
+
+    step_days = counts * np.where(weekly, 7, 1)
+    start_month = start.astype("datetime64[M]")
+    start_day = (start - start_month.astype("datetime64[D]")).astype(np.int64) + 1
+
+    # Range of occurrence numbers k that can land inside [first, last]
+    k_first = np.where(
+        monthly,
+        np.maximum((first.astype("datetime64[M]") - start_month).astype(np.int64), 0) // counts,
+        -(-np.maximum((first - start).astype(np.int64), 0) // step_days),
+    )
+    k_last = np.where(
+        monthly,
+        (last.astype("datetime64[M]") - start_month).astype(np.int64) // counts,
+        (last - start).astype(np.int64) // step_days,
+    )
+    n = np.maximum(k_last - k_first + 1, 0)
+    owner = np.repeat(np.arange(len(ids)), n)
+    k = k_first[owner] + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+
+    fixed_step = start[owner] + (k * step_days[owner]).astype("timedelta64[D]")
+    month = start_month[owner] + (k * counts[owner]).astype("timedelta64[M]")
+    month_start = month.astype("datetime64[D]")
+    month_length = ((month + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+    same_day = month_start + (np.minimum(start_day[owner], month_length) - 1).astype("timedelta64[D]")
+
+    dates = np.where(monthly[owner], same_day, fixed_step)
+    keep = (dates >= first[owner]) & (dates <= last[owner])
+    return ids[owner][keep], dates[keep]
+
+
+def _occurrence_source(db: Session, plan_ids: np.ndarray, dates: np.ndarray):
+    """(plan_id, scheduled_date) rows bound as a single parameter instead of one per row"""
+    day_strings = np.datetime_as_string(dates, unit="D").tolist()
+    if db.get_bind().dialect.name == "postgresql":
+        source = text(
+            "SELECT * FROM unnest(CAST(:plan_ids AS integer[]), CAST(:dates AS date[])) "
+            "AS occurrences(plan_id, scheduled_date)"
+        ).bindparams(plan_ids=plan_ids.tolist(), dates=day_strings)
+    else:
+        source = text(
+            "SELECT json_extract(value, '$[0]') AS plan_id, json_extract(value, '$[1]') AS scheduled_date "
+            "FROM json_each(:occurrences)"
+        ).bindparams(occurrences=json.dumps(list(zip(plan_ids.tolist(), day_strings))))
+    return source.columns(plan_id=Integer, scheduled_date=Date).subquery("occurrences")
+
+
+def generate_chunk(db: Session, after_id: int, limit: int, horizon: date, today: date) -> tuple[int, int]:
+    """Materialize requests for the next chunk of plans; returns (last plan id, requests created)"""
+    active = and_(PreventivePlan.is_active.is_(True), Equipment.status == EquipmentStatus.ACTIVE)
+    plans = db.execute(
+        select(
+            PreventivePlan.id,
+            PreventivePlan.interval_unit,
+            PreventivePlan.interval_count,
+            PreventivePlan.start_date,
+            PreventivePlan.end_date,
+            PreventivePlan.generated_through,
+        )
+        .join(Equipment, Equipment.id == PreventivePlan.equipment_id)
+        .where(PreventivePlan.id > after_id, active)
+        .order_by(PreventivePlan.id)
+        .limit(limit)
+    ).all()
+    if not plans:
+        return after_id, 0
+
+    first = np.array([
+        max(plan.start_date, today, plan.generated_through + timedelta(days=1) if plan.generated_through else today)
+        for plan in plans
+    ], dtype="datetime64[D]")
+    last = np.array([min(horizon, plan.end_date or horizon) for plan in plans], dtype="datetime64[D]")
+    plan_ids, dates = expand_occurrences(plans, first, last)
+
+    chunk_ids = [plan.id for plan in plans]
+    requests = MaintenanceRequest.__table__
+    created = 0
+    if len(plan_ids):
+        occurrences = _occurrence_source(db, plan_ids, dates)
+        columns = {
+            "subject": PreventivePlan.subject,
+            "description": PreventivePlan.description,
+            "equipment_id": PreventivePlan.equipment_id,
+            **auto_fill_columns(),
+            "request_type": literal(RequestType.PREVENTIVE, type_=requests.c.request_type.type),
+            "scheduled_date": occurrences.c.scheduled_date,
+            "duration_hours": PreventivePlan.duration_hours,
+            "status": literal(RequestStatus.NEW, type_=requests.c.status.type),
+            "created_by_id": PreventivePlan.created_by_id,
+            "preventive_plan_id": PreventivePlan.id,
+        }
+        before = db.execute(select(func.coalesce(func.max(requests.c.id), 0))).scalar()
+        db.execute(
+            dialect_insert(db)(requests).from_select(
+                list(columns),
+                select(*columns.values())
+                .select_from(occurrences)
+                .join(PreventivePlan, PreventivePlan.id == occurrences.c.plan_id)
+                .join(Equipment, Equipment.id == PreventivePlan.equipment_id)
+                .where(active)
+            ).on_conflict_do_nothing(index_elements=["preventive_plan_id", "scheduled_date"])
+        )
+        # Set-based inserts bypass the ORM listeners, so log sync changes and status events here
+        inserted = and_(requests.c.id > before, requests.c.preventive_plan_id.in_(chunk_ids))
+        log_request_changes(db, inserted)
+        log_status_events(db, inserted)
+        created = db.execute(select(func.count()).select_from(requests).where(inserted)).scalar()
+        REQUESTS_CREATED.labels(RequestType.PREVENTIVE.value).inc(created)
+
+    db.execute(
+        update(PreventivePlan)
+        .where(
+            PreventivePlan.id.in_(chunk_ids),
+            or_(PreventivePlan.generated_through.is_(None), PreventivePlan.generated_through < horizon),
+        )
+        .values(generated_through=horizon)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return chunk_ids[-1], created
+
+
+def generate_preventive_requests(
+    horizon_days: int = PREVENTIVE_HORIZON_DAYS,
+    chunk_size: int = PREVENTIVE_CHUNK_SIZE,
+    today: Optional[date] = None,
+    db: Optional[Session] = None
+) -> int:
+    """Create every preventive request due within the horizon; returns requests created.
+
+    Commits once per chunk, on db if given (the caller closes it) or a new session.
+    """
+    today = today or date.today()
+    horizon = today + timedelta(days=horizon_days)
+    created = 0
+    last_id = 0
+    session = db or SessionLocal()
+    try:
+        while True:
+            next_id, count = generate_chunk(session, last_id, chunk_size, horizon, today)
+            if next_id == last_id:
+                return created
+            created += count
+            last_id = next_id
+    finally:
+        if db is None:
+            session.close()
+
+
+if __name__ == "__main__":
+    horizon_days = int(sys.argv[1]) if len(sys.argv) > 1 else PREVENTIVE_HORIZON_DAYS
+    print(f"🗓️  Created {generate_preventive_requests(horizon_days)} preventive maintenance requests")
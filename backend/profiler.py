@@ -0,0 +1,156 @@
+"""
+On-demand sampling profiler producing flamegraph-compatible collapsed stacks
+"""
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# Frames from these files mean a thread is parked waiting for work
+_IDLE_FILES = tuple(
+    os.path.join(os.path.dirname(threading.__file__), name)
+    for name in ("threading.py", "queue.py", "selectors.py", "concurrent/futures/thread.py")
+)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all live threads from a background thread"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        # Restartable, so request captures can pause between matching requests.
+        # Each run gets its own stop event: a sampler still winding down from
+        # the last stop() must not see the new run's event.
+        self._stop = threading.Event()
+        thread = threading.Thread(target=self._run, args=(self._stop,), name="gearguard-profiler", daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+    def stop(self):
+        """Signal the sampler to stop; doesn't wait, so it is safe on the event loop"""
+        self._stop.set()
+
+    async def finish(self):
+        """Stop and wait, off the event loop, for every sampler thread to exit"""
+        self.stop()
+        for thread in self._threads:
+            await run_in_threadpool(thread.join)
+
+    def _run(self, stop: threading.Event):
+        own_id = threading.get_ident()
+        while not stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    self.stacks[stack] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Render samples in Brendan Gregg's collapsed-stack format"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _collapse(frame) -> Optional[str]:
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class RequestCapture:
+    """Samples the worker while the next N requests for a path prefix are in flight"""
+
+    def __init__(self, path_prefix: str, requests: int, interval: float):
+        self.path_prefix = path_prefix
+        self.remaining = requests
+        self.profiler = SamplingProfiler(interval)
+        self.done = asyncio.Event()
+        self._in_flight = 0
+
+    def matches(self, path: str) -> bool:
+        return self.remaining > 0 and path.startswith(self.path_prefix)
+
+    def enter(self):
+        self.remaining -= 1
+        if self._in_flight == 0:
+            self.profiler.start()
+        self._in_flight += 1
+
+    def exit(self):
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self.profiler.stop()
+            if self.remaining <= 0:
+                self.done.set()
+
+
+# None means no request capture is armed; only one capture may run per worker
+active_capture: Optional[RequestCapture] = None
+busy = False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that is a single attribute check unless a capture is armed"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        capture = active_capture
+        if capture is None or scope["type"] != "http" or not capture.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        capture.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            capture.exit()
+
+
+async def profile_for(seconds: float, interval: float) -> SamplingProfiler:
+    """Sample every thread in this worker for a fixed duration"""
+    global busy
+    busy = True
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await profiler.finish()
+        busy = False
+    return profiler
+
+
+async def profile_requests(path_prefix: str, requests: int, interval: float, timeout: float) -> RequestCapture:
+    """Sample the worker while the next matching requests are served"""
+    global active_capture, busy
+    busy = True
+    capture = RequestCapture(path_prefix, requests, interval)
+    active_capture = capture
+    try:
+        await asyncio.wait_for(capture.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        active_capture = None
+        await capture.profiler.finish()
+        busy = False
+    return capture
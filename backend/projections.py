@@ -0,0 +1,181 @@
+"""
+ORM-free read path for list endpoints
+
+List pages are read with Core select()s of just the columns their response
+needs, so no ORM instances are built or enter the identity map. A page costs
+a fixed number of queries whatever its size: the rows themselves (requests
+come with their equipment and its risk score joined in), then the teams,
+team members and users they reference, each fetched once by id. Rows are
+turned into plain dicts that serialization.render() validates and writes out
+in one pass.
+
+Write routes reuse the same payload builders: the row they loaded while
+validating is merged with what their INSERT/UPDATE ... RETURNING sent back,
+so the response needs no refresh or lazy loads.
+"""
+from datetime import date
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import (
+    Equipment, EquipmentRiskScore, MaintenanceRequest, MaintenanceTeam, RequestStatus, TeamMember, User
+)
+
+USER_FIELDS = ("id", "email", "username", "full_name", "role", "is_active", "created_at")
+EQUIPMENT_FIELDS = (
+    "id", "name", "serial_number", "department", "assigned_employee_id", "purchase_date",
+    "warranty_expiry", "location", "maintenance_team_id", "default_technician_id", "status",
+    "parent_id", "created_at", "updated_at",
+)
+REQUEST_FIELDS = (
+    "id", "subject", "description", "equipment_id", "request_type", "scheduled_date",
+    "duration_hours", "status", "auto_filled_team_id", "assigned_technician_id", "scrap_reason",
+    "created_at", "updated_at", "preventive_plan_id", "telemetry_rule_id", "version",
+)
+OPEN_STATUSES = (RequestStatus.NEW, RequestStatus.IN_PROGRESS)
+CLOSED_STATUSES = (RequestStatus.REPAIRED, RequestStatus.SCRAP)
+
+
+def count_rows(db: Session, stmt) -> int:
+    """COUNT(*) of a select, ignoring its ordering"""
+    return db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+
+
+def equipment_select(prefix: str = ""):
+    """Equipment columns plus the latest risk score, labelled with prefix (equipment__ matches request_select())"""
+    equipment = Equipment.__table__
+    return select(
+        *[equipment.c[name].label(f"{prefix}{name}") if prefix else equipment.c[name] for name in EQUIPMENT_FIELDS],
+        EquipmentRiskScore.score.label(f"{prefix}risk_score"),
+    ).select_from(
+        equipment.outerjoin(EquipmentRiskScore.__table__, EquipmentRiskScore.equipment_id == equipment.c.id)
+    )
+
+
+def request_select(model=MaintenanceRequest):
+    """Request columns of model (live or archive table), with the equipment's prefixed by equipment__"""
+    requests = model.__table__
+    equipment = Equipment.__table__
+    return select(
+        *[requests.c[name] for name in REQUEST_FIELDS],
+        *[equipment.c[name].label(f"equipment__{name}") for name in EQUIPMENT_FIELDS],
+        EquipmentRiskScore.score.label("equipment__risk_score"),
+    ).select_from(
+        requests
+        .outerjoin(equipment, equipment.c.id == requests.c.equipment_id)
+        .outerjoin(EquipmentRiskScore.__table__, EquipmentRiskScore.equipment_id == requests.c.equipment_id)
+    )
+
+
+class _Row(SimpleNamespace):
+    """Stand-in for a result row, built by merge_rows()"""
+
+    def _asdict(self) -> dict:
+        return dict(vars(self))
+
+
+def merge_rows(*rows, **values) -> _Row:
+    """One row from several (later ones win) plus values, e.g. a row loaded before a write
+    with the columns its RETURNING sent back, to pass to the payload builders below"""
+    merged = {}
+    for row in rows:
+        merged.update(row._asdict())
+    merged.update(values)
+    return _Row(**merged)
+
+
+def users_by_id(db: Session, ids: Iterable[Optional[int]]) -> dict[int, dict]:
+    ids = {id_ for id_ in ids if id_ is not None}
+    if not ids:
+        return {}
+    rows = db.execute(select(*[User.__table__.c[name] for name in USER_FIELDS]).where(User.id.in_(ids)))
+    return {row.id: row._asdict() for row in rows}
+
+
+def teams_by_id(db: Session, ids: Iterable[Optional[int]]) -> dict[int, dict]:
+    """Teams with their members, in two queries"""
+    ids = {id_ for id_ in ids if id_ is not None}
+    if not ids:
+        return {}
+    teams = {
+        row.id: {"id": row.id, "team_name": row.team_name, "created_at": row.created_at, "team_members": []}
+        for row in db.execute(
+            select(MaintenanceTeam.id, MaintenanceTeam.team_name, MaintenanceTeam.created_at)
+            .where(MaintenanceTeam.id.in_(ids))
+        )
+    }
+    members = db.execute(
+        select(
+            TeamMember.id.label("member_id"), TeamMember.team_id, TeamMember.user_id, TeamMember.display_name,
+            *[User.__table__.c[name] for name in USER_FIELDS],
+        )
+        .join(User, User.id == TeamMember.user_id)
+        .where(TeamMember.team_id.in_(ids))
+        .order_by(TeamMember.id)
+    )
+    for row in members:
+        teams[row.team_id]["team_members"].append({
+            "id": row.member_id,
+            "user_id": row.user_id,
+            "display_name": row.display_name,
+            "user": {name: getattr(row, name) for name in USER_FIELDS},
+        })
+    return teams
+
+
+def equipment_payloads(db: Session, rows, open_counts: Optional[dict] = None) -> list[dict]:
+    """EquipmentResponse dicts for rows of equipment_select()"""
+    rows = list(rows)
+    teams = teams_by_id(db, (row.maintenance_team_id for row in rows))
+    users = users_by_id(db, (row.default_technician_id for row in rows))
+    open_counts = open_counts or {}
+    items = []
+    for row in rows:
+        item = row._asdict()
+        item["maintenance_team"] = teams.get(item["maintenance_team_id"])
+        item["default_technician"] = users.get(item["default_technician_id"])
+        item["open_requests_count"] = open_counts.get(item["id"], 0)
+        items.append(item)
+    return items
+
+
+def open_request_counts(db: Session, equipment_ids: list[int]) -> dict[int, int]:
+    """Open requests per equipment, in one grouped query"""
+    if not equipment_ids:
+        return {}
+    return dict(db.execute(
+        select(MaintenanceRequest.equipment_id, func.count(MaintenanceRequest.id))
+        .where(MaintenanceRequest.equipment_id.in_(equipment_ids), MaintenanceRequest.status.in_(OPEN_STATUSES))
+        .group_by(MaintenanceRequest.equipment_id)
+    ).all())
+
+
+def request_payloads(db: Session, rows, archived: bool = False, today: Optional[date] = None) -> list[dict]:
+    """MaintenanceRequestResponse dicts for rows of request_select()"""
+    rows = list(rows)
+    today = today or date.today()
+    teams = teams_by_id(db, [row.auto_filled_team_id for row in rows] + [row.equipment__maintenance_team_id for row in rows])
+    users = users_by_id(db, [row.assigned_technician_id for row in rows] + [row.equipment__default_technician_id for row in rows])
+    items = []
+    for row in rows:
+        item = {name: getattr(row, name) for name in REQUEST_FIELDS}
+        if row.equipment__id is not None:
+            equipment = {name: getattr(row, f"equipment__{name}") for name in EQUIPMENT_FIELDS}
+            equipment["risk_score"] = row.equipment__risk_score
+            equipment["maintenance_team"] = teams.get(equipment["maintenance_team_id"])
+            equipment["default_technician"] = users.get(equipment["default_technician_id"])
+            item["equipment"] = equipment
+        item["maintenance_team"] = teams.get(item["auto_filled_team_id"])
+        item["assigned_technician"] = users.get(item["assigned_technician_id"])
+        item["is_archived"] = archived
+        item["is_overdue"] = bool(
+            not archived and
+            item["scheduled_date"] and
+            item["scheduled_date"] < today and
+            item["status"] not in CLOSED_STATUSES
+        )
+        items.append(item)
+    return items
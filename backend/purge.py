@@ -0,0 +1,108 @@
+"""
+Deleting equipment with its history
+
+Requests, archived requests, telemetry, plans, rules and risk scores go with
+their equipment through ON DELETE CASCADE, so a delete never loads them.
+Equipment with at most EQUIPMENT_PURGE_THRESHOLD dependent rows is dropped
+in the request. Anything larger is queued in equipment_purges and deleted
+PURGE_BATCH_SIZE rows per transaction in the background, so no single
+statement holds locks on tens of thousands of rows.
+
+Run pending purges once from the command line with `python purge.py`.
+"""
+import os
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import (
+    Equipment, EquipmentPurge, MaintenanceRequest, MaintenanceRequestArchive, TelemetryReading,
+    log_request_changes, unlink_equipment
+)
+from rollups import unfold_requests
+
+EQUIPMENT_PURGE_THRESHOLD = int(os.getenv("EQUIPMENT_PURGE_THRESHOLD", "5000"))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+PURGE_INTERVAL_SECONDS = int(os.getenv("PURGE_INTERVAL_SECONDS", "300"))
+
+# Largest dependents first; the rest are small enough to leave to the cascade
+_BATCHED_MODELS = [TelemetryReading, MaintenanceRequest, MaintenanceRequestArchive]
+
+
+def dependent_rows(db: Session, equipment_id: int, limit: int = EQUIPMENT_PURGE_THRESHOLD) -> int:
+    """Rows the cascade would delete with the equipment, counted up to limit"""
+    total = 0
+    for model in _BATCHED_MODELS:
+        total += len(db.execute(
+            select(model.id).where(model.equipment_id == equipment_id).limit(limit - total + 1)
+        ).all())
+        if total > limit:
+            break
+    return total
+
+
+def drop_equipment(db: Session, equipment_id: int):
+    """Delete the equipment; the database cascades to whatever depends on it. Caller commits."""
+    requests = MaintenanceRequest.__table__
+    archived = MaintenanceRequestArchive.__table__
+    # Sync clients drop the requests that go with it, and reports stop counting them
+    log_request_changes(db, requests.c.equipment_id == equipment_id, deleted=True)
+    unfold_requests(db, requests, requests.c.equipment_id == equipment_id)
+    unfold_requests(db, archived, archived.c.equipment_id == equipment_id)
+    unlink_equipment(db, equipment_id)
+    db.execute(delete(Equipment).where(Equipment.id == equipment_id))
+
+
+def purge_batch(db: Session, model, equipment_id: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete one batch of the equipment's rows of model; returns rows deleted"""
+    ids = db.execute(
+        select(model.id).where(model.equipment_id == equipment_id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    table = model.__table__
+    if model is MaintenanceRequest:
+        log_request_changes(db, table.c.id.in_(ids), deleted=True)
+    if model in (MaintenanceRequest, MaintenanceRequestArchive):
+        unfold_requests(db, table, table.c.id.in_(ids))
+    db.execute(delete(table).where(table.c.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def purge_equipment(equipment_id: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete the equipment's history in batches, then the equipment; returns rows deleted"""
+    removed = 0
+    db = SessionLocal()
+    try:
+        for model in _BATCHED_MODELS:
+            while True:
+                count = purge_batch(db, model, equipment_id, batch_size)
+                removed += count
+                if count < batch_size:
+                    break
+        # Also removes the equipment_purges row
+        drop_equipment(db, equipment_id)
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def purge_pending_equipment(batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Finish every queued purge, e.g. ones interrupted by a restart; returns equipment deleted"""
+    db = SessionLocal()
+    try:
+        pending = db.execute(
+            select(EquipmentPurge.equipment_id).order_by(EquipmentPurge.requested_at)
+        ).scalars().all()
+    finally:
+        db.close()
+    for equipment_id in pending:
+        purge_equipment(equipment_id, batch_size)
+    return len(pending)
+
+
+if __name__ == "__main__":
+    print(f"🗑️ Purged {purge_pending_equipment()} pieces of equipment")
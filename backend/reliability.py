@@ -0,0 +1,161 @@
+"""
+Reliability analytics (MTTR, MTBF, SLA breaches) over request_status_events
+
+Only corrective requests count as failures. A repair is a transition to
+REPAIRED; its duration runs from the request's creation event. MTBF is the
+mean gap between consecutive failures of the same equipment; a team's MTBF
+averages the gaps of the equipment it maintains.
+
+Events are read once per window as columns and aggregated with NumPy. Results
+for windows that have ended never change and are cached until evicted;
+windows reaching today are cached for RELIABILITY_CACHE_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, aliased
+
+from database import current_site
+from models import RequestStatus, RequestStatusEvent, RequestType
+
+SLA_REPAIR_HOURS = float(os.getenv("SLA_REPAIR_HOURS", "72"))
+RELIABILITY_CACHE_SECONDS = int(os.getenv("RELIABILITY_CACHE_SECONDS", "300"))
+RELIABILITY_CACHE_SIZE = 64
+
+_cache: "OrderedDict[tuple[str, date, date], tuple[float, dict]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    # SQLite hands back naive datetimes; they are UTC like everything else stored
+    return np.fromiter(
+        ((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp() for value in values),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+
+def _group_ids(values) -> np.ndarray:
+    # 0 stands in for "no team", as in the reporting rollups
+    return np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(values))
+
+
+def _load_repairs(db: Session, start: datetime, end: datetime):
+    repaired = aliased(RequestStatusEvent)
+    opened = aliased(RequestStatusEvent)
+    rows = db.execute(
+        select(repaired.equipment_id, repaired.team_id, opened.changed_at, repaired.changed_at)
+        .join(opened, and_(opened.request_id == repaired.request_id, opened.from_status.is_(None)))
+        .where(
+            repaired.to_status == RequestStatus.REPAIRED,
+            repaired.request_type == RequestType.CORRECTIVE,
+            repaired.changed_at >= start,
+            repaired.changed_at < end,
+        )
+    ).all()
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    equipment_ids, team_ids, opened_at, repaired_at = zip(*rows)
+    hours = (_epoch_seconds(repaired_at) - _epoch_seconds(opened_at)) / 3600.0
+    return _group_ids(equipment_ids), _group_ids(team_ids), hours
+
+
+def _load_failures(db: Session, start: datetime, end: datetime):
+    rows = db.execute(
+        select(RequestStatusEvent.equipment_id, RequestStatusEvent.team_id, RequestStatusEvent.changed_at)
+        .where(
+            RequestStatusEvent.from_status.is_(None),
+            RequestStatusEvent.request_type == RequestType.CORRECTIVE,
+            RequestStatusEvent.changed_at >= start,
+            RequestStatusEvent.changed_at < end,
+        )
+    ).all()
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    equipment_ids, team_ids, failed_at = zip(*rows)
+    return _group_ids(equipment_ids), _group_ids(team_ids), _epoch_seconds(failed_at)
+
+
+def _aggregate(keys: np.ndarray, repair_keys: np.ndarray, repair_hours: np.ndarray,
+               failure_keys: np.ndarray, interval_keys: np.ndarray, interval_hours: np.ndarray) -> list[dict]:
+    groups, inverse = np.unique(keys, return_inverse=True)
+    n = len(groups)
+    repair_idx = inverse[:len(repair_keys)]
+    failure_idx = inverse[len(repair_keys):len(repair_keys) + len(failure_keys)]
+    interval_idx = inverse[len(repair_keys) + len(failure_keys):]
+
+    repairs = np.bincount(repair_idx, minlength=n)
+    repair_total = np.bincount(repair_idx, weights=repair_hours, minlength=n)
+    breaches = np.bincount(repair_idx, weights=repair_hours > SLA_REPAIR_HOURS, minlength=n)
+    failures = np.bincount(failure_idx, minlength=n)
+    intervals = np.bincount(interval_idx, minlength=n)
+    interval_total = np.bincount(interval_idx, weights=interval_hours, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mttr = repair_total / repairs
+        mtbf = interval_total / intervals
+
+    return [
+        {
+            "id": int(groups[i]) or None,
+            "failures": int(failures[i]),
+            "repairs": int(repairs[i]),
+            "mttr_hours": round(float(mttr[i]), 2) if repairs[i] else None,
+            "mtbf_hours": round(float(mtbf[i]), 2) if intervals[i] else None,
+            "sla_breaches": int(breaches[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def compute_reliability(db: Session, start_date: date, end_date: date) -> dict:
+    """MTTR, MTBF and SLA breaches per equipment and team for events in [start_date, end_date]"""
+    start = datetime.combine(start_date, dt_time.min, tzinfo=timezone.utc)
+    end = datetime.combine(end_date + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+    repair_equipment, repair_teams, repair_hours = _load_repairs(db, start, end)
+    failure_equipment, failure_teams, failed_at = _load_failures(db, start, end)
+
+    # Gaps between consecutive failures of the same equipment, credited to the later failure's team
+    order = np.lexsort((failed_at, failure_equipment))
+    equipment_sorted = failure_equipment[order]
+    same_equipment = equipment_sorted[1:] == equipment_sorted[:-1]
+    gaps = (np.diff(failed_at[order]) / 3600.0)[same_equipment]
+    gap_equipment = equipment_sorted[1:][same_equipment]
+    gap_teams = failure_teams[order][1:][same_equipment]
+
+    return {
+        "equipment": _aggregate(
+            np.concatenate([repair_equipment, failure_equipment, gap_equipment]),
+            repair_equipment, repair_hours, failure_equipment, gap_equipment, gaps
+        ),
+        "teams": _aggregate(
+            np.concatenate([repair_teams, failure_teams, gap_teams]),
+            repair_teams, repair_hours, failure_teams, gap_teams, gaps
+        ),
+    }
+
+
+def reliability_for_window(db: Session, start_date: date, end_date: date) -> dict:
+    """compute_reliability, cached per site and (start_date, end_date) window"""
+    key = (current_site.get(), start_date, end_date)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > now:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    result = compute_reliability(db, start_date, end_date)
+    # Closed windows only gain events if history is rewritten, so keep them until evicted
+    expires = float("inf") if end_date < date.today() else now + RELIABILITY_CACHE_SECONDS
+    with _cache_lock:
+        _cache[key] = (expires, result)
+        _cache.move_to_end(key)
+        while len(_cache) > RELIABILITY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,167 @@
+"""
+Predictive failure risk scores for equipment
+
+Active equipment is scored in id-ordered chunks. Each chunk reads its
+equipment and the aggregated corrective history (live and archived requests)
+as plain columns, and the scores are computed for the whole chunk at once
+with NumPy before being upserted into equipment_risk_scores. No ORM objects
+are loaded.
+
+The score is a logistic blend of recent corrective frequency, how recently
+the last failure happened, mean repair time, age and warranty status,
+scaled to 0-100.
+
+Run once from the command line with `python risk.py`.
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import case, delete, func, select, union_all
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, dialect_insert
+from models import (
+    Equipment, EquipmentRiskScore, EquipmentStatus, MaintenanceRequest,
+    MaintenanceRequestArchive, RequestType
+)
+
+RISK_SCORE_INTERVAL_SECONDS = int(os.getenv("RISK_SCORE_INTERVAL_SECONDS", "3600"))
+RISK_SCORE_CHUNK_SIZE = int(os.getenv("RISK_SCORE_CHUNK_SIZE", "10000"))
+
+# Logistic weights; the intercept puts new, failure-free equipment near 10
+_W_FREQUENCY = 0.9      # per log(1 + corrective requests in the last year)
+_W_RECENCY = 1.2        # decays with a 90-day scale since the last corrective request
+_W_REPAIR_HOURS = 0.3   # per log(1 + mean repair hours)
+_W_AGE = 0.12           # per year since purchase
+_W_NO_WARRANTY = 0.6
+_INTERCEPT = -2.2
+_RECENCY_DAYS = 90.0
+
+
+def _days(values, today: date) -> np.ndarray:
+    """Days from each date/datetime to today, NaN where missing"""
+    return np.fromiter(
+        (
+            (today - (value.date() if isinstance(value, datetime) else value)).days
+            if value is not None else np.nan
+            for value in values
+        ),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+
+def score_chunk(db: Session, after_id: int, limit: int, today: date) -> tuple[int, list[dict]]:
+    """Score the next chunk of active equipment; returns the last id seen and score rows"""
+    assets = db.execute(
+        select(Equipment.id, Equipment.purchase_date, Equipment.warranty_expiry)
+        .where(Equipment.id > after_id, Equipment.status == EquipmentStatus.ACTIVE)
+        .order_by(Equipment.id)
+        .limit(limit)
+    ).all()
+    if not assets:
+        return after_id, []
+    ids, purchased, warranty = zip(*assets)
+    ids = np.array(ids, dtype=np.int64)
+    low, high = int(ids[0]), int(ids[-1])
+
+    columns = ("equipment_id", "request_type", "created_at", "duration_hours")
+    live = MaintenanceRequest.__table__
+    archived = MaintenanceRequestArchive.__table__
+    source = union_all(*[
+        select(*[table.c[name] for name in columns]).where(
+            table.c.equipment_id.between(low, high),
+            table.c.request_type == RequestType.CORRECTIVE,
+        )
+        for table in (live, archived)
+    ]).subquery()
+    year_ago = datetime.now(timezone.utc) - timedelta(days=365)
+    history = db.execute(
+        select(
+            source.c.equipment_id,
+            func.sum(case((source.c.created_at >= year_ago, 1), else_=0)),
+            func.avg(source.c.duration_hours),
+            func.max(source.c.created_at),
+        ).group_by(source.c.equipment_id)
+    ).all()
+
+    n = len(ids)
+    frequency = np.zeros(n)
+    repair_hours = np.zeros(n)
+    has_repair_hours = np.zeros(n, dtype=bool)
+    since_failure = np.full(n, np.inf)
+    if history:
+        equipment_ids, recent, mean_hours, last_failure = zip(*history)
+        # Scrapped equipment in the id range has history but no slot in this chunk
+        positions = np.searchsorted(ids, np.array(equipment_ids, dtype=np.int64))
+        positions = np.minimum(positions, n - 1)
+        matched = ids[positions] == np.array(equipment_ids, dtype=np.int64)
+        positions = positions[matched]
+        frequency[positions] = np.array(recent, dtype=np.float64)[matched]
+        hours = np.array([h if h is not None else np.nan for h in mean_hours], dtype=np.float64)[matched]
+        has_repair_hours[positions] = ~np.isnan(hours)
+        repair_hours[positions] = np.nan_to_num(hours)
+        since_failure[positions] = _days(last_failure, today)[matched]
+
+    age_years = _days(purchased, today) / 365.25
+    days_to_warranty_end = -_days(warranty, today)
+    out_of_warranty = ~(days_to_warranty_end >= 0)  # Unknown warranty counts as expired
+
+    z = (
+        _INTERCEPT
+        + _W_FREQUENCY * np.log1p(frequency)
+        + _W_RECENCY * np.exp(-np.maximum(since_failure, 0) / _RECENCY_DAYS)
+        + _W_REPAIR_HOURS * np.log1p(repair_hours)
+        + _W_AGE * np.nan_to_num(np.maximum(age_years, 0))
+        + _W_NO_WARRANTY * out_of_warranty
+    )
+    scores = np.round(100.0 / (1.0 + np.exp(-z)), 2)
+
+    scored_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "equipment_id": int(ids[i]),
+            "score": float(scores[i]),
+            "corrective_last_year": int(frequency[i]),
+            "mean_repair_hours": round(float(repair_hours[i]), 2) if has_repair_hours[i] else None,
+            "age_years": round(float(age_years[i]), 2) if not np.isnan(age_years[i]) else None,
+            "out_of_warranty": bool(out_of_warranty[i]),
+            "scored_at": scored_at,
+        }
+        for i in range(n)
+    ]
+    return high, rows
+
+
+def score_equipment(chunk_size: int = RISK_SCORE_CHUNK_SIZE) -> int:
+    """Rescore all active equipment and drop scores of everything else; returns equipment scored"""
+    started = datetime.now(timezone.utc)
+    today = date.today()
+    table = EquipmentRiskScore.__table__
+    scored = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            last_id, rows = score_chunk(db, last_id, chunk_size, today)
+            if not rows:
+                break
+            stmt = dialect_insert(db)(table)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["equipment_id"],
+                set_={name: stmt.excluded[name] for name in rows[0] if name != "equipment_id"},
+            ), rows)
+            db.commit()
+            scored += len(rows)
+
+        # Equipment scrapped or deleted since the last run was not rescored
+        db.execute(delete(EquipmentRiskScore).where(EquipmentRiskScore.scored_at < started))
+        db.commit()
+        return scored
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"🔮 Scored {score_equipment()} pieces of equipment")
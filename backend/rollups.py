@@ -0,0 +1,225 @@
+"""
+Incrementally maintained reporting rollups
+
+Requests are folded into request_daily_rollups by id: each run aggregates only
+requests created since the stored watermark (live and archived tables alike)
+and adds the counts with an upsert. Reports then read at most one row per
+day, team, equipment and type instead of scanning maintenance_requests.
+
+A request counts towards the team it had and the department of its equipment
+when it was folded, shortly after creation: moving it to another team or the
+equipment to another department later doesn't move past counts (a row's
+department is the one seen by its latest fold). Deleting requests, one at a
+time, with their plan or with their equipment, takes the folded ones back out
+through unfold_requests() in the deleting transaction.
+
+Run once from the command line with `python rollups.py`.
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, bindparam, delete, func, select, union_all, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, dialect_insert
+from models import (
+    Equipment, MaintenanceRequest, MaintenanceRequestArchive,
+    RequestDailyRollup, RollupWatermark
+)
+
+ROLLUP_INTERVAL_SECONDS = int(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "50000"))
+ROLLUP_SETTLE_SECONDS = int(os.getenv("ROLLUP_SETTLE_SECONDS", "30"))
+
+_WATERMARK = "request_daily_rollups"
+
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def refresh_batch(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Fold the next id range into the rollup; returns how far the watermark moved"""
+    watermark = db.get(RollupWatermark, _WATERMARK)
+    if watermark is None:
+        watermark = RollupWatermark(name=_WATERMARK, last_request_id=0)
+        db.add(watermark)
+        db.flush()
+    start = watermark.last_request_id
+
+    columns = ("id", "created_at", "auto_filled_team_id", "equipment_id", "request_type")
+    live = MaintenanceRequest.__table__
+    archived = MaintenanceRequestArchive.__table__
+    source = union_all(
+        select(*[live.c[name] for name in columns]).where(live.c.id > start),
+        select(*[archived.c[name] for name in columns]).where(archived.c.id > start),
+    ).subquery()
+
+    # Leave very recent rows for the next run so slow transactions that took a
+    # lower id but commit late are not skipped
+    settled = datetime.now(timezone.utc) - timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+    head = db.execute(select(func.max(source.c.id)).where(source.c.created_at <= settled)).scalar()
+    if head is None or head <= start:
+        db.commit()
+        return 0
+    end = min(head, start + batch_size)
+
+    # Claim the id range first; a concurrent run loses the compare-and-swap and backs off
+    claimed = db.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == _WATERMARK, RollupWatermark.last_request_id == start)
+        .values(last_request_id=end)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed != 1:
+        db.rollback()
+        return 0
+
+    day = func.date(source.c.created_at)
+    team_id = func.coalesce(source.c.auto_filled_team_id, 0)
+    groups = db.execute(
+        select(
+            day.label("day"),
+            team_id.label("team_id"),
+            source.c.equipment_id,
+            source.c.request_type,
+            Equipment.department,
+            func.count().label("request_count"),
+        )
+        .outerjoin(Equipment, Equipment.id == source.c.equipment_id)
+        .where(source.c.id <= end)
+        .group_by(day, team_id, source.c.equipment_id, source.c.request_type, Equipment.department)
+    ).all()
+
+    if groups:
+        table = RequestDailyRollup.__table__
+        insert = dialect_insert(db)
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "team_id", "equipment_id", "request_type"],
+            set_={
+                "request_count": table.c.request_count + stmt.excluded.request_count,
+                "department": stmt.excluded.department,
+            },
+        )
+        db.execute(stmt, [
+            {
+                "day": _as_date(group.day),
+                "team_id": group.team_id,
+                "equipment_id": group.equipment_id,
+                "request_type": group.request_type,
+                "department": group.department,
+                "request_count": group.request_count,
+            }
+            for group in groups
+        ])
+    db.commit()
+    return end - start
+
+
+def unfold_requests(db: Session, table, where) -> int:
+    """Subtract requests of table (live or archive) matching where from the rollup.
+    Call before deleting them, in the same transaction; returns requests subtracted.
+
+    Only requests at or below the watermark were folded. The watermark row stays
+    locked until commit, so a concurrent fold can't count them in the meantime.
+    """
+    watermark = db.execute(
+        select(RollupWatermark.last_request_id).where(RollupWatermark.name == _WATERMARK).with_for_update()
+    ).scalar()
+    if not watermark:
+        return 0
+    day = func.date(table.c.created_at)
+    team_id = func.coalesce(table.c.auto_filled_team_id, 0)
+    groups = db.execute(
+        select(
+            day.label("day"), team_id.label("team_id"), table.c.equipment_id, table.c.request_type,
+            func.count().label("request_count"),
+        )
+        .where(where, table.c.id <= watermark)
+        .group_by(day, team_id, table.c.equipment_id, table.c.request_type)
+    ).all()
+    if not groups:
+        return 0
+
+    rollups = RequestDailyRollup.__table__
+    same_key = and_(
+        rollups.c.day == bindparam("key_day"),
+        rollups.c.team_id == bindparam("key_team_id"),
+        rollups.c.equipment_id == bindparam("key_equipment_id"),
+        rollups.c.request_type == bindparam("key_request_type"),
+    )
+    keys = [
+        {
+            "key_day": _as_date(group.day), "key_team_id": group.team_id,
+            "key_equipment_id": group.equipment_id, "key_request_type": group.request_type,
+            "removed": group.request_count,
+        }
+        for group in groups
+    ]
+    db.execute(
+        update(rollups).where(same_key).values(request_count=rollups.c.request_count - bindparam("removed")),
+        keys
+    )
+    db.execute(delete(rollups).where(same_key, rollups.c.request_count <= 0), keys)
+    return sum(group.request_count for group in groups)
+
+
+def refresh_request_rollups() -> int:
+    """Fold every settled new request into the rollup; returns ids advanced"""
+    advanced = 0
+    db = SessionLocal()
+    try:
+        while True:
+            step = refresh_batch(db)
+            advanced += step
+            if step == 0:
+                return advanced
+    finally:
+        db.close()
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_series(rows: Iterable, bucket: str, start_date: Optional[date], end_date: Optional[date]) -> list[dict]:
+    """Roll (day, request_type, count) rows up into contiguous buckets, zero-filled"""
+    buckets: dict[date, dict] = {}
+    for row in rows:
+        key = bucket_start(_as_date(row.day), bucket)
+        point = buckets.setdefault(key, {"total": 0, "corrective": 0, "preventive": 0})
+        point["total"] += row.request_count
+        point[row.request_type.value.lower()] += row.request_count
+
+    if not buckets and not (start_date and end_date):
+        return []
+    first = bucket_start(start_date or min(buckets), bucket)
+    last = bucket_start(end_date or max(buckets), bucket)
+
+    series = []
+    current = first
+    while current <= last:
+        point = buckets.get(current, {"total": 0, "corrective": 0, "preventive": 0})
+        series.append({"period_start": current, **point})
+        current = next_bucket(current, bucket)
+    return series
+
+
+if __name__ == "__main__":
+    refresh_request_rollups()
+    print("📊 Reporting rollups are up to date")
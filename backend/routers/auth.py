@@ -2,11 +2,14 @@
 Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from database import get_db
-from models import User, UserRole
+from database import SessionLocal, current_site, get_db, get_read_db, use_site
+from models import User, UserRole, unassign_requests
 from schemas import UserCreate, UserResponse, Token, LoginRequest, UserUpdate
 from auth import verify_password, get_password_hash, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES, require_role
+from serialization import render
+from sites import find_user_sites, is_multi_site, site_names
 from datetime import timedelta
 from typing import List, Optional
 
@@ -16,14 +19,14 @@ router = APIRouter()
 @router.get("/users", response_model=List[UserResponse])
 def list_users(
     role: Optional[UserRole] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
 ):
     """List users, optionally filtered by role"""
     query = db.query(User)
     if role:
         query = query.filter(User.role == role)
-    return query.all()
+    return render(List[UserResponse], query.all(), db=db)
 
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -55,7 +58,7 @@ def create_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
+    return render(UserResponse, db_user, status_code=status.HTTP_201_CREATED, db=db)
 
 
 @router.put("/users/{user_id}", response_model=UserResponse)
@@ -84,7 +87,7 @@ def update_user(
         
     db.commit()
     db.refresh(db_user)
-    return db_user
+    return render(UserResponse, db_user, db=db)
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -94,15 +97,16 @@ def delete_user(
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
     """Delete a user (Admin only)"""
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    if not db.query(User.id).filter(User.id == user_id).first():
         raise HTTPException(status_code=404, detail="User not found")
         
     # Prevent deleting yourself
-    if db_user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
         
-    db.delete(db_user)
+    unassign_requests(db, "assigned_technician_id", user_id)
+    # ON DELETE rules take care of memberships, equipment and what the user created
+    db.execute(delete(User).where(User.id == user_id))
     db.commit()
     return None
 
@@ -132,13 +136,35 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
+    return render(UserResponse, db_user, status_code=status.HTTP_201_CREATED, db=db)
+
+
+def login_site(login_data: LoginRequest) -> str:
+    """Site to sign in at: the one asked for, else the only site that has the username"""
+    if login_data.site is not None:
+        if login_data.site not in site_names():
+            raise HTTPException(status_code=400, detail=f"Unknown site {login_data.site!r}")
+        return login_data.site
+    if not is_multi_site():
+        return current_site.get()
+    sites = find_user_sites(login_data.username)
+    if len(sites) > 1:
+        raise HTTPException(status_code=400, detail="This username exists at several sites; choose a site to sign in at")
+    return sites[0] if sites else current_site.get()
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    """Login and get access token"""
-    user = db.query(User).filter(User.username == login_data.username).first()
+def login(login_data: LoginRequest):
+    """Login and get access token for the user's site"""
+    site = login_site(login_data)
+    with use_site(site):
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.username == login_data.username).first()
+            if user is not None:
+                db.expunge(user)
+        finally:
+            db.close()
     if not user or not verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -150,7 +176,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role.value},
+        data={"sub": user.username, "role": user.role.value, "site": site},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
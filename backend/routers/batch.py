@@ -0,0 +1,134 @@
+"""
+Batch reads: several GET requests in one round trip
+
+Each sub-request goes through the whole app in-process, so it gets the same
+routing, permissions, site and response it would get on its own. The batch
+authenticates once and its sub-requests reuse that user instead of looking
+it up again. Sub-requests run concurrently; each route still opens and
+releases its own session, as a Session can't be shared between threads.
+Bodies are spliced into the combined response without being parsed again.
+"""
+import asyncio
+import logging
+import os
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from starlette.datastructures import Headers
+
+from auth import get_current_user
+from models import User
+from schemas import BatchRequest, BatchResponse
+
+logger = logging.getLogger("uvicorn.error")
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+# Sub-requests see the caller's credentials and read-your-writes cookie, and
+# no Accept-Encoding: the batch response is compressed as a whole
+_FORWARDED_HEADERS = (b"authorization", b"cookie")
+_RETURNED_HEADERS = ("etag",)
+_MAX_REDIRECTS = 1
+
+router = APIRouter()
+
+
+def _sub_scope(request: Request, path: str, user: User) -> dict:
+    path, _, query = path.partition("?")
+    scope = request.scope
+    return {
+        "type": "http",
+        "asgi": scope.get("asgi", {"version": "3.0"}),
+        "http_version": scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": scope.get("scheme", "http"),
+        "server": scope.get("server"),
+        "client": scope.get("client"),
+        "root_path": scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(name, value) for name, value in scope["headers"] if name in _FORWARDED_HEADERS],
+        # Read by get_current_user, so the user isn't looked up again
+        "state": {"authenticated_user": user},
+    }
+
+
+async def _dispatch(app, scope: dict) -> tuple[int, Headers, bytes]:
+    """Run one sub-request through the app; returns (status, headers, body)"""
+    start = {}
+    chunks = []
+    response_complete = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s failed", scope["path"])
+        return 500, Headers(), b'{"detail":"Internal Server Error"}'
+    finally:
+        response_complete.set()
+    return start.get("status", 500), Headers(raw=start.get("headers", [])), b"".join(chunks)
+
+
+async def _get(request: Request, path: str, user: User) -> tuple[int, Headers, bytes]:
+    """GET path in-process, following a trailing-slash redirect like a browser would"""
+    for _ in range(_MAX_REDIRECTS + 1):
+        status, headers, body = await _dispatch(request.app, _sub_scope(request, path, user))
+        location = headers.get("location")
+        if status not in (307, 308) or not location:
+            break
+        target = urlsplit(location)
+        path = target.path + (f"?{target.query}" if target.query else "")
+    return status, headers, body
+
+
+def _result_json(id_, status: int, headers: Headers, body: bytes) -> bytes:
+    meta = orjson.dumps({
+        "id": id_,
+        "status": status,
+        "headers": {name: headers[name] for name in _RETURNED_HEADERS if name in headers},
+    })
+    if not body:
+        body = b"null"
+    elif not headers.get("content-type", "").startswith("application/json"):
+        body = orjson.dumps(body.decode("utf-8", "replace"))
+    return meta[:-1] + b',"body":' + body + b"}"
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Run up to BATCH_MAX_REQUESTS GET requests to /api/ concurrently and return every
+    response, in order, as {id, status, headers, body}"""
+    if len(batch_request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    for item in batch_request.requests:
+        if not item.path.startswith("/api/") or item.path.startswith("/api/batch"):
+            raise HTTPException(status_code=400, detail=f"Only GET requests to /api/ can be batched: {item.path}")
+
+    results = await asyncio.gather(*[_get(request, item.path, current_user) for item in batch_request.requests])
+    body = b",".join(
+        _result_json(item.id, *result) for item, result in zip(batch_request.requests, results)
+    )
+    return Response(content=b'{"responses":[' + body + b"]}", media_type="application/json")
@@ -1,18 +1,64 @@
 """
 Equipment routes with CRUD, search, filter, and smart button
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
-from database import get_db
-from models import Equipment, User, MaintenanceRequest, RequestStatus
-from schemas import EquipmentCreate, EquipmentResponse, EquipmentListResponse
+from sqlalchemy import and_, exists, false, func, insert, or_, select, update
+from database import dialect_insert, get_db, get_read_db, release_session
+from models import (
+    Equipment, EquipmentClosure, EquipmentPurge, EquipmentRiskScore, EquipmentStatus, MaintenanceTeam, User,
+    MaintenanceRequest, RequestStatus, TeamMember, link_equipment, move_equipment
+)
+from schemas import (
+    EquipmentCreate, EquipmentResponse, EquipmentListResponse, EquipmentFacets, FacetCount,
+    EquipmentScrap, EquipmentScrapResult, MaintenanceRequestResponse
+)
 from auth import get_current_user, require_role, UserRole
-from typing import Optional
+from projections import (
+    EQUIPMENT_FIELDS, count_rows, equipment_payloads, equipment_select, merge_rows, open_request_counts,
+    request_payloads, request_select
+)
+from purge import EQUIPMENT_PURGE_THRESHOLD, dependent_rows, drop_equipment, purge_equipment
+from scrap import close_open_requests, scrap_equipment, subtree_ids
+from serialization import render
+from collections import defaultdict
+from typing import List, Optional
 
 router = APIRouter()
 
 
+def write_checks(equipment: EquipmentCreate, equipment_id: Optional[int] = None) -> list:
+    """EXISTS columns validating a create/update, selected along with whatever else the write loads"""
+    serial_taken = false()
+    if equipment.serial_number:
+        serial_taken = exists().where(Equipment.serial_number == equipment.serial_number)
+        if equipment_id is not None:
+            serial_taken = exists().where(Equipment.serial_number == equipment.serial_number, Equipment.id != equipment_id)
+    parent_missing = parent_in_subtree = false()
+    if equipment.parent_id is not None:
+        parent_missing = ~exists().where(Equipment.id == equipment.parent_id)
+        if equipment_id is not None:
+            parent_in_subtree = exists().where(
+                EquipmentClosure.ancestor_id == equipment_id,
+                EquipmentClosure.descendant_id == equipment.parent_id
+            )
+    return [
+        serial_taken.label("serial_taken"),
+        parent_missing.label("parent_missing"),
+        parent_in_subtree.label("parent_in_subtree"),
+    ]
+
+
+def check_write(row):
+    """Reject a duplicate serial number, a missing parent, or one inside the equipment's own subtree"""
+    if row.serial_taken:
+        raise HTTPException(status_code=400, detail="Serial number already exists")
+    if row.parent_missing:
+        raise HTTPException(status_code=400, detail="Parent equipment not found")
+    if row.parent_in_subtree:
+        raise HTTPException(status_code=400, detail="Equipment cannot be moved under itself or its own sub-equipment")
+
+
 @router.post("/", response_model=EquipmentResponse, status_code=201)
 def create_equipment(
     equipment: EquipmentCreate,
@@ -20,32 +66,28 @@ def create_equipment(
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
 ):
     """Create new equipment"""
-    # Check if serial number already exists
-    if equipment.serial_number:
-        existing = db.query(Equipment).filter(Equipment.serial_number == equipment.serial_number).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Serial number already exists")
+    check_write(db.execute(select(*write_checks(equipment))).one())
     
-    db_equipment = Equipment(**equipment.dict())
-    db.add(db_equipment)
+    equipment_table = Equipment.__table__
+    created = db.execute(
+        insert(equipment_table).values(**equipment.dict())
+        .returning(*[equipment_table.c[name] for name in EQUIPMENT_FIELDS])
+    ).one()
+    link_equipment(db, created.id, created.parent_id)
     db.commit()
-    db.refresh(db_equipment)
-    return db_equipment
+    item, = equipment_payloads(db, [merge_rows(created, risk_score=None)])
+    return render(EquipmentResponse, item, status_code=201, db=db)
 
 
-@router.get("/", response_model=EquipmentListResponse)
-def list_equipment(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    search: Optional[str] = Query(None),
-    department: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+def filter_equipment(
+    query,
+    search: Optional[str] = None,
+    department: Optional[str] = None,
+    status: Optional[str] = None,
+    maintenance_team_id: Optional[int] = None,
+    under_equipment_id: Optional[int] = None
 ):
-    """List equipment with search and filter capabilities"""
-    query = db.query(Equipment)
-    
+    """Apply the equipment list filters to a query over Equipment"""
     # Search filter
     if search:
         search_filter = or_(
@@ -63,28 +105,118 @@ def list_equipment(
     if status:
         query = query.filter(Equipment.status == status)
     
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
+    # Team filter
+    if maintenance_team_id:
+        query = query.filter(Equipment.maintenance_team_id == maintenance_team_id)
+    
+    # Subtree filter, one indexed join on the closure table
+    if under_equipment_id:
+        query = query.join(EquipmentClosure, and_(
+            EquipmentClosure.descendant_id == Equipment.id,
+            EquipmentClosure.ancestor_id == under_equipment_id
+        ))
+    
+    return query
+
+
+def equipment_facets(db: Session, **filters) -> tuple[int, EquipmentFacets]:
+    """Total and per department/status/team counts of the filtered equipment, in one grouped query"""
+    rows = filter_equipment(
+        db.query(
+            Equipment.department,
+            Equipment.status,
+            Equipment.maintenance_team_id,
+            MaintenanceTeam.team_name,
+            func.count(Equipment.id)
+        ).outerjoin(MaintenanceTeam, MaintenanceTeam.id == Equipment.maintenance_team_id),
+        **filters
+    ).group_by(
+        Equipment.department, Equipment.status, Equipment.maintenance_team_id, MaintenanceTeam.team_name
+    ).all()
+    
+    departments, statuses, teams = defaultdict(int), defaultdict(int), {}
+    for department, status, team_id, team_name, count in rows:
+        departments[department] += count
+        statuses[status.value] += count
+        team = teams.setdefault(team_id, {"id": team_id, "name": team_name, "count": 0})
+        team["count"] += count
     
-    # Add open requests count for smart button
-    for item in items:
-        open_count = db.query(MaintenanceRequest).filter(
-            MaintenanceRequest.equipment_id == item.id,
-            MaintenanceRequest.status.in_([RequestStatus.NEW, RequestStatus.IN_PROGRESS])
-        ).count()
-        item.open_requests_count = open_count
+    def by_count(counts):
+        return [FacetCount(value=value, count=count) for value, count in sorted(
+            counts.items(), key=lambda item: (-item[1], item[0] is None, item[0] or "")
+        )]
     
-    return EquipmentListResponse(items=items, total=total)
+    facets = EquipmentFacets(
+        department=by_count(departments),
+        status=by_count(statuses),
+        maintenance_team=sorted(teams.values(), key=lambda team: (-team["count"], team["id"] is None, team["id"] or 0))
+    )
+    return sum(statuses.values()), facets
+
+
+@router.get("/", response_model=EquipmentListResponse)
+def list_equipment(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    search: Optional[str] = Query(None),
+    department: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    maintenance_team_id: Optional[int] = Query(None),
+    under_equipment_id: Optional[int] = Query(None),
+    include_facets: bool = Query(False),
+    sort_by: Optional[str] = Query(None, pattern="^(name|risk_score)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List equipment with search and filter capabilities; under_equipment_id limits to that subtree.
+
+    With include_facets, the response also carries counts per department,
+    status and team over the filtered set.
+    """
+    filters = dict(
+        search=search, department=department, status=status,
+        maintenance_team_id=maintenance_team_id, under_equipment_id=under_equipment_id
+    )
+    query = filter_equipment(equipment_select(), **filters)
+    
+    # The grouped facet query already yields the total
+    facets = None
+    if include_facets:
+        total, facets = equipment_facets(db, **filters)
+    else:
+        total = count_rows(db, filter_equipment(select(Equipment.id), **filters))
+    
+    # Sorting; unscored equipment sorts last either way
+    if sort_by == "risk_score":
+        key = EquipmentRiskScore.score.desc() if order == "desc" else EquipmentRiskScore.score.asc()
+        query = query.order_by(key.nulls_last(), Equipment.id)
+    elif sort_by == "name":
+        query = query.order_by(Equipment.name.desc() if order == "desc" else Equipment.name.asc(), Equipment.id)
+    
+    # Read-only page: plain rows, no ORM instances
+    rows = db.execute(query.offset(skip).limit(limit)).all()
+    
+    # Open requests count for the smart button, one grouped query for the whole page
+    items = equipment_payloads(db, rows, open_request_counts(db, [row.id for row in rows]))
+    
+    return render(EquipmentListResponse, {"items": items, "total": total, "facets": facets}, db=db)
 
 
 @router.get("/{equipment_id}", response_model=EquipmentResponse)
 def get_equipment(
     equipment_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get equipment by ID with open requests count"""
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    # Load everything EquipmentResponse reads up front; render() must not lazy-load
+    equipment = db.query(Equipment).options(
+        joinedload(Equipment.assigned_employee_rel),
+        joinedload(Equipment.default_technician),
+        joinedload(Equipment.risk),
+        joinedload(Equipment.maintenance_team).selectinload(MaintenanceTeam.team_members).selectinload(TeamMember.user),
+    ).filter(Equipment.id == equipment_id).first()
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
@@ -95,7 +227,7 @@ def get_equipment(
     ).count()
     equipment.open_requests_count = open_count
     
-    return equipment
+    return render(EquipmentResponse, equipment, db=db)
 
 
 @router.put("/{equipment_id}", response_model=EquipmentResponse)
@@ -106,57 +238,93 @@ def update_equipment(
     current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
 ):
     """Update equipment"""
-    db_equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
-    if not db_equipment:
+    row = db.execute(
+        equipment_select().where(Equipment.id == equipment_id).add_columns(*write_checks(equipment, equipment_id))
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Equipment not found")
+    check_write(row)
     
-    # Check serial number uniqueness if changed
-    if equipment.serial_number and equipment.serial_number != db_equipment.serial_number:
-        existing = db.query(Equipment).filter(Equipment.serial_number == equipment.serial_number).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Serial number already exists")
-    
-    for key, value in equipment.dict().items():
-        setattr(db_equipment, key, value)
+    changes = {key: value for key, value in equipment.dict().items() if getattr(row, key) != value}
+    if changes:
+        equipment_table = Equipment.__table__
+        updated = db.execute(
+            update(equipment_table).where(equipment_table.c.id == equipment_id).values(**changes)
+            .returning(*[equipment_table.c[name] for name in EQUIPMENT_FIELDS])
+        ).one()
+        if "parent_id" in changes:
+            move_equipment(db, equipment_id, updated.parent_id)
+        if changes.get("status") == EquipmentStatus.SCRAPPED:
+            close_open_requests(db, [equipment_id], reason="Equipment scrapped")
+        db.commit()
+        row = merge_rows(row, updated)
+    item, = equipment_payloads(db, [row])
+    return render(EquipmentResponse, item, db=db)
+
+
+@router.post("/scrap", response_model=EquipmentScrapResult)
+def scrap_equipment_bulk(
+    scrap: EquipmentScrap,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Scrap many pieces of equipment at once, closing their open requests, in one transaction"""
+    equipment_ids = set(scrap.equipment_ids)
+    known = {row.id for row in db.query(Equipment.id).filter(Equipment.id.in_(equipment_ids))}
+    if len(known) != len(equipment_ids):
+        raise HTTPException(status_code=400, detail=f"Unknown equipment ids: {sorted(equipment_ids - known)}")
     
+    targets = subtree_ids(sorted(equipment_ids)) if scrap.include_subtree else sorted(equipment_ids)
+    scrapped, closed = scrap_equipment(db, targets, reason=scrap.reason or "Equipment scrapped")
     db.commit()
-    db.refresh(db_equipment)
-    return db_equipment
+    release_session(db)
+    return EquipmentScrapResult(scrapped_ids=sorted(row.id for row in scrapped), requests_closed=closed)
 
 
-@router.delete("/{equipment_id}", status_code=204)
+@router.delete(
+    "/{equipment_id}",
+    status_code=204,
+    responses={202: {"description": "Too much history to delete at once; the equipment is purged in the background"}}
+)
 def delete_equipment(
     equipment_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
-    """Delete equipment"""
-    db_equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
-    if not db_equipment:
+    """Delete equipment with its requests, plans, rules and telemetry"""
+    if not db.query(Equipment.id).filter(Equipment.id == equipment_id).first():
         raise HTTPException(status_code=404, detail="Equipment not found")
     
-    db.delete(db_equipment)
+    if dependent_rows(db, equipment_id) <= EQUIPMENT_PURGE_THRESHOLD:
+        drop_equipment(db, equipment_id)
+        db.commit()
+        return None
+    
+    # Queued first so the purge job picks it up again if this worker stops midway
+    db.execute(
+        dialect_insert(db)(EquipmentPurge.__table__)
+        .values(equipment_id=equipment_id)
+        .on_conflict_do_nothing(index_elements=["equipment_id"])
+    )
     db.commit()
-    return None
+    background_tasks.add_task(purge_equipment, equipment_id)
+    return Response(status_code=202)
 
 
-@router.get("/{equipment_id}/maintenance-requests")
+@router.get("/{equipment_id}/maintenance-requests", response_model=List[MaintenanceRequestResponse])
 def get_equipment_maintenance_requests(
     equipment_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Smart button: Get all maintenance requests for equipment"""
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
-    if not equipment:
+    if not db.query(Equipment.id).filter(Equipment.id == equipment_id).first():
         raise HTTPException(status_code=404, detail="Equipment not found")
     
-    requests = db.query(MaintenanceRequest).options(
-        joinedload(MaintenanceRequest.equipment),
-        joinedload(MaintenanceRequest.assigned_technician)
-    ).filter(
-        MaintenanceRequest.equipment_id == equipment_id
+    rows = db.execute(
+        request_select().where(MaintenanceRequest.equipment_id == equipment_id).order_by(MaintenanceRequest.id)
     ).all()
     
-    return requests
+    return render(List[MaintenanceRequestResponse], request_payloads(db, rows), db=db)
 
@@ -1,21 +1,36 @@
 """
 Maintenance Request routes with business logic (auto-fill, workflows, scrap, overdue)
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
-from datetime import date, datetime
-from database import get_db
+from sqlalchemy import and_, exists, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
+from database import get_db, get_read_db, release_session
 from models import (
-    MaintenanceRequest, Equipment, MaintenanceTeam, User, UserRole,
-    RequestStatus, RequestType, EquipmentStatus, TeamMember
+    MaintenanceRequest, MaintenanceRequestArchive, Equipment, MaintenanceTeam, User, UserRole,
+    RequestStatus, RequestType, TeamMember, RequestChange, EquipmentClosure,
+    log_request_changes, log_status_events
 )
 from schemas import (
     MaintenanceRequestCreate, MaintenanceRequestUpdate,
-    MaintenanceRequestResponse
+    MaintenanceRequestResponse, MaintenanceRequestChanges, MaintenanceRequestCard,
+    KanbanColumnResponse, KanbanBoardResponse, ScheduleResponse
 )
 from auth import get_current_user, require_role
+from metrics import REQUESTS_CREATED, STATUS_TRANSITIONS
+from scheduler import TECHNICIAN_DAILY_HOURS, apply_schedule, plan_schedule
+from rollups import unfold_requests
+from scrap import scrap_equipment
+from projections import REQUEST_FIELDS, count_rows, equipment_select, merge_rows, request_payloads, request_select
+from serialization import render
 from typing import List, Optional
+import os
+
+# Change log entries younger than this are held back from sync. Ids are taken
+# before commit, so a transaction still in flight may commit a lower id after
+# a younger one is visible; a cursor past it would skip that change forever.
+SYNC_SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", "10"))
 
 router = APIRouter()
 
@@ -45,6 +60,35 @@ def mark_overdue_requests(db: Session):
     return overdue
 
 
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Request version named by an If-Match header ("3", W/"3" or 3); None when absent or *"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be the ETag of a maintenance request version")
+
+
+def version_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Maintenance request was changed by someone else; reload it and try again"
+    )
+
+
+def team_member_check(team_id, user_id):
+    """EXISTS column form of check_technician_team_access(), to select along with the row it guards"""
+    return exists().where(TeamMember.team_id == team_id, TeamMember.user_id == user_id)
+
+
 @router.post("/", response_model=MaintenanceRequestResponse, status_code=201)
 def create_maintenance_request(
     request: MaintenanceRequestCreate,
@@ -52,8 +96,13 @@ def create_maintenance_request(
     current_user: User = Depends(get_current_user)
 ):
     """Create maintenance request with auto-fill logic"""
-    # Validate equipment exists
-    equipment = db.query(Equipment).filter(Equipment.id == request.equipment_id).first()
+    # Validate equipment exists, loading what auto-fill and the response need with the team check
+    technician = request.assigned_technician_id or Equipment.default_technician_id
+    equipment = db.execute(
+        equipment_select("equipment__")
+        .where(Equipment.id == request.equipment_id)
+        .add_columns(team_member_check(Equipment.maintenance_team_id, technician).label("technician_in_team"))
+    ).first()
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
@@ -65,58 +114,53 @@ def create_maintenance_request(
         )
     
     # AUTO-FILL LOGIC: Fetch maintenance team and default technician from equipment
-    auto_filled_team_id = equipment.maintenance_team_id
-    default_technician_id = equipment.default_technician_id
+    auto_filled_team_id = equipment.equipment__maintenance_team_id
+    default_technician_id = equipment.equipment__default_technician_id
     
     # If technician is assigned, validate they belong to the team
     assigned_technician_id = request.assigned_technician_id or default_technician_id
-    if assigned_technician_id and auto_filled_team_id:
-        if not check_technician_team_access(assigned_technician_id, auto_filled_team_id, db):
-            raise HTTPException(
-                status_code=403,
-                detail="Assigned technician must belong to the equipment's maintenance team"
-            )
+    if assigned_technician_id and auto_filled_team_id and not equipment.technician_in_team:
+        raise HTTPException(
+            status_code=403,
+            detail="Assigned technician must belong to the equipment's maintenance team"
+        )
     
-    # Create request
-    db_request = MaintenanceRequest(
-        **request.dict(),
-        auto_filled_team_id=auto_filled_team_id,
-        assigned_technician_id=assigned_technician_id,
-        status=RequestStatus.NEW,
-        created_by_id=current_user.id
-    )
-    db.add(db_request)
+    # Create request; set-based, so log sync changes and the status event here
+    requests = MaintenanceRequest.__table__
+    created = db.execute(
+        insert(requests).values(
+            **request.dict(exclude={"assigned_technician_id"}),
+            auto_filled_team_id=auto_filled_team_id,
+            assigned_technician_id=assigned_technician_id,
+            status=RequestStatus.NEW,
+            created_by_id=current_user.id
+        ).returning(*[requests.c[name] for name in REQUEST_FIELDS])
+    ).one()
+    inserted = requests.c.id == created.id
+    log_request_changes(db, inserted)
+    log_status_events(db, inserted)
     db.commit()
-    db.refresh(db_request)
-    
-    # Check if overdue
-    db_request.is_overdue = bool(
-        db_request.scheduled_date and
-        db_request.scheduled_date < date.today() and
-        db_request.status != RequestStatus.REPAIRED
-    )
+    REQUESTS_CREATED.labels(created.request_type.value).inc()
     
-    return db_request
+    item, = request_payloads(db, [merge_rows(equipment, created)])
+    response = render(MaintenanceRequestResponse, item, status_code=201, db=db)
+    response.headers["ETag"] = etag(created.version)
+    return response
 
 
-@router.get("/", response_model=List[MaintenanceRequestResponse])
-def list_maintenance_requests(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None),
-    request_type: Optional[str] = Query(None),
-    equipment_id: Optional[int] = Query(None),
-    team_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+def filter_requests(
+    query,
+    model,
+    db: Session,
+    current_user: User,
+    status: Optional[str] = None,
+    request_type: Optional[str] = None,
+    equipment_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    under_equipment_id: Optional[int] = None
 ):
-    """List maintenance requests with filters"""
-    query = db.query(MaintenanceRequest).options(
-        joinedload(MaintenanceRequest.equipment),
-        joinedload(MaintenanceRequest.maintenance_team),
-        joinedload(MaintenanceRequest.assigned_technician)
-    )
-    
+    """Apply role-based visibility and list filters to a query over model
+    (MaintenanceRequest, MaintenanceRequestArchive or RequestChange)"""
     # Role-based filtering
     if current_user.role == UserRole.TECHNICIAN:
         # Technicians can see requests assigned to them OR from their teams
@@ -125,49 +169,238 @@ def list_maintenance_requests(
         ).subquery()
         query = query.filter(
             or_(
-                MaintenanceRequest.assigned_technician_id == current_user.id,
-                MaintenanceRequest.auto_filled_team_id.in_(user_teams)
+                model.assigned_technician_id == current_user.id,
+                model.auto_filled_team_id.in_(user_teams)
             )
         )
     elif current_user.role == UserRole.USER:
         # Regular users only see requests they created
-        query = query.filter(MaintenanceRequest.created_by_id == current_user.id)
+        query = query.filter(model.created_by_id == current_user.id)
     
     # Status filter
     if status:
-        query = query.filter(MaintenanceRequest.status == status)
+        query = query.filter(model.status == status)
     
     # Type filter
     if request_type:
-        query = query.filter(MaintenanceRequest.request_type == request_type)
+        query = query.filter(model.request_type == request_type)
     
     # Equipment filter
     if equipment_id:
-        query = query.filter(MaintenanceRequest.equipment_id == equipment_id)
+        query = query.filter(model.equipment_id == equipment_id)
     
     # Team filter
     if team_id:
-        query = query.filter(MaintenanceRequest.auto_filled_team_id == team_id)
+        query = query.filter(model.auto_filled_team_id == team_id)
+    
+    # Equipment subtree filter, one indexed join on the closure table
+    if under_equipment_id:
+        query = query.join(EquipmentClosure, and_(
+            EquipmentClosure.descendant_id == model.equipment_id,
+            EquipmentClosure.ancestor_id == under_equipment_id
+        ))
+    
+    return query
+
+
+@router.get("/", response_model=List[MaintenanceRequestResponse])
+def list_maintenance_requests(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[str] = Query(None),
+    request_type: Optional[str] = Query(None),
+    equipment_id: Optional[int] = Query(None),
+    team_id: Optional[int] = Query(None),
+    under_equipment_id: Optional[int] = Query(None),
+    include_archived: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List maintenance requests with filters; archived requests follow live ones when requested"""
+    filters = dict(
+        status=status, request_type=request_type, equipment_id=equipment_id, team_id=team_id,
+        under_equipment_id=under_equipment_id
+    )
+    # Read-only page: plain rows, no ORM instances
+    query = filter_requests(request_select(MaintenanceRequest), MaintenanceRequest, db, current_user, **filters)
+    requests = db.execute(query.offset(skip).limit(limit)).all()
+    
+    # Page on into the archive once live rows are exhausted
+    if include_archived and len(requests) < limit:
+        archive_skip = max(0, skip - count_rows(db, query)) if not requests else 0
+        archived = db.execute(
+            filter_requests(
+                request_select(MaintenanceRequestArchive), MaintenanceRequestArchive, db, current_user, **filters
+            ).order_by(MaintenanceRequestArchive.id).offset(archive_skip).limit(limit - len(requests))
+        ).all()
+    else:
+        archived = []
+    
+    # Overdue flags are computed for live requests
+    return render(
+        List[MaintenanceRequestResponse],
+        request_payloads(db, requests) + request_payloads(db, archived, archived=True),
+        db=db
+    )
+
+
+@router.get("/changes", response_model=MaintenanceRequestChanges)
+def get_maintenance_request_changes(
+    since: int = Query(0, ge=0, description="Cursor returned by the previous sync; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delta sync: requests changed and ids deleted since the cursor"""
+    latest = db.query(func.max(RequestChange.id)).scalar() or 0
+    if since > latest:
+        raise HTTPException(status_code=410, detail="Sync cursor is unknown to the server; resync from 0")
+    # The cursor only advances over settled entries, so one committed late with a lower id is still ahead of it
+    settled = datetime.now(timezone.utc) - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    head = db.query(func.max(RequestChange.id)).filter(RequestChange.changed_at <= settled).scalar() or 0
+    head = max(head, since)
+    
+    # Visibility is checked against each entry's snapshot, so tombstones work after deletion
+    entries = filter_requests(
+        db.query(RequestChange.id, RequestChange.request_id, RequestChange.deleted),
+        RequestChange, db, current_user
+    ).filter(
+        RequestChange.id > since,
+        RequestChange.id <= head
+    ).order_by(RequestChange.id).limit(limit).all()
+    
+    has_more = len(entries) == limit
+    cursor = entries[-1].id if has_more else head
+    
+    # The latest entry per request wins
+    newest = {}
+    for entry in entries:
+        newest[entry.request_id] = entry.deleted
+    changed_ids = [request_id for request_id, deleted in newest.items() if not deleted]
+    deleted_ids = [request_id for request_id, deleted in newest.items() if deleted]
+    
+    rows = []
+    if changed_ids:
+        rows = db.execute(
+            filter_requests(request_select(), MaintenanceRequest, db, current_user)
+            .filter(MaintenanceRequest.id.in_(changed_ids))
+        ).all()
+    
+    return render(MaintenanceRequestChanges, {
+        "items": request_payloads(db, rows),
+        "deleted_ids": deleted_ids,
+        "cursor": cursor,
+        "has_more": has_more
+    }, db=db)
+
+
+@router.get("/board", response_model=KanbanBoardResponse)
+def get_kanban_board(
+    per_column: int = Query(50, ge=1, le=500),
+    request_type: Optional[str] = Query(None),
+    equipment_id: Optional[int] = Query(None),
+    team_id: Optional[int] = Query(None),
+    under_equipment_id: Optional[int] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Kanban board: per-status totals plus the newest cards of each column"""
+    visible = filter_requests(
+        db.query(MaintenanceRequest), MaintenanceRequest, db, current_user,
+        request_type=request_type, equipment_id=equipment_id, team_id=team_id,
+        under_equipment_id=under_equipment_id
+    )
+    
+    # One grouped count for the column headers
+    totals = dict(
+        visible.with_entities(MaintenanceRequest.status, func.count(MaintenanceRequest.id))
+        .group_by(MaintenanceRequest.status)
+        .all()
+    )
     
-    requests = query.offset(skip).limit(limit).all()
+    # One windowed query for the first cards of every column
+    ranked = visible.with_entities(
+        MaintenanceRequest.id,
+        MaintenanceRequest.subject,
+        MaintenanceRequest.description,
+        MaintenanceRequest.status,
+        MaintenanceRequest.request_type,
+        MaintenanceRequest.scheduled_date,
+        MaintenanceRequest.equipment_id,
+        Equipment.name.label("equipment_name"),
+        MaintenanceRequest.assigned_technician_id,
+        func.coalesce(User.full_name, User.username).label("assigned_technician_name"),
+        MaintenanceRequest.version,
+        func.row_number().over(
+            partition_by=MaintenanceRequest.status,
+            order_by=MaintenanceRequest.id.desc()
+        ).label("position")
+    ).outerjoin(
+        Equipment, Equipment.id == MaintenanceRequest.equipment_id
+    ).outerjoin(
+        User, User.id == MaintenanceRequest.assigned_technician_id
+    ).subquery()
+    rows = db.query(ranked).filter(ranked.c.position <= per_column).order_by(ranked.c.position).all()
     
-    # Mark overdue requests
     today = date.today()
-    for req in requests:
-        req.is_overdue = bool(
-            req.scheduled_date and
-            req.scheduled_date < today and
-            req.status != RequestStatus.REPAIRED and
-            req.status != RequestStatus.SCRAP
-        )
+    cards = {status: [] for status in RequestStatus}
+    for row in rows:
+        cards[row.status].append(MaintenanceRequestCard(
+            id=row.id,
+            subject=row.subject,
+            description=row.description,
+            status=row.status,
+            request_type=row.request_type,
+            scheduled_date=row.scheduled_date,
+            equipment_id=row.equipment_id,
+            equipment_name=row.equipment_name,
+            assigned_technician_id=row.assigned_technician_id,
+            assigned_technician_name=row.assigned_technician_name,
+            version=row.version,
+            is_overdue=bool(
+                row.scheduled_date and
+                row.scheduled_date < today and
+                row.status not in (RequestStatus.REPAIRED, RequestStatus.SCRAP)
+            )
+        ))
     
-    return requests
+    return render(KanbanBoardResponse, KanbanBoardResponse(columns=[
+        KanbanColumnResponse(status=status, total=totals.get(status, 0), items=cards[status])
+        for status in RequestStatus
+    ]), db=db)
+
+
+@router.post("/schedule", response_model=ScheduleResponse)
+def schedule_maintenance_requests(
+    dry_run: bool = Query(True),
+    start_date: Optional[date] = Query(None),
+    days: int = Query(14, ge=1, le=90),
+    daily_hours: float = Query(TECHNICIAN_DAILY_HOURS, gt=0, le=24),
+    team_id: Optional[int] = Query(None),
+    rebalance: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Assign open requests to team members within daily hour capacity.
+    
+    By default only unassigned NEW requests are placed; rebalance=true also
+    moves assigned NEW requests. With dry_run (the default) nothing is written;
+    otherwise requests changed while the plan was computed are reported in
+    conflicts and left untouched.
+    """
+    plan = plan_schedule(db, start_date or date.today(), days, daily_hours, team_id, rebalance)
+    conflicts = []
+    if not dry_run:
+        conflicts = apply_schedule(db, plan["assignments"])
+        plan["assignments"] = [item for item in plan["assignments"] if item["request_id"] not in conflicts]
+    release_session(db)
+    return ScheduleResponse(dry_run=dry_run, conflicts=conflicts, **plan)
 
 
 @router.get("/{request_id}", response_model=MaintenanceRequestResponse)
 def get_maintenance_request(
     request_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get maintenance request by ID"""
@@ -196,29 +429,49 @@ def get_maintenance_request(
         request.status != RequestStatus.SCRAP
     )
     
-    return request
+    response = render(MaintenanceRequestResponse, request, db=db)
+    response.headers["ETag"] = etag(request.version)
+    return response
 
 
 @router.put("/{request_id}", response_model=MaintenanceRequestResponse)
 def update_maintenance_request(
     request_id: int,
     request_update: MaintenanceRequestUpdate,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update maintenance request with workflow logic"""
-    db_request = db.query(MaintenanceRequest).filter(MaintenanceRequest.id == request_id).first()
-    if not db_request:
+    """Update maintenance request with workflow logic.
+
+    The write is a compare-and-swap on the request's version: against the
+    If-Match version when given, else the version just read. A request
+    changed by someone else in between gets 409 instead of being overwritten.
+    """
+    expected_version = parse_if_match(if_match)
+    # One query loads the request as the response needs it, with the team checks it may need
+    requests = MaintenanceRequest.__table__
+    row = db.execute(
+        request_select().where(requests.c.id == request_id).add_columns(
+            team_member_check(requests.c.auto_filled_team_id, current_user.id).label("user_in_team"),
+            team_member_check(
+                requests.c.auto_filled_team_id, request_update.assigned_technician_id
+            ).label("technician_in_team"),
+        )
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Maintenance request not found")
     
     # Role-based access check
-    if current_user.role == UserRole.TECHNICIAN:
-        if not check_technician_team_access(current_user.id, db_request.auto_filled_team_id, db):
-            raise HTTPException(status_code=403, detail="Not authorized to update this request")
+    if current_user.role == UserRole.TECHNICIAN and not row.user_in_team:
+        raise HTTPException(status_code=403, detail="Not authorized to update this request")
+    if expected_version is not None and expected_version != row.version:
+        raise version_conflict()
     
     # WORKFLOW LOGIC
-    old_status = db_request.status
+    old_status = row.status
     new_status = request_update.status or old_status
+    values = request_update.dict(exclude_unset=True, exclude={"assigned_technician_id", "status", "scrap_reason"})
     
     # Status transitions
     if new_status != old_status:
@@ -229,14 +482,9 @@ def update_maintenance_request(
                     status_code=403,
                     detail="Only managers can change status to this value"
                 )
-        
-        # SCRAP LOGIC: Update equipment status
-        if new_status == RequestStatus.SCRAP:
-            equipment = db.query(Equipment).filter(Equipment.id == db_request.equipment_id).first()
-            if equipment:
-                equipment.status = EquipmentStatus.SCRAPPED
-                if request_update.scrap_reason:
-                    db_request.scrap_reason = request_update.scrap_reason
+        values["status"] = new_status
+        if new_status == RequestStatus.SCRAP and request_update.scrap_reason:
+            values["scrap_reason"] = request_update.scrap_reason
     
     # Update technician assignment (only MANAGER/ADMIN)
     if request_update.assigned_technician_id is not None:
@@ -247,38 +495,53 @@ def update_maintenance_request(
             )
         
         # Validate technician belongs to team
-        if not check_technician_team_access(
-            request_update.assigned_technician_id,
-            db_request.auto_filled_team_id,
-            db
-        ):
+        if not (row.auto_filled_team_id and request_update.assigned_technician_id and row.technician_in_team):
             raise HTTPException(
                 status_code=403,
                 detail="Technician must belong to the equipment's maintenance team"
             )
-        db_request.assigned_technician_id = request_update.assigned_technician_id
-    
-    # Update other fields
-    update_data = request_update.dict(exclude_unset=True, exclude={"assigned_technician_id", "status", "scrap_reason"})
-    for key, value in update_data.items():
-        setattr(db_request, key, value)
-    
-    if new_status != old_status:
-        db_request.status = new_status
-    
-    db.commit()
-    db.refresh(db_request)
-    
-    # Check if overdue
-    today = date.today()
-    db_request.is_overdue = bool(
-        db_request.scheduled_date and
-        db_request.scheduled_date < today and
-        db_request.status != RequestStatus.REPAIRED and
-        db_request.status != RequestStatus.SCRAP
-    )
-    
-    return db_request
+        values["assigned_technician_id"] = request_update.assigned_technician_id
+    
+    changes = {key: value for key, value in values.items() if getattr(row, key) != value}
+    if changes:
+        # Set-based, so log status events, sync changes and tombstones here. Every
+        # statement matches only the version read, so a lost race writes nothing.
+        where = and_(requests.c.id == request_id, requests.c.version == row.version)
+        if "status" in changes:
+            log_status_events(db, where, to_status=new_status)
+        if "assigned_technician_id" in changes and row.assigned_technician_id is not None:
+            # Tombstone for the technician losing the request
+            log_request_changes(db, where, deleted=True)
+        try:
+            updated = db.execute(
+                update(requests).where(where).values(**changes, version=requests.c.version + 1)
+                .returning(*[requests.c[name] for name in REQUEST_FIELDS])
+            ).first()
+        except IntegrityError:
+            # Reopening a telemetry request whose rule has opened another since,
+            # or moving a plan's occurrence onto a day it already has
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Conflicts with another open request of the same telemetry rule or preventive plan")
+        if not updated:
+            db.rollback()
+            raise version_conflict()
+        log_request_changes(db, requests.c.id == request_id)
+        
+        # SCRAP LOGIC: Scrap the equipment and close its other open requests
+        scrapped_equipment = {}
+        if changes.get("status") == RequestStatus.SCRAP:
+            scrapped, _ = scrap_equipment(db, [row.equipment_id], reason=f"Equipment scrapped by request #{request_id}")
+            for equipment in scrapped:
+                scrapped_equipment = {"equipment__status": equipment.status, "equipment__updated_at": equipment.updated_at}
+        db.commit()
+        if "status" in changes:
+            STATUS_TRANSITIONS.labels(old_status.value, new_status.value).inc()
+        row = merge_rows(row, updated, **scrapped_equipment)
+    
+    item, = request_payloads(db, [row])
+    response = render(MaintenanceRequestResponse, item, db=db)
+    response.headers["ETag"] = etag(item["version"])
+    return response
 
 
 @router.delete("/{request_id}", status_code=204)
@@ -292,6 +555,8 @@ def delete_maintenance_request(
     if not db_request:
         raise HTTPException(status_code=404, detail="Maintenance request not found")
     
+    requests = MaintenanceRequest.__table__
+    unfold_requests(db, requests, requests.c.id == request_id)
     db.delete(db_request)
     db.commit()
     return None
@@ -301,11 +566,18 @@ def delete_maintenance_request(
 def get_preventive_requests_calendar(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get preventive maintenance requests for calendar view"""
-    query = db.query(MaintenanceRequest).filter(
+    # Just the columns the calendar shows, equipment name joined in: one query for any number of events
+    query = db.query(
+        MaintenanceRequest.id,
+        MaintenanceRequest.subject,
+        MaintenanceRequest.scheduled_date,
+        MaintenanceRequest.status,
+        Equipment.name.label("equipment_name"),
+    ).outerjoin(Equipment, Equipment.id == MaintenanceRequest.equipment_id).filter(
         MaintenanceRequest.request_type == RequestType.PREVENTIVE,
         MaintenanceRequest.scheduled_date.isnot(None)
     )
@@ -337,10 +609,11 @@ def get_preventive_requests_calendar(
             "id": req.id,
             "title": req.subject,
             "start": req.scheduled_date.isoformat(),
-            "equipment": req.equipment.name if req.equipment else None,
+            "equipment": req.equipment_name,
             "status": req.status.value,
             "is_overdue": is_overdue
         })
     
+    release_session(db)
     return calendar_events
 
@@ -2,15 +2,24 @@
 Maintenance Team routes with CRUD and technician linking
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
-from models import MaintenanceTeam, TeamMember, User, UserRole
+from sqlalchemy import delete
+from sqlalchemy.orm import Session, selectinload
+from database import get_db, get_read_db
+from models import MaintenanceTeam, TeamMember, User, UserRole, unassign_requests
 from schemas import MaintenanceTeamCreate, MaintenanceTeamResponse, TeamMemberAdd, TeamMemberUpdate
 from auth import get_current_user, require_role
+from serialization import render
 from typing import List
 
 router = APIRouter()
 
+# Everything MaintenanceTeamResponse reads, in one query per level, so render() never lazy-loads
+WITH_MEMBERS = selectinload(MaintenanceTeam.team_members).selectinload(TeamMember.user)
+
+
+def load_team(db: Session, team_id: int):
+    return db.query(MaintenanceTeam).options(WITH_MEMBERS).filter(MaintenanceTeam.id == team_id).first()
+
 
 @router.post("/", response_model=MaintenanceTeamResponse, status_code=201)
 def create_maintenance_team(
@@ -28,30 +37,30 @@ def create_maintenance_team(
     db.add(db_team)
     db.commit()
     db.refresh(db_team)
-    return db_team
+    return render(MaintenanceTeamResponse, db_team, status_code=201, db=db)
 
 
 @router.get("/", response_model=List[MaintenanceTeamResponse])
 def list_maintenance_teams(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all maintenance teams"""
-    teams = db.query(MaintenanceTeam).all()
-    return teams
+    teams = db.query(MaintenanceTeam).options(WITH_MEMBERS).all()
+    return render(List[MaintenanceTeamResponse], teams, db=db)
 
 
 @router.get("/{team_id}", response_model=MaintenanceTeamResponse)
 def get_maintenance_team(
     team_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get maintenance team by ID"""
-    team = db.query(MaintenanceTeam).filter(MaintenanceTeam.id == team_id).first()
+    team = load_team(db, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Maintenance team not found")
-    return team
+    return render(MaintenanceTeamResponse, team, db=db)
 
 
 @router.put("/{team_id}", response_model=MaintenanceTeamResponse)
@@ -74,8 +83,7 @@ def update_maintenance_team(
     
     db_team.team_name = team.team_name
     db.commit()
-    db.refresh(db_team)
-    return db_team
+    return render(MaintenanceTeamResponse, load_team(db, team_id), db=db)
 
 
 @router.delete("/{team_id}", status_code=204)
@@ -84,12 +92,13 @@ def delete_maintenance_team(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
-    """Delete maintenance team"""
-    db_team = db.query(MaintenanceTeam).filter(MaintenanceTeam.id == team_id).first()
-    if not db_team:
+    """Delete maintenance team; its members go with it and its equipment and requests are left without a team"""
+    if not db.query(MaintenanceTeam.id).filter(MaintenanceTeam.id == team_id).first():
         raise HTTPException(status_code=404, detail="Maintenance team not found")
     
-    db.delete(db_team)
+    unassign_requests(db, "auto_filled_team_id", team_id)
+    # ON DELETE rules take care of members and equipment
+    db.execute(delete(MaintenanceTeam).where(MaintenanceTeam.id == team_id))
     db.commit()
     return None
 
@@ -134,8 +143,7 @@ def add_team_member(
     )
     db.add(team_member)
     db.commit()
-    db.refresh(team)
-    return team
+    return render(MaintenanceTeamResponse, load_team(db, team_id), db=db)
 
 
 @router.delete("/{team_id}/members/{user_id}", status_code=204)
@@ -179,6 +187,5 @@ def update_team_member(
     
     db.commit()
     
-    team = db.query(MaintenanceTeam).filter(MaintenanceTeam.id == team_id).first()
-    return team
+    return render(MaintenanceTeamResponse, load_team(db, team_id), db=db)
 
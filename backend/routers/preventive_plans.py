@@ -0,0 +1,144 @@
+"""
+Preventive Plan routes: recurring preventive maintenance and bulk request generation
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, insert, literal, select, update
+from datetime import date, timedelta
+from database import get_db, get_read_db, release_session
+from models import (
+    PreventivePlan, Equipment, EquipmentStatus, MaintenanceRequest, RequestStatus,
+    User, UserRole, log_request_changes
+)
+from schemas import (
+    PreventivePlanCreate, PreventivePlanBulkCreate, PreventivePlanResponse,
+    PreventivePlanBulkResult, PreventiveGenerationResult
+)
+from auth import get_current_user, require_role
+from preventive import PREVENTIVE_HORIZON_DAYS, generate_preventive_requests
+from rollups import unfold_requests
+from serialization import render
+from typing import List, Optional
+
+router = APIRouter()
+
+
+def validate_plan_dates(plan):
+    if plan.end_date and plan.end_date < plan.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+
+@router.post("/", response_model=PreventivePlanResponse, status_code=201)
+def create_preventive_plan(
+    plan: PreventivePlanCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Create a recurring preventive plan for one piece of equipment"""
+    validate_plan_dates(plan)
+    equipment = db.query(Equipment).filter(Equipment.id == plan.equipment_id).first()
+    if not equipment:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    
+    db_plan = PreventivePlan(**plan.dict(), created_by_id=current_user.id)
+    db.add(db_plan)
+    db.commit()
+    db.refresh(db_plan)
+    return render(PreventivePlanResponse, db_plan, status_code=201, db=db)
+
+
+@router.post("/bulk", response_model=PreventivePlanBulkResult, status_code=201)
+def create_preventive_plans_bulk(
+    plan: PreventivePlanBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Create the same plan for many pieces of equipment in one INSERT ... SELECT"""
+    validate_plan_dates(plan)
+    template = plan.dict(exclude={"equipment_ids", "department"})
+    template["created_by_id"] = current_user.id
+    
+    targets = select(
+        Equipment.id,
+        *[literal(value, type_=PreventivePlan.__table__.c[name].type) for name, value in template.items()]
+    ).where(Equipment.status == EquipmentStatus.ACTIVE)
+    if plan.equipment_ids is not None:
+        targets = targets.where(Equipment.id.in_(plan.equipment_ids))
+    if plan.department:
+        targets = targets.where(Equipment.department == plan.department)
+    
+    result = db.execute(
+        insert(PreventivePlan.__table__).from_select(["equipment_id", *template], targets)
+    )
+    db.commit()
+    release_session(db)
+    return PreventivePlanBulkResult(created=result.rowcount)
+
+
+@router.post("/generate", response_model=PreventiveGenerationResult)
+def generate_requests(
+    horizon_days: int = Query(PREVENTIVE_HORIZON_DAYS, ge=1, le=730),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Materialize preventive requests for every active plan up to the horizon (idempotent)"""
+    today = date.today()
+    created = generate_preventive_requests(horizon_days, today=today, db=db)
+    release_session(db)
+    return PreventiveGenerationResult(horizon=today + timedelta(days=horizon_days), created=created)
+
+
+@router.get("/", response_model=List[PreventivePlanResponse])
+def list_preventive_plans(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    equipment_id: Optional[int] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List preventive plans"""
+    query = db.query(PreventivePlan)
+    if equipment_id:
+        query = query.filter(PreventivePlan.equipment_id == equipment_id)
+    return render(List[PreventivePlanResponse], query.order_by(PreventivePlan.id).offset(skip).limit(limit).all(), db=db)
+
+
+@router.get("/{plan_id}", response_model=PreventivePlanResponse)
+def get_preventive_plan(
+    plan_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get preventive plan by ID"""
+    plan = db.query(PreventivePlan).filter(PreventivePlan.id == plan_id).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Preventive plan not found")
+    return render(PreventivePlanResponse, plan, db=db)
+
+
+@router.delete("/{plan_id}", status_code=204)
+def delete_preventive_plan(
+    plan_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Delete a plan with its untouched future requests; past and started ones are kept"""
+    plan = db.query(PreventivePlan).filter(PreventivePlan.id == plan_id).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Preventive plan not found")
+    
+    requests = MaintenanceRequest.__table__
+    of_plan = requests.c.preventive_plan_id == plan_id
+    upcoming = and_(of_plan, requests.c.status == RequestStatus.NEW, requests.c.scheduled_date >= date.today())
+    log_request_changes(db, upcoming, deleted=True)
+    unfold_requests(db, requests, upcoming)
+    db.execute(delete(requests).where(upcoming))
+    
+    kept = db.execute(select(requests.c.id).where(of_plan)).scalars().all()
+    if kept:
+        db.execute(update(requests).where(requests.c.id.in_(kept)).values(preventive_plan_id=None, version=requests.c.version + 1))
+        log_request_changes(db, requests.c.id.in_(kept))
+    
+    db.delete(plan)
+    db.commit()
+    return None
@@ -0,0 +1,48 @@
+"""
+Admin-only on-demand profiling of the live worker
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from database import get_read_db, release_session
+from models import User, UserRole
+from auth import require_role
+from typing import Optional
+import profiler
+
+router = APIRouter()
+
+
+@router.post("/", response_class=PlainTextResponse)
+async def capture_profile(
+    seconds: float = Query(5.0, gt=0, le=120),
+    route: Optional[str] = Query(None, description="Profile the next matching requests for this path prefix instead"),
+    requests: int = Query(10, ge=1, le=1000),
+    timeout: float = Query(60.0, gt=0, le=600),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    current_user: User = Depends(require_role([UserRole.ADMIN])),
+    db: Session = Depends(get_read_db)
+):
+    """Sample this worker and return collapsed stacks (flamegraph.pl / speedscope input)"""
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile capture is already running on this worker")
+    # The session only served the admin check; don't keep it through the capture
+    release_session(db)
+
+    interval = interval_ms / 1000
+    if route:
+        capture = await profiler.profile_requests(route, requests, interval, timeout)
+        result = capture.profiler
+        captured = requests - max(capture.remaining, 0)
+    else:
+        result = await profiler.profile_for(seconds, interval)
+        captured = None
+
+    headers = {"X-Profile-Samples": str(result.samples)}
+    if captured is not None:
+        headers["X-Profile-Requests"] = str(captured)
+    return PlainTextResponse(
+        result.collapsed(),
+        headers=headers,
+        media_type="text/plain",
+    )
@@ -1,51 +1,128 @@
 """
 Reporting routes
+
+With all_sites=true (admins only) a report is computed against every site's
+database concurrently and the results merged; ids are per site, so merged
+entries carry their site.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import get_db
-from models import MaintenanceRequest, MaintenanceTeam, Equipment, RequestType, User
-from schemas import ReportResponse
+from sqlalchemy import and_, func, select, union_all
+from datetime import date, timedelta
+from typing import Optional
+from database import get_read_db, release_session
+from models import (
+    MaintenanceRequest, MaintenanceRequestArchive, MaintenanceTeam, Equipment,
+    RequestType, User, RequestDailyRollup, EquipmentClosure
+)
+from schemas import (
+    ReportResponse, TimeSeriesResponse, RankingResponse, RankingEntry,
+    ReliabilityResponse, ReliabilityEntry
+)
 from auth import get_current_user, require_role, UserRole
+from rollups import bucket_series
+from reliability import SLA_REPAIR_HOURS, reliability_for_window
+from sites import fan_out
 
 router = APIRouter()
 
 
-@router.get("/", response_model=ReportResponse)
-def get_reports(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
-):
-    """Get maintenance reports"""
+def request_source(include_archived: bool, under_equipment_id: Optional[int] = None):
+    """Rows to report over: the live table, or live plus archived requests,
+    optionally limited to one equipment subtree"""
+    if not include_archived and not under_equipment_id:
+        return MaintenanceRequest.__table__
+    columns = ("id", "equipment_id", "auto_filled_team_id", "request_type")
+    tables = [MaintenanceRequest.__table__]
+    if include_archived:
+        tables.append(MaintenanceRequestArchive.__table__)
+    selects = []
+    for table in tables:
+        rows = select(*[table.c[name] for name in columns])
+        if under_equipment_id:
+            rows = rows.join(EquipmentClosure, and_(
+                EquipmentClosure.descendant_id == table.c.equipment_id,
+                EquipmentClosure.ancestor_id == under_equipment_id
+            ))
+        selects.append(rows)
+    return union_all(*selects).subquery("all_requests")
+
+
+def check_all_sites(current_user: User, **site_filters):
+    """Cross-site reports are for admins, and can't filter on ids that only mean something at one site"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Only admins can report across sites")
+    used = [name for name, value in site_filters.items() if value is not None]
+    if used:
+        raise HTTPException(status_code=400, detail=f"{', '.join(used)} can't be combined with all_sites")
+
+
+def request_counts(db: Session, include_archived: bool, under_equipment_id: Optional[int]) -> dict:
+    """Requests per team and per equipment (top 20), and per type"""
+    requests = request_source(include_archived, under_equipment_id)
+    
     # Requests per team
     requests_per_team = db.query(
         MaintenanceTeam.team_name,
-        func.count(MaintenanceRequest.id).label("count")
+        func.count(requests.c.id).label("count")
     ).join(
-        MaintenanceRequest, MaintenanceRequest.auto_filled_team_id == MaintenanceTeam.id
+        requests, requests.c.auto_filled_team_id == MaintenanceTeam.id
     ).group_by(MaintenanceTeam.team_name).all()
     
-    team_dict = {team.team_name: team.count for team in requests_per_team}
-    
     # Requests per equipment
     requests_per_equipment = db.query(
         Equipment.name,
-        func.count(MaintenanceRequest.id).label("count")
+        func.count(requests.c.id).label("count")
     ).join(
-        MaintenanceRequest, MaintenanceRequest.equipment_id == Equipment.id
-    ).group_by(Equipment.name).limit(20).all()  # Top 20
-    
-    equipment_dict = {eq.name: eq.count for eq in requests_per_equipment}
+        requests, requests.c.equipment_id == Equipment.id
+    ).group_by(Equipment.name).order_by(func.count(requests.c.id).desc()).limit(20).all()  # Top 20
     
     # Preventive vs Corrective ratio
-    preventive_count = db.query(MaintenanceRequest).filter(
-        MaintenanceRequest.request_type == RequestType.PREVENTIVE
-    ).count()
+    preventive_count = db.query(func.count(requests.c.id)).filter(
+        requests.c.request_type == RequestType.PREVENTIVE
+    ).scalar()
     
-    corrective_count = db.query(MaintenanceRequest).filter(
-        MaintenanceRequest.request_type == RequestType.CORRECTIVE
-    ).count()
+    corrective_count = db.query(func.count(requests.c.id)).filter(
+        requests.c.request_type == RequestType.CORRECTIVE
+    ).scalar()
+    
+    return {
+        "teams": {team.team_name: team.count for team in requests_per_team},
+        "equipment": {eq.name: eq.count for eq in requests_per_equipment},
+        "preventive": preventive_count,
+        "corrective": corrective_count,
+    }
+
+
+@router.get("/", response_model=ReportResponse)
+def get_reports(
+    include_archived: bool = Query(False),
+    under_equipment_id: Optional[int] = Query(None),
+    all_sites: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Get maintenance reports, optionally for one equipment subtree"""
+    if all_sites:
+        check_all_sites(current_user, under_equipment_id=under_equipment_id)
+        release_session(db)
+        per_site = fan_out(lambda site_db: request_counts(site_db, include_archived, None))
+        # Names repeat across plants, so merged keys are "site: name"
+        team_dict = {
+            f"{site}: {name}": count for site, counts in per_site.items() for name, count in counts["teams"].items()
+        }
+        top_equipment = sorted(
+            ((f"{site}: {name}", count) for site, counts in per_site.items() for name, count in counts["equipment"].items()),
+            key=lambda item: item[1], reverse=True
+        )[:20]
+        equipment_dict = dict(top_equipment)
+        preventive_count = sum(counts["preventive"] for counts in per_site.values())
+        corrective_count = sum(counts["corrective"] for counts in per_site.values())
+    else:
+        counts = request_counts(db, include_archived, under_equipment_id)
+        release_session(db)
+        team_dict, equipment_dict = counts["teams"], counts["equipment"]
+        preventive_count, corrective_count = counts["preventive"], counts["corrective"]
     
     total = preventive_count + corrective_count
     preventive_vs_corrective = {
@@ -61,3 +138,197 @@ def get_reports(
         preventive_vs_corrective=preventive_vs_corrective
     )
 
+
+def filter_rollups(
+    query,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    team_id: Optional[int],
+    department: Optional[str],
+    request_type: Optional[RequestType],
+    equipment_id: Optional[int]
+):
+    """Apply report filters to a query over request_daily_rollups"""
+    if start_date:
+        query = query.filter(RequestDailyRollup.day >= start_date)
+    if end_date:
+        query = query.filter(RequestDailyRollup.day <= end_date)
+    if team_id:
+        query = query.filter(RequestDailyRollup.team_id == team_id)
+    if department:
+        query = query.filter(RequestDailyRollup.department == department)
+    if request_type:
+        query = query.filter(RequestDailyRollup.request_type == request_type)
+    if equipment_id:
+        query = query.filter(RequestDailyRollup.equipment_id == equipment_id)
+    return query
+
+
+def rollup_counts(
+    db: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    team_id: Optional[int],
+    department: Optional[str],
+    request_type: Optional[RequestType],
+    equipment_id: Optional[int]
+) -> list:
+    """(day, request_type, request_count) rows of the daily rollup"""
+    return filter_rollups(
+        db.query(
+            RequestDailyRollup.day,
+            RequestDailyRollup.request_type,
+            func.sum(RequestDailyRollup.request_count).label("request_count")
+        ),
+        start_date, end_date, team_id, department, request_type, equipment_id
+    ).group_by(RequestDailyRollup.day, RequestDailyRollup.request_type).all()
+
+
+@router.get("/timeseries", response_model=TimeSeriesResponse)
+def get_request_timeseries(
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    team_id: Optional[int] = Query(None),
+    department: Optional[str] = Query(None),
+    request_type: Optional[RequestType] = Query(None),
+    equipment_id: Optional[int] = Query(None),
+    all_sites: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Requests created per day/week/month, served from the daily rollup"""
+    if all_sites:
+        check_all_sites(current_user, team_id=team_id, equipment_id=equipment_id)
+        release_session(db)
+        per_site = fan_out(lambda site_db: rollup_counts(site_db, start_date, end_date, None, department, request_type, None))
+        rows = [row for site_rows in per_site.values() for row in site_rows]
+    else:
+        rows = rollup_counts(db, start_date, end_date, team_id, department, request_type, equipment_id)
+        release_session(db)
+    return TimeSeriesResponse(bucket=bucket, series=bucket_series(rows, bucket, start_date, end_date))
+
+
+def top_ranking(
+    db: Session,
+    dimension: str,
+    k: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    team_id: Optional[int],
+    department: Optional[str],
+    request_type: Optional[RequestType]
+) -> list[RankingEntry]:
+    key = {
+        "equipment": RequestDailyRollup.equipment_id,
+        "team": RequestDailyRollup.team_id,
+        "department": RequestDailyRollup.department,
+    }[dimension]
+    total = func.sum(RequestDailyRollup.request_count).label("count")
+    if dimension == "department":
+        name = key
+        query = db.query(key.label("key"), total).filter(key.isnot(None))
+    else:
+        # Rollups keep the ids of deleted equipment and teams (and team 0 for none); rank only existing ones
+        model = Equipment if dimension == "equipment" else MaintenanceTeam
+        name = Equipment.name if dimension == "equipment" else MaintenanceTeam.team_name
+        query = db.query(key.label("key"), name.label("name"), total).join(model, model.id == key)
+    ranked = filter_rollups(
+        query, start_date, end_date, team_id, department, request_type, None
+    ).group_by(key, name).order_by(total.desc(), key).limit(k).all()
+    
+    if dimension == "department":
+        return [RankingEntry(name=row.key, count=row.count) for row in ranked]
+    return [RankingEntry(id=row.key, name=row.name, count=row.count) for row in ranked]
+
+
+@router.get("/top", response_model=RankingResponse)
+def get_top_ranking(
+    dimension: str = Query("equipment", pattern="^(equipment|team|department)$"),
+    k: int = Query(10, ge=1, le=100),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    team_id: Optional[int] = Query(None),
+    department: Optional[str] = Query(None),
+    request_type: Optional[RequestType] = Query(None),
+    all_sites: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Top-K equipment, teams or departments by requests created"""
+    if not all_sites:
+        items = top_ranking(db, dimension, k, start_date, end_date, team_id, department, request_type)
+        release_session(db)
+        return RankingResponse(dimension=dimension, items=items)
+    
+    check_all_sites(current_user, team_id=team_id)
+    release_session(db)
+    # Equipment and teams belong to one site, so each site's top k holds every entry that can
+    # make the overall top k. Departments add up across sites and are few: fetch them all.
+    site_k = None if dimension == "department" else k
+    per_site = fan_out(
+        lambda site_db: top_ranking(site_db, dimension, site_k, start_date, end_date, None, department, request_type)
+    )
+    if dimension == "department":
+        totals = {}
+        for entries in per_site.values():
+            for entry in entries:
+                totals[entry.name] = totals.get(entry.name, 0) + entry.count
+        items = [RankingEntry(name=name, count=count) for name, count in totals.items()]
+    else:
+        items = [
+            entry.model_copy(update={"site": site}) for site, entries in per_site.items() for entry in entries
+        ]
+    items.sort(key=lambda entry: -entry.count)
+    return RankingResponse(dimension=dimension, items=items[:k])
+
+
+def reliability_entries(db: Session, start_date: date, end_date: date) -> tuple[list, list]:
+    """Named reliability entries for equipment and teams"""
+    result = reliability_for_window(db, start_date, end_date)
+    
+    equipment_ids = [entry["id"] for entry in result["equipment"] if entry["id"]]
+    team_ids = [entry["id"] for entry in result["teams"] if entry["id"]]
+    equipment_names = dict(
+        db.query(Equipment.id, Equipment.name).filter(Equipment.id.in_(equipment_ids)).all()
+    ) if equipment_ids else {}
+    team_names = dict(
+        db.query(MaintenanceTeam.id, MaintenanceTeam.team_name).filter(MaintenanceTeam.id.in_(team_ids)).all()
+    ) if team_ids else {}
+    return (
+        [ReliabilityEntry(name=equipment_names.get(entry["id"]), **entry) for entry in result["equipment"]],
+        [ReliabilityEntry(name=team_names.get(entry["id"]), **entry) for entry in result["teams"]],
+    )
+
+
+@router.get("/reliability", response_model=ReliabilityResponse)
+def get_reliability(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    all_sites: bool = Query(False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """MTTR, MTBF and SLA breaches per equipment and team (defaults to the last 90 days)"""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=89)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    if all_sites:
+        check_all_sites(current_user)
+        release_session(db)
+        per_site = fan_out(lambda site_db: reliability_entries(site_db, start_date, end_date))
+        equipment = [entry.model_copy(update={"site": site}) for site, (entries, _) in per_site.items() for entry in entries]
+        teams = [entry.model_copy(update={"site": site}) for site, (_, entries) in per_site.items() for entry in entries]
+    else:
+        equipment, teams = reliability_entries(db, start_date, end_date)
+        release_session(db)
+    
+    return ReliabilityResponse(
+        start_date=start_date,
+        end_date=end_date,
+        sla_hours=SLA_REPAIR_HOURS,
+        equipment=equipment,
+        teams=teams
+    )
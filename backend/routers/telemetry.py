@@ -0,0 +1,125 @@
+"""
+Telemetry routes: batch reading ingestion and threshold rules
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from database import get_db, get_read_db, release_session
+from models import Equipment, TelemetryReading, TelemetryRule, User, UserRole
+from schemas import (
+    TelemetryBatch, TelemetryIngestResult, TelemetryReadingResponse,
+    TelemetryRuleCreate, TelemetryRuleResponse
+)
+from auth import get_current_user, require_role
+from telemetry import TELEMETRY_MAX_BATCH, ingest_readings
+from serialization import render
+from typing import List, Optional
+
+router = APIRouter()
+
+OPERATOR_SYMBOLS = {"GT": ">", "GTE": ">=", "LT": "<", "LTE": "<="}
+
+
+@router.post("/readings", response_model=TelemetryIngestResult)
+def ingest_telemetry(
+    batch: TelemetryBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.TECHNICIAN]))
+):
+    """Store a batch of readings and open corrective requests for breached rules"""
+    if len(batch.readings) > TELEMETRY_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {TELEMETRY_MAX_BATCH} readings per batch")
+    
+    equipment_ids = {reading.equipment_id for reading in batch.readings}
+    known = {row.id for row in db.query(Equipment.id).filter(Equipment.id.in_(equipment_ids))}
+    if len(known) != len(equipment_ids):
+        raise HTTPException(status_code=400, detail=f"Unknown equipment ids: {sorted(equipment_ids - known)}")
+    
+    now = datetime.now(timezone.utc)
+    stored, rule_ids, created = ingest_readings(db, [
+        {
+            "equipment_id": reading.equipment_id,
+            "metric": reading.metric,
+            "value": reading.value,
+            "recorded_at": reading.recorded_at or now,
+        }
+        for reading in batch.readings
+    ])
+    release_session(db)
+    return TelemetryIngestResult(accepted=stored, triggered_rule_ids=rule_ids, requests_created=created)
+
+
+@router.get("/readings", response_model=List[TelemetryReadingResponse])
+def list_telemetry_readings(
+    equipment_id: int,
+    metric: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Latest readings of one piece of equipment, newest first"""
+    query = db.query(
+        TelemetryReading.equipment_id,
+        TelemetryReading.metric,
+        TelemetryReading.value,
+        TelemetryReading.recorded_at
+    ).filter(TelemetryReading.equipment_id == equipment_id)
+    if metric:
+        query = query.filter(TelemetryReading.metric == metric)
+    if since:
+        query = query.filter(TelemetryReading.recorded_at >= since)
+    if until:
+        query = query.filter(TelemetryReading.recorded_at < until)
+    return render(List[TelemetryReadingResponse], query.order_by(TelemetryReading.recorded_at.desc()).limit(limit).all(), db=db)
+
+
+@router.post("/rules", response_model=TelemetryRuleResponse, status_code=201)
+def create_telemetry_rule(
+    rule: TelemetryRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Create a threshold rule that opens a corrective request when breached"""
+    equipment = db.query(Equipment).filter(Equipment.id == rule.equipment_id).first()
+    if not equipment:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    
+    subject = rule.subject or (
+        f"{equipment.name}: {rule.metric} {OPERATOR_SYMBOLS[rule.operator.value]} {rule.threshold:g}"
+    )
+    db_rule = TelemetryRule(**rule.dict(exclude={"subject"}), subject=subject, created_by_id=current_user.id)
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return render(TelemetryRuleResponse, db_rule, status_code=201, db=db)
+
+
+@router.get("/rules", response_model=List[TelemetryRuleResponse])
+def list_telemetry_rules(
+    equipment_id: Optional[int] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List telemetry rules"""
+    query = db.query(TelemetryRule)
+    if equipment_id:
+        query = query.filter(TelemetryRule.equipment_id == equipment_id)
+    return render(List[TelemetryRuleResponse], query.order_by(TelemetryRule.id).all(), db=db)
+
+
+@router.delete("/rules/{rule_id}", status_code=204)
+def delete_telemetry_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """Delete a telemetry rule; requests it opened are kept"""
+    rule = db.query(TelemetryRule).filter(TelemetryRule.id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Telemetry rule not found")
+    
+    db.delete(rule)
+    db.commit()
+    return None
@@ -0,0 +1,230 @@
+"""
+Capacity-aware assignment of open maintenance requests to technicians
+
+Every team member has the same number of bookable hours per day. In-progress
+work (and, unless rebalancing, already-assigned new work) is booked first as
+fixed load. Remaining NEW requests are then placed greedily, overdue and
+earliest first, corrective before preventive and longest first within a day,
+onto the least-loaded member of the request's team on its scheduled day, or
+the next day with room. A min-heap per (team, day) keeps each placement at
+O(log members); heap entries made stale by a technician's bookings in another
+team are refreshed lazily when they surface.
+"""
+import heapq
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from models import (
+    MaintenanceRequest, RequestStatus, RequestType, TeamMember, User,
+    log_request_changes
+)
+
+TECHNICIAN_DAILY_HOURS = float(os.getenv("TECHNICIAN_DAILY_HOURS", "8"))
+DEFAULT_REQUEST_HOURS = float(os.getenv("DEFAULT_REQUEST_HOURS", "2"))
+
+
+class _Workload:
+    """Hours booked per (technician, day), with a lazily built heap per (team, day)"""
+
+    def __init__(self, members: dict[int, list[int]], daily_hours: float):
+        self.members = members
+        self.daily_hours = daily_hours
+        self.booked: defaultdict[tuple[int, date], float] = defaultdict(float)
+        self._heaps: dict[tuple[int, date], list[tuple[float, int]]] = {}
+
+    def book(self, technician_id: int, day: date, hours: float):
+        self.booked[(technician_id, day)] += hours
+
+    def place(self, team_id: int, day: date, hours: float) -> Optional[int]:
+        """Book the least-loaded team member with room on day; None if nobody fits"""
+        heap = self._heaps.get((team_id, day))
+        if heap is None:
+            heap = [(self.booked[(technician_id, day)], technician_id) for technician_id in self.members[team_id]]
+            heapq.heapify(heap)
+            self._heaps[(team_id, day)] = heap
+        while heap:
+            booked, technician_id = heap[0]
+            current = self.booked[(technician_id, day)]
+            if booked == current:
+                break
+            heapq.heapreplace(heap, (current, technician_id))
+        if not heap or heap[0][0] + hours > self.daily_hours:
+            return None
+        booked, technician_id = heap[0]
+        heapq.heapreplace(heap, (booked + hours, technician_id))
+        self.book(technician_id, day, hours)
+        return technician_id
+
+
+def plan_schedule(
+    db: Session,
+    start_date: date,
+    days: int,
+    daily_hours: float = TECHNICIAN_DAILY_HOURS,
+    team_id: Optional[int] = None,
+    rebalance: bool = False
+) -> dict:
+    """Propose technician and day for open requests in [start_date, start_date + days)"""
+    end_date = start_date + timedelta(days=days - 1)
+
+    member_query = select(TeamMember.team_id, TeamMember.user_id).join(User, User.id == TeamMember.user_id).where(
+        User.is_active.is_(True)
+    )
+    members: dict[int, list[int]] = defaultdict(list)
+    for row in db.execute(member_query):
+        members[row.team_id].append(row.user_id)
+
+    request_query = select(
+        MaintenanceRequest.id,
+        MaintenanceRequest.subject,
+        MaintenanceRequest.auto_filled_team_id,
+        MaintenanceRequest.assigned_technician_id,
+        MaintenanceRequest.scheduled_date,
+        MaintenanceRequest.duration_hours,
+        MaintenanceRequest.request_type,
+        MaintenanceRequest.status,
+        MaintenanceRequest.version,
+    ).where(
+        MaintenanceRequest.status.in_([RequestStatus.NEW, RequestStatus.IN_PROGRESS]),
+        or_(MaintenanceRequest.scheduled_date.is_(None), MaintenanceRequest.scheduled_date <= end_date),
+    )
+
+    workload = _Workload(members, daily_hours)
+    pending = []
+    for row in db.execute(request_query):
+        hours = row.duration_hours or DEFAULT_REQUEST_HOURS
+        day = max(row.scheduled_date or start_date, start_date)
+        # Other teams' work still occupies technicians who belong to several teams
+        in_scope = not team_id or row.auto_filled_team_id == team_id
+        fixed = (
+            row.status == RequestStatus.IN_PROGRESS or
+            not in_scope or
+            (not rebalance and row.assigned_technician_id is not None)
+        )
+        if fixed:
+            if row.assigned_technician_id:
+                workload.book(row.assigned_technician_id, day, hours)
+        else:
+            pending.append((day, row.request_type != RequestType.CORRECTIVE, -hours, row.id, row))
+    pending.sort(key=lambda item: item[:4])
+
+    assignments, unassigned = [], []
+    unchanged = 0
+    for day, _, negative_hours, _, row in pending:
+        hours = -negative_hours
+        if not row.auto_filled_team_id or not members.get(row.auto_filled_team_id):
+            unassigned.append({"request_id": row.id, "reason": "Equipment has no maintenance team with members"})
+            continue
+        if hours > daily_hours:
+            unassigned.append({"request_id": row.id, "reason": "Longer than a technician's daily capacity"})
+            continue
+        technician_id = None
+        while day <= end_date:
+            technician_id = workload.place(row.auto_filled_team_id, day, hours)
+            if technician_id is not None:
+                break
+            day += timedelta(days=1)
+        if technician_id is None:
+            unassigned.append({"request_id": row.id, "reason": "No capacity left in the scheduling window"})
+            continue
+        if technician_id == row.assigned_technician_id and day == row.scheduled_date:
+            unchanged += 1
+            continue
+        assignments.append({
+            "request_id": row.id,
+            "subject": row.subject,
+            "team_id": row.auto_filled_team_id,
+            "technician_id": technician_id,
+            "scheduled_date": day,
+            "previous_technician_id": row.assigned_technician_id,
+            "previous_scheduled_date": row.scheduled_date,
+            "hours": hours,
+            "version": row.version,
+        })
+
+    booked_by_technician: defaultdict[int, float] = defaultdict(float)
+    for (technician_id, day), hours in workload.booked.items():
+        if start_date <= day <= end_date:
+            booked_by_technician[technician_id] += hours
+    capacity = daily_hours * days
+    if team_id:
+        scheduled_technicians = set(members.get(team_id, []))
+    else:
+        scheduled_technicians = {technician_id for team in members.values() for technician_id in team}
+    technicians = [
+        {
+            "technician_id": technician_id,
+            "booked_hours": round(booked_by_technician[technician_id], 2),
+            "capacity_hours": capacity,
+            "utilization": round(booked_by_technician[technician_id] / capacity, 3) if capacity else 0.0,
+        }
+        for technician_id in sorted(scheduled_technicians)
+    ]
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily_hours": daily_hours,
+        "assignments": assignments,
+        "unchanged": unchanged,
+        "unassigned": unassigned,
+        "technicians": technicians,
+    }
+
+
+def apply_schedule(db: Session, assignments: list[dict]) -> list[int]:
+    """Write proposed assignments in bulk; returns the request ids left alone because
+    they were edited or left NEW since planning. Logs delta-sync changes, as the
+    ORM listener is bypassed."""
+    if not assignments:
+        return []
+    requests = MaintenanceRequest.__table__
+    # Compare-and-swap on the version and status the plan was computed from,
+    # locking the rows that still match so the guarded UPDATE below writes them all
+    planned = and_(
+        tuple_(requests.c.id, requests.c.version).in_([(item["request_id"], item["version"]) for item in assignments]),
+        requests.c.status == RequestStatus.NEW,
+    )
+    current = set(db.execute(select(requests.c.id).where(planned).with_for_update()).scalars())
+    applied = [item for item in assignments if item["request_id"] in current]
+    conflicts = [item["request_id"] for item in assignments if item["request_id"] not in current]
+    if not applied:
+        db.rollback()
+        return conflicts
+
+    reassigned = [
+        item["request_id"] for item in applied
+        if item["previous_technician_id"] is not None and item["technician_id"] != item["previous_technician_id"]
+    ]
+    # Tombstone for the technician losing the request, as the ORM listener would write
+    if reassigned:
+        log_request_changes(db, requests.c.id.in_(reassigned), deleted=True)
+    # Bumps each version so clients holding the old one get 409 instead of overwriting
+    db.execute(
+        update(requests)
+        .where(
+            requests.c.id == bindparam("request_id"),
+            requests.c.version == bindparam("planned_version"),
+            requests.c.status == RequestStatus.NEW,
+        )
+        .values(
+            assigned_technician_id=bindparam("technician_id"),
+            scheduled_date=bindparam("new_scheduled_date"),
+            version=requests.c.version + 1
+        ),
+        [
+            {
+                "request_id": item["request_id"], "planned_version": item["version"],
+                "technician_id": item["technician_id"], "new_scheduled_date": item["scheduled_date"],
+            }
+            for item in applied
+        ]
+    )
+    log_request_changes(db, requests.c.id.in_([item["request_id"] for item in applied]))
+    db.commit()
+    return conflicts
@@ -1,10 +1,10 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Dict, Optional, List
 from datetime import date, datetime
-from models import UserRole, EquipmentStatus, RequestType, RequestStatus
+from models import UserRole, EquipmentStatus, RequestType, RequestStatus, PlanIntervalUnit, TelemetryOperator
 
 
 # User Schemas
@@ -20,6 +20,7 @@ class UserCreate(UserBase):
 
 
 class UserResponse(UserBase):
+    email: str  # Validated on the way in; re-checking stored addresses dominated list rendering
     id: int
     is_active: bool
     created_at: datetime
@@ -86,6 +87,7 @@ class EquipmentBase(BaseModel):
     maintenance_team_id: Optional[int] = None
     default_technician_id: Optional[int] = None
     status: EquipmentStatus = EquipmentStatus.ACTIVE
+    parent_id: Optional[int] = None  # Production line or machine this belongs to
 
 
 class EquipmentCreate(EquipmentBase):
@@ -100,14 +102,45 @@ class EquipmentResponse(EquipmentBase):
     maintenance_team: Optional[MaintenanceTeamResponse] = None
     default_technician: Optional[UserResponse] = None
     open_requests_count: int = 0  # For smart button
+    risk_score: Optional[float] = None  # Written by the risk scoring job
 
     class Config:
         from_attributes = True
 
 
+class FacetCount(BaseModel):
+    value: Optional[str] = None  # None counts equipment with the field unset
+    count: int
+
+
+class TeamFacetCount(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+
+class EquipmentFacets(BaseModel):
+    """Counts over the filtered equipment, largest first"""
+    department: List[FacetCount]
+    status: List[FacetCount]
+    maintenance_team: List[TeamFacetCount]
+
+
 class EquipmentListResponse(BaseModel):
     items: List[EquipmentResponse]
     total: int
+    facets: Optional[EquipmentFacets] = None  # Only with include_facets=true
+
+
+class EquipmentScrap(BaseModel):
+    equipment_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    reason: Optional[str] = None
+    include_subtree: bool = False  # Also scrap everything under the given equipment
+
+
+class EquipmentScrapResult(BaseModel):
+    scrapped_ids: List[int]  # Equipment that was not already scrapped
+    requests_closed: int
 
 
 # Maintenance Request Schemas
@@ -145,12 +178,88 @@ class MaintenanceRequestResponse(MaintenanceRequestBase):
     equipment: Optional[EquipmentResponse] = None
     maintenance_team: Optional[MaintenanceTeamResponse] = None
     assigned_technician: Optional[UserResponse] = None
+    preventive_plan_id: Optional[int] = None
+    telemetry_rule_id: Optional[int] = None
+    version: int = 1  # Send back as If-Match to update only this version
     is_overdue: bool = False
+    is_archived: bool = False
 
     class Config:
         from_attributes = True
 
 
+class MaintenanceRequestChanges(BaseModel):
+    """Delta sync page: changed requests, deleted ids and the cursor to resume from"""
+    items: List[MaintenanceRequestResponse]
+    deleted_ids: List[int]
+    cursor: int
+    has_more: bool
+
+
+class MaintenanceRequestCard(BaseModel):
+    """Slim projection of a request for Kanban cards"""
+    id: int
+    subject: str
+    description: Optional[str] = None
+    status: RequestStatus
+    request_type: RequestType
+    scheduled_date: Optional[date] = None
+    equipment_id: int
+    equipment_name: Optional[str] = None
+    assigned_technician_id: Optional[int] = None
+    assigned_technician_name: Optional[str] = None
+    version: int = 1
+    is_overdue: bool = False
+
+
+class KanbanColumnResponse(BaseModel):
+    status: RequestStatus
+    total: int
+    items: List[MaintenanceRequestCard]
+
+
+class KanbanBoardResponse(BaseModel):
+    columns: List[KanbanColumnResponse]
+
+
+class ScheduleAssignment(BaseModel):
+    request_id: int
+    subject: str
+    team_id: int
+    technician_id: int
+    scheduled_date: date
+    previous_technician_id: Optional[int] = None
+    previous_scheduled_date: Optional[date] = None
+    hours: float
+    version: int  # Request version the assignment was planned against
+
+
+class ScheduleUnassigned(BaseModel):
+    request_id: int
+    reason: str
+
+
+class TechnicianWorkload(BaseModel):
+    technician_id: int
+    booked_hours: float
+    capacity_hours: float
+    utilization: float
+
+
+class ScheduleResponse(BaseModel):
+    """Proposed (or, without dry_run, applied) technician schedule"""
+    dry_run: bool
+    start_date: date
+    end_date: date
+    daily_hours: float
+    assignments: List[ScheduleAssignment]
+    unchanged: int
+    unassigned: List[ScheduleUnassigned]
+    technicians: List[TechnicianWorkload]
+    # Requests edited or no longer NEW by the time the plan was applied; left as they were
+    conflicts: List[int] = []
+
+
 # Auth Schemas
 class Token(BaseModel):
     access_token: str
@@ -164,6 +273,7 @@ class TokenData(BaseModel):
 class LoginRequest(BaseModel):
     username: str
     password: str
+    site: Optional[str] = None  # Only needed when the username exists at several sites
 
 
 # Reporting Schemas
@@ -172,3 +282,160 @@ class ReportResponse(BaseModel):
     requests_per_equipment: dict
     preventive_vs_corrective: dict
 
+
+class TimeSeriesPoint(BaseModel):
+    period_start: date
+    total: int
+    corrective: int
+    preventive: int
+
+
+class TimeSeriesResponse(BaseModel):
+    bucket: str
+    series: List[TimeSeriesPoint]
+
+
+class RankingEntry(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+    site: Optional[str] = None  # Set in all_sites reports, where ids are per site
+
+
+class RankingResponse(BaseModel):
+    dimension: str
+    items: List[RankingEntry]
+
+
+class ReliabilityEntry(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    failures: int
+    repairs: int
+    mttr_hours: Optional[float] = None
+    mtbf_hours: Optional[float] = None
+    sla_breaches: int
+    site: Optional[str] = None  # Set in all_sites reports
+
+
+class ReliabilityResponse(BaseModel):
+    start_date: date
+    end_date: date
+    sla_hours: float
+    equipment: List[ReliabilityEntry]
+    teams: List[ReliabilityEntry]
+
+
+# Preventive Plan Schemas
+class PreventivePlanBase(BaseModel):
+    subject: str
+    description: Optional[str] = None
+    interval_unit: PlanIntervalUnit
+    interval_count: int = Field(1, ge=1)
+    start_date: date
+    end_date: Optional[date] = None
+    duration_hours: Optional[float] = None
+
+
+class PreventivePlanCreate(PreventivePlanBase):
+    equipment_id: int
+
+
+class PreventivePlanBulkCreate(PreventivePlanBase):
+    """One plan per matching active equipment; no filter means all active equipment"""
+    equipment_ids: Optional[List[int]] = None
+    department: Optional[str] = None
+
+
+class PreventivePlanResponse(PreventivePlanBase):
+    id: int
+    equipment_id: int
+    is_active: bool
+    generated_through: Optional[date] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PreventivePlanBulkResult(BaseModel):
+    created: int
+
+
+class PreventiveGenerationResult(BaseModel):
+    horizon: date
+    created: int
+
+
+# Telemetry Schemas
+class TelemetryReadingIn(BaseModel):
+    equipment_id: int
+    metric: str = Field(..., min_length=1, max_length=64)
+    value: float
+    recorded_at: Optional[datetime] = None
+
+
+class TelemetryBatch(BaseModel):
+    readings: List[TelemetryReadingIn] = Field(..., min_length=1)
+
+
+class TelemetryIngestResult(BaseModel):
+    accepted: int
+    triggered_rule_ids: List[int]
+    requests_created: int
+
+
+class TelemetryReadingResponse(BaseModel):
+    equipment_id: int
+    metric: str
+    value: float
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TelemetryRuleCreate(BaseModel):
+    equipment_id: int
+    metric: str = Field(..., min_length=1, max_length=64)
+    operator: TelemetryOperator
+    threshold: float
+    subject: Optional[str] = None
+
+
+class TelemetryRuleResponse(BaseModel):
+    id: int
+    equipment_id: int
+    metric: str
+    operator: TelemetryOperator
+    threshold: float
+    subject: str
+    is_active: bool
+    last_triggered_at: Optional[datetime] = None
+    last_triggered_value: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Batch Schemas
+class BatchItem(BaseModel):
+    id: Optional[str] = None  # Echoed back to match responses to requests
+    path: str  # e.g. /api/equipment/?limit=50
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1)
+
+
+class BatchResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str]  # Only ETag
+    body: Any
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResult]
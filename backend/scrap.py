@@ -0,0 +1,64 @@
+"""
+Scrapping equipment
+
+Scrapped equipment gets no more work: its status becomes SCRAPPED and every
+request still open on it (NEW or IN_PROGRESS, generated preventive
+occurrences included) moves to SCRAP with the reason recorded. Each step is
+one set-based UPDATE in the caller's transaction, however many machines and
+requests are involved. Preventive generation already skips equipment that
+is not ACTIVE, so no new occurrences follow.
+"""
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session
+
+from metrics import STATUS_TRANSITIONS
+from models import (
+    Equipment, EquipmentClosure, EquipmentStatus, MaintenanceRequest, RequestStatus,
+    log_request_changes, log_status_events
+)
+
+OPEN_STATUSES = [RequestStatus.NEW, RequestStatus.IN_PROGRESS]
+
+
+def subtree_ids(equipment_ids):
+    """Select of the ids of equipment_ids and everything under them"""
+    return select(EquipmentClosure.descendant_id).where(EquipmentClosure.ancestor_id.in_(equipment_ids))
+
+
+def close_open_requests(db: Session, equipment_ids, reason: str) -> int:
+    """Move the open requests of equipment_ids (a list or a select of ids) to SCRAP; returns requests closed"""
+    requests = MaintenanceRequest.__table__
+    where = and_(requests.c.equipment_id.in_(equipment_ids), requests.c.status.in_(OPEN_STATUSES))
+    closing = dict(db.execute(
+        select(requests.c.status, func.count()).where(where).group_by(requests.c.status)
+    ).all())
+    if not closing:
+        return 0
+    # Set-based, so log here. Team, technician and creator are unchanged, so the
+    # sync entries can be written before the UPDATE while where still matches.
+    log_status_events(db, where, to_status=RequestStatus.SCRAP)
+    log_request_changes(db, where)
+    db.execute(
+        update(requests).where(where).values(
+            status=RequestStatus.SCRAP, scrap_reason=reason, version=requests.c.version + 1
+        )
+    )
+    for status, count in closing.items():
+        STATUS_TRANSITIONS.labels(status.value, RequestStatus.SCRAP.value).inc(count)
+    return sum(closing.values())
+
+
+def scrap_equipment(db: Session, equipment_ids, reason: str) -> tuple[list, int]:
+    """Mark equipment_ids SCRAPPED and close their open requests. Caller commits.
+
+    Returns the (id, status, updated_at) rows of equipment that was not
+    already scrapped, and the number of requests closed.
+    """
+    equipment = Equipment.__table__
+    scrapped = db.execute(
+        update(equipment)
+        .where(equipment.c.id.in_(equipment_ids), equipment.c.status != EquipmentStatus.SCRAPPED)
+        .values(status=EquipmentStatus.SCRAPPED)
+        .returning(equipment.c.id, equipment.c.status, equipment.c.updated_at)
+    ).all()
+    return scrapped, close_open_requests(db, equipment_ids, reason)
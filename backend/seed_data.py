@@ -4,23 +4,27 @@ Run this script to populate the database with initial data
 """
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from database import SessionLocal, engine, Base
+from alembic import command
+from alembic.config import Config
+from database import SessionLocal
 from models import User, MaintenanceTeam, TeamMember, Equipment, MaintenanceRequest, UserRole, EquipmentStatus, RequestType, RequestStatus
 from auth import get_password_hash
 from datetime import date, timedelta
 import time
 import sys
+import os
 
-# Create all tables
+# Apply migrations
 def create_tables():
-    """Create database tables with retry logic"""
+    """Bring the schema up to date via Alembic, with retry logic"""
     max_retries = 10
     retry_delay = 2
+    alembic_cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
     
     for attempt in range(max_retries):
         try:
-            Base.metadata.create_all(bind=engine)
-            print("✅ Database tables created successfully")
+            command.upgrade(alembic_cfg, "head")
+            print("✅ Database schema is up to date")
             return True
         except OperationalError as e:
             if attempt < max_retries - 1:
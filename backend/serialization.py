@@ -0,0 +1,44 @@
+"""
+Fast JSON rendering for list endpoints
+
+ORJSONResponse is the app-wide default response class. On top of that, a
+route returning many rows straight from the database can hand them to
+render(): the ORM objects are validated once through a cached TypeAdapter
+and pydantic-core writes the JSON bytes directly. This skips FastAPI's
+second validation against response_model and its jsonable_encoder walk.
+The route keeps response_model so the OpenAPI schema is unchanged.
+
+Given the route's session, render() releases it between validating and
+writing the JSON: everything the response needs is loaded while validating,
+and the connection is back in the pool before the bytes are produced and sent.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from database import forward_cookies, release_session
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_) -> TypeAdapter:
+    """Build the validator/serializer for a response type once per process"""
+    return TypeAdapter(type_)
+
+
+def render(type_, data: Any, status_code: int = 200, db: Optional[Session] = None) -> Response:
+    """Validate data (ORM objects, dicts or models) as type_ and return it as JSON.
+
+    Model instances of the right type pass through without being revalidated.
+    When db is given it is released once data is validated; see release_session().
+    """
+    adapter = type_adapter(type_)
+    validated = adapter.validate_python(data, from_attributes=True)
+    if db is not None:
+        release_session(db)
+    response = Response(content=adapter.dump_json(validated), status_code=status_code, media_type="application/json")
+    if db is not None:
+        forward_cookies(db, response)
+    return response
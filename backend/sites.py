@@ -0,0 +1,111 @@
+"""
+Per-site database routing for multi-plant deployments
+
+Each site (plant) listed in SITE_DATABASE_URLS has its own database, with
+the same schema. Access tokens carry the site the user signed in at, and
+SiteMiddleware makes it the current site for the whole request, so every
+session the request opens (get_db, get_read_db, background tasks) goes to
+that site's database without routes knowing about sites.
+
+Background jobs run once per site through for_each_site(). Cross-site
+reads, such as the all_sites reports, call fan_out() to run a query against
+every site's database concurrently and merge the results themselves.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Optional, TypeVar
+
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from auth import ALGORITHM, SECRET_KEY
+from database import (
+    DEFAULT_SITE, ReadSessionLocal, SessionLocal, current_site, replica_usable, site_engines, use_site
+)
+from models import User
+
+T = TypeVar("T")
+
+
+def site_names() -> list[str]:
+    """Configured sites, DEFAULT_SITE first"""
+    return list(site_engines)
+
+
+def is_multi_site() -> bool:
+    return len(site_engines) > 1
+
+
+def token_site(authorization: str) -> Optional[str]:
+    """Site claim of a bearer token; None when absent or the token is unreadable
+    (get_current_user rejects bad tokens, this only routes good ones)"""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("site")
+    except JWTError:
+        return None
+
+
+class SiteMiddleware:
+    """ASGI middleware routing the request's sessions to its token's site"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        site = token_site(Headers(scope=scope).get("authorization", "")) or DEFAULT_SITE
+        if site not in site_engines:
+            response = JSONResponse({"detail": "Could not validate credentials"}, status_code=401)
+            await response(scope, receive, send)
+            return
+        token = current_site.set(site)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_site.reset(token)
+
+
+def for_each_site(func: Callable[[], T]) -> Callable[[], dict[str, T]]:
+    """Wrap a background job so one call runs it against every site in turn"""
+    @wraps(func)
+    def run() -> dict[str, T]:
+        results = {}
+        for site in site_names():
+            with use_site(site):
+                results[site] = func()
+        return results
+    return run
+
+
+def _read_session() -> Session:
+    # Cross-site reads tolerate replica lag, so no recent-write check
+    return ReadSessionLocal() if replica_usable() else SessionLocal()
+
+
+def fan_out(func: Callable[[Session], T], sites: Optional[list[str]] = None) -> dict[str, T]:
+    """Call func with a read session of each site, all sites concurrently; returns {site: result}"""
+    sites = sites or site_names()
+
+    def run(site: str) -> T:
+        with use_site(site):
+            db = _read_session()
+            try:
+                return func(db)
+            finally:
+                db.close()
+
+    with ThreadPoolExecutor(max_workers=len(sites), thread_name_prefix="site-fan-out") as pool:
+        return dict(zip(sites, pool.map(run, sites)))
+
+
+def find_user_sites(username: str) -> list[str]:
+    """Sites with a user of this name"""
+    found = fan_out(lambda db: db.query(User.id).filter(User.username == username).first() is not None)
+    return [site for site, exists in found.items() if exists]
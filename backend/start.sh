@@ -64,6 +64,16 @@ else
 fi
 echo ""
 
+# Apply database migrations (the app never creates tables itself)
+echo "🗄️  Applying database migrations..."
+alembic upgrade head
+# Multi-plant deployments: every other site's database (SITE_DATABASE_URLS) too
+for site in $(python -c "from database import SITE_DATABASE_URLS, DEFAULT_SITE; print(' '.join(s for s in SITE_DATABASE_URLS if s != DEFAULT_SITE))"); do
+    alembic -x site="$site" upgrade head
+done
+echo "✓ Database schema is up to date"
+echo ""
+
 # Start the server
 echo "🚀 Starting backend server..."
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━"
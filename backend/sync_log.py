@@ -0,0 +1,41 @@
+"""
+Compaction of the request_changes log used by delta sync
+
+An entry is redundant once a later entry exists for the same request with
+the same visibility snapshot: every client that would receive the old entry
+also receives the newer one. Tombstones for a visibility change are kept.
+
+Run once from the command line with `python sync_log.py`.
+"""
+import os
+
+from sqlalchemy import and_, delete, exists
+from sqlalchemy.orm import aliased
+
+from database import SessionLocal
+from models import RequestChange
+
+SYNC_LOG_COMPACT_INTERVAL_SECONDS = int(os.getenv("SYNC_LOG_COMPACT_INTERVAL_SECONDS", "3600"))
+
+
+def compact_request_changes() -> int:
+    """Delete superseded change log entries; returns rows removed"""
+    later = aliased(RequestChange)
+    superseded = exists().where(and_(
+        later.request_id == RequestChange.request_id,
+        later.id > RequestChange.id,
+        later.auto_filled_team_id.is_not_distinct_from(RequestChange.auto_filled_team_id),
+        later.assigned_technician_id.is_not_distinct_from(RequestChange.assigned_technician_id),
+        later.created_by_id.is_not_distinct_from(RequestChange.created_by_id),
+    ))
+    db = SessionLocal()
+    try:
+        result = db.execute(delete(RequestChange).where(superseded))
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"🧹 Removed {compact_request_changes()} superseded change log entries")
@@ -0,0 +1,42 @@
+"""
+Local read-replica stand-in for development and testing
+
+Copies the primary SQLite database (DATABASE_URL) into the replica file
+(READ_DATABASE_URL) with SQLite's online backup API. Pass an interval to keep
+copying, which simulates a replica that lags the primary by up to that long:
+
+    python sync_replica.py        # copy once
+    python sync_replica.py 3      # copy every 3 seconds
+"""
+import sqlite3
+import sys
+import time
+
+from database import DATABASE_URL, READ_DATABASE_URL
+
+
+def _sqlite_path(url: str) -> str:
+    if not url or not url.startswith("sqlite:///"):
+        raise SystemExit("Both DATABASE_URL and READ_DATABASE_URL must be sqlite:/// URLs")
+    return url[len("sqlite:///"):]
+
+
+def sync_replica():
+    """Copy the primary database file into the replica file"""
+    source = sqlite3.connect(_sqlite_path(DATABASE_URL))
+    target = sqlite3.connect(_sqlite_path(READ_DATABASE_URL))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+if __name__ == "__main__":
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    while True:
+        sync_replica()
+        print(f"🔁 Replica synced from {DATABASE_URL}")
+        if interval is None:
+            break
+        time.sleep(interval)
@@ -0,0 +1,152 @@
+"""
+Telemetry ingestion and threshold rules
+
+A batch of readings is appended with one multi-row INSERT. The active rules
+of every equipment/metric in the batch are then checked in a single query
+joining the new readings to telemetry_rules, and each breached rule opens one
+CORRECTIVE request with one INSERT ... SELECT (team and technician auto-filled
+from the equipment), unless a request it opened is still NEW or IN_PROGRESS.
+A partial unique index holds that to one open request per rule even when
+ingests run concurrently; the losing INSERT does nothing. Both INSERTs return
+their ids, so each ingest only acts on its own rows.
+
+Readings older than TELEMETRY_RETENTION_DAYS are pruned in batches by a
+background job; run it once with `python telemetry.py`.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from autofill import auto_fill_columns
+from database import SessionLocal, dialect_insert
+from metrics import REQUESTS_CREATED
+from models import (
+    Equipment, EquipmentStatus, MaintenanceRequest, RequestStatus, RequestType,
+    TelemetryOperator, TelemetryReading, TelemetryRule, log_request_changes, log_status_events
+)
+
+TELEMETRY_MAX_BATCH = int(os.getenv("TELEMETRY_MAX_BATCH", "10000"))
+TELEMETRY_RETENTION_DAYS = int(os.getenv("TELEMETRY_RETENTION_DAYS", "90"))
+TELEMETRY_PRUNE_INTERVAL_SECONDS = int(os.getenv("TELEMETRY_PRUNE_INTERVAL_SECONDS", "3600"))
+TELEMETRY_PRUNE_BATCH_SIZE = int(os.getenv("TELEMETRY_PRUNE_BATCH_SIZE", "10000"))
+
+OPEN_STATUSES = [RequestStatus.NEW, RequestStatus.IN_PROGRESS]
+
+
+def _breached(value, rule):
+    return or_(
+        and_(rule.operator == TelemetryOperator.GT, value > rule.threshold),
+        and_(rule.operator == TelemetryOperator.GTE, value >= rule.threshold),
+        and_(rule.operator == TelemetryOperator.LT, value < rule.threshold),
+        and_(rule.operator == TelemetryOperator.LTE, value <= rule.threshold),
+    )
+
+
+def open_requests_for_rules(db: Session, rule_ids: list[int]) -> int:
+    """Open one corrective request per breached rule that has none open; returns requests created"""
+    requests = MaintenanceRequest.__table__
+    already_open = exists().where(
+        requests.c.telemetry_rule_id == TelemetryRule.id,
+        requests.c.status.in_(OPEN_STATUSES),
+    )
+    columns = {
+        "subject": TelemetryRule.subject,
+        "description": literal("Opened automatically by a telemetry threshold rule"),
+        "equipment_id": TelemetryRule.equipment_id,
+        **auto_fill_columns(),
+        "request_type": literal(RequestType.CORRECTIVE, type_=requests.c.request_type.type),
+        "status": literal(RequestStatus.NEW, type_=requests.c.status.type),
+        "created_by_id": TelemetryRule.created_by_id,
+        "telemetry_rule_id": TelemetryRule.id,
+    }
+    created_ids = db.execute(
+        dialect_insert(db)(requests).from_select(
+            list(columns),
+            select(*columns.values())
+            .join(Equipment, Equipment.id == TelemetryRule.equipment_id)
+            .where(
+                TelemetryRule.id.in_(rule_ids),
+                Equipment.status == EquipmentStatus.ACTIVE,
+                ~already_open,
+            )
+        )
+        # uq_maintenance_requests_open_telemetry_rule: a concurrent ingest opened one first
+        .on_conflict_do_nothing()
+        .returning(requests.c.id)
+    ).scalars().all()
+    if not created_ids:
+        return 0
+    # Set-based inserts bypass the ORM listeners, so log sync changes and status events here
+    inserted = requests.c.id.in_(created_ids)
+    log_request_changes(db, inserted)
+    log_status_events(db, inserted)
+    REQUESTS_CREATED.labels(RequestType.CORRECTIVE.value).inc(len(created_ids))
+    return len(created_ids)
+
+
+def ingest_readings(db: Session, readings: list[dict]) -> tuple[int, list[int], int]:
+    """Store readings and act on breached rules; returns (stored, breached rule ids, requests created)"""
+    readings_table = TelemetryReading.__table__
+    reading_ids = db.execute(insert(readings_table).returning(readings_table.c.id), readings).scalars().all()
+
+    reading = aliased(TelemetryReading)
+    rule = TelemetryRule
+    breaches = db.execute(
+        select(
+            rule.id,
+            rule.operator,
+            func.max(reading.value).label("highest"),
+            func.min(reading.value).label("lowest"),
+        )
+        .join(reading, and_(reading.equipment_id == rule.equipment_id, reading.metric == rule.metric))
+        .where(reading.id.in_(reading_ids), rule.is_active.is_(True), _breached(reading.value, rule))
+        .group_by(rule.id, rule.operator)
+    ).all()
+
+    created = 0
+    rule_ids = [breach.id for breach in breaches]
+    if breaches:
+        now = datetime.now(timezone.utc)
+        db.execute(update(TelemetryRule), [
+            {
+                "id": breach.id,
+                "last_triggered_at": now,
+                # The most extreme breaching reading, in the direction the rule watches
+                "last_triggered_value": (
+                    breach.lowest if breach.operator in (TelemetryOperator.LT, TelemetryOperator.LTE) else breach.highest
+                ),
+            }
+            for breach in breaches
+        ])
+        created = open_requests_for_rules(db, rule_ids)
+    db.commit()
+    return len(readings), rule_ids, created
+
+
+def prune_telemetry(retention_days: int = TELEMETRY_RETENTION_DAYS, batch_size: int = TELEMETRY_PRUNE_BATCH_SIZE) -> int:
+    """Delete readings older than the retention period, one short transaction per batch"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    removed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            # Readings arrive in time order, so the oldest ids are found without a time index
+            ids = db.execute(
+                select(TelemetryReading.id)
+                .where(TelemetryReading.recorded_at < cutoff)
+                .order_by(TelemetryReading.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return removed
+            db.execute(delete(TelemetryReading).where(TelemetryReading.id.in_(ids)))
+            db.commit()
+            removed += len(ids)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"🧹 Removed {prune_telemetry()} expired telemetry readings")
@@ -0,0 +1,54 @@
+"""
+Test fixtures: the app against a freshly migrated SQLite database
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+# Must be set before database.py is imported
+_DB_DIR = tempfile.mkdtemp(prefix="gearguard-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ.pop("SITE_DATABASE_URLS", None)
+os.environ.pop("READ_DATABASE_URL", None)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from auth import create_access_token  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from models import User, UserRole  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    command.upgrade(Config(str(BACKEND / "alembic.ini")), "head")
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client(migrated_database):
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_headers(db):
+    if db.query(User).filter(User.username == "admin").first() is None:
+        db.add(User(email="admin@example.com", username="admin", hashed_password="-", role=UserRole.ADMIN))
+        db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
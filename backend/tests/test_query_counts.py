@@ -0,0 +1,95 @@
+"""
+Read routes run a fixed number of statements, however many rows they return
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from database import engine
+from models import (
+    Equipment, MaintenanceRequest, MaintenanceTeam, RequestType, TeamMember, User, UserRole
+)
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def teams(db) -> list[MaintenanceTeam]:
+    """20 teams of 3 technicians, each team with a piece of equipment and a preventive request"""
+    created = []
+    for _ in range(20):
+        suffix = uuid4().hex[:8]
+        team = MaintenanceTeam(team_name=f"Crew {suffix}")
+        technicians = [
+            User(email=f"t{i}-{suffix}@example.com", username=f"t{i}-{suffix}", hashed_password="-", role=UserRole.TECHNICIAN)
+            for i in range(3)
+        ]
+        db.add_all([team, *technicians])
+        db.flush()
+        db.add_all([TeamMember(team_id=team.id, user_id=technician.id) for technician in technicians])
+        equipment = Equipment(name=f"Lathe {suffix}", maintenance_team_id=team.id, default_technician_id=technicians[0].id)
+        db.add(equipment)
+        db.flush()
+        db.add(MaintenanceRequest(
+            subject="Service", equipment_id=equipment.id, auto_filled_team_id=team.id,
+            request_type=RequestType.PREVENTIVE, scheduled_date=date.today() + timedelta(days=3),
+        ))
+        created.append(team)
+    db.commit()
+    return created
+
+
+# Authentication looks the user up once per request on top of these
+
+def test_team_list_loads_members_in_a_fixed_number_of_queries(client, admin_headers, teams):
+    with count_statements() as statements:
+        response = client.get("/api/maintenance-teams/", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) >= 20
+    assert len(statements) <= 4
+
+
+def test_team_detail_loads_members_in_a_fixed_number_of_queries(client, admin_headers, teams):
+    team_id = teams[0].id
+    with count_statements() as statements:
+        response = client.get(f"/api/maintenance-teams/{team_id}", headers=admin_headers)
+
+    assert len(response.json()["team_members"]) == 3
+    assert len(statements) <= 4
+
+
+def test_calendar_is_one_query(client, admin_headers, teams):
+    with count_statements() as statements:
+        response = client.get("/api/maintenance-requests/calendar/preventive", headers=admin_headers)
+
+    assert len(response.json()) >= 20
+    assert all(event["equipment"] for event in response.json())
+    assert len(statements) <= 2
+
+
+def test_equipment_detail_loads_team_and_technician_up_front(client, db, admin_headers, teams):
+    equipment = db.query(Equipment).filter(Equipment.maintenance_team_id == teams[0].id).one()
+
+    with count_statements() as statements:
+        response = client.get(f"/api/equipment/{equipment.id}", headers=admin_headers)
+
+    body = response.json()
+    assert len(body["maintenance_team"]["team_members"]) == 3
+    assert body["default_technician"]["id"] == equipment.default_technician_id
+    assert len(statements) <= 5
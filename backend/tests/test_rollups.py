@@ -0,0 +1,109 @@
+"""
+Reporting rollups staying in step with deletes (rollups.py)
+"""
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+import rollups
+from models import Equipment, MaintenanceRequest, RequestType
+from preventive import generate_preventive_requests
+from purge import purge_equipment
+
+
+@pytest.fixture(autouse=True)
+def fold_immediately(monkeypatch):
+    monkeypatch.setattr(rollups, "ROLLUP_SETTLE_SECONDS", 0)
+
+
+def make_equipment(db, requests: int, department: str = None) -> tuple[Equipment, list[int]]:
+    equipment = Equipment(name=f"Mill {uuid4().hex[:8]}", department=department or f"Dept {uuid4().hex[:8]}")
+    db.add(equipment)
+    db.flush()
+    rows = [
+        MaintenanceRequest(subject=f"Fault {i}", equipment_id=equipment.id, request_type=RequestType.CORRECTIVE)
+        for i in range(requests)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return equipment, [row.id for row in rows]
+
+
+def timeseries_total(client, headers, **filters) -> int:
+    response = client.get("/api/reports/timeseries", params=filters, headers=headers)
+    assert response.status_code == 200
+    return sum(point["total"] for point in response.json()["series"])
+
+
+def top_equipment(client, headers, department: str) -> list[dict]:
+    response = client.get("/api/reports/top", params={"dimension": "equipment", "department": department}, headers=headers)
+    assert response.status_code == 200
+    return response.json()["items"]
+
+
+def test_deleting_equipment_takes_its_requests_out_of_the_rollups(client, db, admin_headers):
+    equipment, _ = make_equipment(db, 3)
+    rollups.refresh_request_rollups()
+    assert timeseries_total(client, admin_headers, equipment_id=equipment.id) == 3
+    assert top_equipment(client, admin_headers, equipment.department) == [
+        {"id": equipment.id, "name": equipment.name, "count": 3, "site": None}
+    ]
+
+    assert client.delete(f"/api/equipment/{equipment.id}", headers=admin_headers).status_code == 204
+
+    assert timeseries_total(client, admin_headers, equipment_id=equipment.id) == 0
+    assert top_equipment(client, admin_headers, equipment.department) == []
+
+
+def test_purged_equipment_is_taken_out_in_every_batch(client, db, admin_headers):
+    equipment, _ = make_equipment(db, 5)
+    rollups.refresh_request_rollups()
+
+    purge_equipment(equipment.id, batch_size=2)
+
+    assert timeseries_total(client, admin_headers, equipment_id=equipment.id) == 0
+
+
+def test_deleting_a_request_subtracts_it_only_once_folded(client, db, admin_headers):
+    equipment, (folded_id, other_id) = make_equipment(db, 2)
+    rollups.refresh_request_rollups()
+    _, (unfolded_id,) = make_equipment(db, 1, department=equipment.department)
+    db.query(MaintenanceRequest).filter(MaintenanceRequest.id == unfolded_id).update({"equipment_id": equipment.id})
+    db.commit()
+
+    for request_id in (folded_id, unfolded_id):
+        assert client.delete(f"/api/maintenance-requests/{request_id}", headers=admin_headers).status_code == 204
+    rollups.refresh_request_rollups()
+
+    assert timeseries_total(client, admin_headers, equipment_id=equipment.id) == 1
+
+
+def test_deleting_a_plan_takes_its_upcoming_requests_out(client, db, admin_headers):
+    equipment, _ = make_equipment(db, 0)
+    response = client.post("/api/preventive-plans/", json={
+        "equipment_id": equipment.id, "subject": "Lubricate", "interval_unit": "WEEK",
+        "start_date": date.today().isoformat(),
+    }, headers=admin_headers)
+    assert response.status_code in (200, 201), response.text
+    plan_id = response.json()["id"]
+    generate_preventive_requests()
+    rollups.refresh_request_rollups()
+    generated = timeseries_total(client, admin_headers, equipment_id=equipment.id)
+
+    assert client.delete(f"/api/preventive-plans/{plan_id}", headers=admin_headers).status_code == 204
+
+    assert generated > 0
+    assert timeseries_total(client, admin_headers, equipment_id=equipment.id) == 0
+
+
+def test_a_later_fold_updates_the_department(client, db, admin_headers):
+    equipment, _ = make_equipment(db, 1)
+    rollups.refresh_request_rollups()
+    equipment.department = f"Dept {uuid4().hex[:8]}"
+    db.commit()
+    db.add(MaintenanceRequest(subject="Fault again", equipment_id=equipment.id, request_type=RequestType.CORRECTIVE))
+    db.commit()
+    rollups.refresh_request_rollups()
+
+    assert timeseries_total(client, admin_headers, department=equipment.department) == 2
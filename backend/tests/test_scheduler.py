@@ -0,0 +1,53 @@
+"""
+Applying a technician schedule (scheduler.apply_schedule)
+"""
+from datetime import date
+from uuid import uuid4
+
+from database import SessionLocal
+from models import Equipment, MaintenanceRequest, MaintenanceTeam, RequestStatus, RequestType, TeamMember, User, UserRole
+from scheduler import apply_schedule, plan_schedule
+
+
+def make_team_with_requests(db, count: int) -> tuple[int, list[int]]:
+    suffix = uuid4().hex[:8]
+    technician = User(email=f"tech-{suffix}@example.com", username=f"tech-{suffix}", hashed_password="-", role=UserRole.TECHNICIAN)
+    team = MaintenanceTeam(team_name=f"Team {suffix}")
+    db.add_all([technician, team])
+    db.flush()
+    equipment = Equipment(name="Press", maintenance_team_id=team.id)
+    db.add_all([TeamMember(team_id=team.id, user_id=technician.id), equipment])
+    db.flush()
+    requests = [
+        MaintenanceRequest(
+            subject=f"Check {i}", equipment_id=equipment.id, auto_filled_team_id=team.id,
+            request_type=RequestType.CORRECTIVE, duration_hours=1,
+        )
+        for i in range(count)
+    ]
+    db.add_all(requests)
+    db.commit()
+    return team.id, [request.id for request in requests]
+
+
+def test_requests_changed_after_planning_are_reported_not_overwritten(db):
+    team_id, (edited_id, closed_id, untouched_id) = make_team_with_requests(db, 3)
+    plan = plan_schedule(db, date.today(), days=5, team_id=team_id)
+    assert {item["request_id"] for item in plan["assignments"]} == {edited_id, closed_id, untouched_id}
+
+    # Someone else edits one request and closes another before the plan is applied
+    other = SessionLocal()
+    edited = other.get(MaintenanceRequest, edited_id)
+    edited.subject, edited.version = "Check the hydraulics", edited.version + 1
+    other.get(MaintenanceRequest, closed_id).status = RequestStatus.REPAIRED
+    other.commit()
+    other.close()
+
+    conflicts = apply_schedule(db, plan["assignments"])
+
+    assert sorted(conflicts) == sorted([edited_id, closed_id])
+    db.expire_all()
+    edited, closed, untouched = (db.get(MaintenanceRequest, id_) for id_ in (edited_id, closed_id, untouched_id))
+    assert edited.assigned_technician_id is None and edited.version == 2
+    assert closed.assigned_technician_id is None and closed.status == RequestStatus.REPAIRED
+    assert untouched.assigned_technician_id is not None and untouched.version == 2
@@ -0,0 +1,66 @@
+"""
+Delta sync cursor (GET /api/maintenance-requests/changes)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models import RequestChange
+from routers import maintenance_request
+
+
+@pytest.fixture(autouse=True)
+def empty_change_log(db):
+    db.query(RequestChange).delete()
+    db.commit()
+
+
+def log_change(db, change_id: int, request_id: int, changed_at: datetime):
+    # Tombstones, so the sync response needs no request rows
+    db.add(RequestChange(id=change_id, request_id=request_id, deleted=True, changed_at=changed_at))
+    db.commit()
+
+
+def sync(client, headers, since: int) -> dict:
+    response = client.get("/api/maintenance-requests/changes", params={"since": since}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_settled_changes_advance_the_cursor(client, db, admin_headers):
+    log_change(db, 1, 10, datetime.now(timezone.utc) - timedelta(seconds=maintenance_request.SYNC_SETTLE_SECONDS + 5))
+
+    body = sync(client, admin_headers, since=0)
+
+    assert body["deleted_ids"] == [10]
+    assert body["cursor"] == 1
+    assert sync(client, admin_headers, since=1)["deleted_ids"] == []
+
+
+def test_change_committed_late_with_lower_id_is_not_skipped(client, db, admin_headers, monkeypatch):
+    monkeypatch.setattr(maintenance_request, "SYNC_SETTLE_SECONDS", 30)
+    now = datetime.now(timezone.utc)
+
+    # Transaction A takes change id 1 and stays open; B starts later, takes id 2 and commits first
+    log_change(db, 2, 20, changed_at=now - timedelta(seconds=5))
+    first = sync(client, admin_headers, since=0)
+    # A client must not be handed a cursor past id 1 while A may still commit it
+    assert first["deleted_ids"] == []
+    assert first["cursor"] == 0
+
+    # A commits
+    log_change(db, 1, 10, changed_at=now - timedelta(seconds=10))
+
+    # Once the settle window has passed, both are delivered from the earlier cursor
+    monkeypatch.setattr(maintenance_request, "SYNC_SETTLE_SECONDS", 0)
+    second = sync(client, admin_headers, since=first["cursor"])
+    assert sorted(second["deleted_ids"]) == [10, 20]
+    assert second["cursor"] == 2
+
+
+def test_cursor_beyond_the_log_is_rejected(client, db, admin_headers):
+    log_change(db, 1, 10, datetime.now(timezone.utc))
+
+    response = client.get("/api/maintenance-requests/changes", params={"since": 5}, headers=admin_headers)
+
+    assert response.status_code == 410
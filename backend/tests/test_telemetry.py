@@ -0,0 +1,68 @@
+"""
+Telemetry ingestion opening requests (telemetry.ingest_readings)
+"""
+from models import (
+    Equipment, MaintenanceRequest, RequestStatus, TelemetryOperator, TelemetryReading, TelemetryRule
+)
+from telemetry import ingest_readings
+
+
+def make_rule(db) -> TelemetryRule:
+    equipment = Equipment(name="Compressor")
+    db.add(equipment)
+    db.flush()
+    rule = TelemetryRule(
+        equipment_id=equipment.id, metric="temp_c", operator=TelemetryOperator.GT, threshold=80, subject="Overheating"
+    )
+    db.add(rule)
+    db.commit()
+    return rule
+
+
+def open_requests(db, rule_id: int) -> list[MaintenanceRequest]:
+    return db.query(MaintenanceRequest).filter(
+        MaintenanceRequest.telemetry_rule_id == rule_id,
+        MaintenanceRequest.status.in_([RequestStatus.NEW, RequestStatus.IN_PROGRESS]),
+    ).all()
+
+
+def reading(rule: TelemetryRule, value: float) -> dict:
+    return {"equipment_id": rule.equipment_id, "metric": rule.metric, "value": value}
+
+
+def test_breaches_are_judged_on_the_batch_own_readings(db):
+    rule = make_rule(db)
+    # A breaching reading stored by another ingest doesn't count towards this batch
+    db.add(TelemetryReading(**reading(rule, 95)))
+    db.commit()
+
+    stored, breached, created = ingest_readings(db, [reading(rule, 20), reading(rule, 30)])
+
+    assert (stored, breached, created) == (2, [], 0)
+
+
+def test_a_rule_keeps_a_single_open_request(db):
+    rule = make_rule(db)
+
+    assert ingest_readings(db, [reading(rule, 90)])[2] == 1
+    assert ingest_readings(db, [reading(rule, 91)])[2] == 0
+    first, = open_requests(db, rule.id)
+
+    first.status = RequestStatus.REPAIRED
+    db.commit()
+    assert ingest_readings(db, [reading(rule, 92)])[2] == 1
+    assert len(open_requests(db, rule.id)) == 1
+
+
+def test_reopening_while_the_rule_has_another_open_request_conflicts(client, db, admin_headers):
+    rule = make_rule(db)
+    ingest_readings(db, [reading(rule, 90)])
+    first, = open_requests(db, rule.id)
+    first.status = RequestStatus.REPAIRED
+    db.commit()
+    ingest_readings(db, [reading(rule, 95)])
+
+    response = client.put(f"/api/maintenance-requests/{first.id}", json={"status": "NEW"}, headers=admin_headers)
+
+    assert response.status_code == 409
+    assert len(open_requests(db, rule.id)) == 1
@@ -0,0 +1,18 @@
+import apiClient from './client'
+
+export interface BatchResult<T = unknown> {
+  id: string | null
+  status: number
+  headers: Record<string, string>
+  body: T
+}
+
+export const batchApi = {
+  // Runs several GETs in one round trip; results come back in request order
+  get: async (paths: string[]): Promise<BatchResult[]> => {
+    const response = await apiClient.post('/api/batch', {
+      requests: paths.map((path) => ({ path })),
+    })
+    return response.data.responses
+  },
+}
@@ -4,6 +4,8 @@ const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
 const apiClient = axios.create({
   baseURL: API_URL,
+  // Sends the read-your-writes cookie so reads right after a write hit the primary
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -4,3 +4,4 @@ export * from './maintenanceRequest'
 export * from './maintenanceTeam'
 export * from './reports'
 
+export * from './batch'
@@ -17,12 +17,38 @@ export interface MaintenanceRequest {
   scrap_reason: string | null
   created_at: string
   updated_at: string | null
+  version: number
   equipment?: any
   maintenance_team?: any
   assigned_technician?: any
   is_overdue?: boolean
 }
 
+export interface MaintenanceRequestCard {
+  id: number
+  subject: string
+  description: string | null
+  status: RequestStatus
+  request_type: RequestType
+  scheduled_date: string | null
+  equipment_id: number
+  equipment_name: string | null
+  assigned_technician_id: number | null
+  assigned_technician_name: string | null
+  version: number
+  is_overdue: boolean
+}
+
+export interface KanbanColumnData {
+  status: RequestStatus
+  total: number
+  items: MaintenanceRequestCard[]
+}
+
+export interface KanbanBoardData {
+  columns: KanbanColumnData[]
+}
+
 export const maintenanceRequestApi = {
   list: async (params?: {
     skip?: number
@@ -35,6 +61,15 @@ export const maintenanceRequestApi = {
     const response = await apiClient.get('/api/maintenance-requests', { params })
     return response.data
   },
+  board: async (params?: {
+    per_column?: number
+    request_type?: string
+    equipment_id?: number
+    team_id?: number
+  }): Promise<KanbanBoardData> => {
+    const response = await apiClient.get('/api/maintenance-requests/board', { params })
+    return response.data
+  },
   get: async (id: number): Promise<MaintenanceRequest> => {
     const response = await apiClient.get(`/api/maintenance-requests/${id}`)
     return response.data
@@ -43,8 +78,10 @@ export const maintenanceRequestApi = {
     const response = await apiClient.post('/api/maintenance-requests', data)
     return response.data
   },
-  update: async (id: number, data: Partial<MaintenanceRequest>): Promise<MaintenanceRequest> => {
-    const response = await apiClient.put(`/api/maintenance-requests/${id}`, data)
+  // With version, the update is rejected with 409 if someone else changed the request since
+  update: async (id: number, data: Partial<MaintenanceRequest>, version?: number): Promise<MaintenanceRequest> => {
+    const headers = version === undefined ? undefined : { 'If-Match': `"${version}"` }
+    const response = await apiClient.put(`/api/maintenance-requests/${id}`, data, { headers })
     return response.data
   },
   delete: async (id: number): Promise<void> => {
@@ -1,30 +1,31 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { DndContext, DragEndEvent, DragOverlay, closestCorners } from '@dnd-kit/core'
-import { maintenanceRequestApi, MaintenanceRequest } from '../api/maintenanceRequest'
+import { maintenanceRequestApi } from '../api/maintenanceRequest'
 import KanbanColumn from './KanbanColumn'
-import KanbanCard from './KanbanCard'
 import { RequestStatus } from '../api/maintenanceRequest'
 import { useState } from 'react'
 
-const statuses: RequestStatus[] = ['NEW', 'IN_PROGRESS', 'REPAIRED', 'SCRAP']
-
 export default function KanbanBoard() {
   const queryClient = useQueryClient()
   const [activeId, setActiveId] = useState<string | null>(null)
 
-  const { data: requests, isLoading } = useQuery({
-    queryKey: ['maintenance-requests'],
-    queryFn: () => maintenanceRequestApi.list({ limit: 1000 }),
+  const { data: board, isLoading } = useQuery({
+    queryKey: ['maintenance-requests', 'board'],
+    queryFn: () => maintenanceRequestApi.board({ per_column: 50 }),
   })
 
   const updateMutation = useMutation({
-    mutationFn: ({ id, status }: { id: number; status: RequestStatus }) =>
-      maintenanceRequestApi.update(id, { status }),
-    onSuccess: () => {
+    mutationFn: ({ id, status, version }: { id: number; status: RequestStatus; version?: number }) =>
+      maintenanceRequestApi.update(id, { status }, version),
+    // Refetch on a 409 as well, so a card someone else just moved shows where it is now
+    onSettled: () => {
       queryClient.invalidateQueries({ queryKey: ['maintenance-requests'] })
     },
   })
 
+  const columns = board?.columns || []
+  const cards = columns.flatMap((column) => column.items)
+
   const handleDragStart = (event: any) => {
     setActiveId(event.active.id)
   }
@@ -38,9 +39,9 @@ export default function KanbanBoard() {
     const requestId = Number(active.id)
     const newStatus = over.id as RequestStatus
 
-    const request = requests?.find((r) => r.id === requestId)
+    const request = cards.find((r) => r.id === requestId)
     if (request && request.status !== newStatus) {
-      updateMutation.mutate({ id: requestId, status: newStatus })
+      updateMutation.mutate({ id: requestId, status: newStatus, version: request.version })
     }
   }
 
@@ -48,12 +49,7 @@ export default function KanbanBoard() {
     return <div className="text-center py-12">Loading...</div>
   }
 
-  const requestsByStatus = statuses.reduce((acc, status) => {
-    acc[status] = requests?.filter((r) => r.status === status) || []
-    return acc
-  }, {} as Record<RequestStatus, MaintenanceRequest[]>)
-
-  const activeRequest = activeId ? requests?.find((r) => r.id.toString() === activeId) : null
+  const activeRequest = activeId ? cards.find((r) => r.id.toString() === activeId) : null
 
   return (
     <div className="px-4 py-6">
@@ -63,11 +59,12 @@ export default function KanbanBoard() {
         onDragEnd={handleDragEnd}
       >
         <div className="grid grid-cols-1 md:grid-cols-4 gap-4">
-          {statuses.map((status) => (
+          {columns.map((column) => (
             <KanbanColumn
-              key={status}
-              status={status}
-              requests={requestsByStatus[status]}
+              key={column.status}
+              status={column.status}
+              total={column.total}
+              requests={column.items}
               onUpdate={updateMutation.mutate}
             />
           ))}
@@ -1,9 +1,9 @@
 import { useDraggable } from '@dnd-kit/core'
-import { MaintenanceRequest, RequestStatus } from '../api/maintenanceRequest'
+import { MaintenanceRequestCard, RequestStatus } from '../api/maintenanceRequest'
 import { AlertCircle, User } from 'lucide-react'
 
 interface KanbanCardProps {
-  request: MaintenanceRequest
+  request: MaintenanceRequestCard
   onUpdate: (data: { id: number; status: RequestStatus }) => void
 }
 
@@ -35,7 +35,7 @@ export default function KanbanCard({ request }: KanbanCardProps) {
       </div>
       <p className="text-xs text-gray-400 mb-3 line-clamp-2">{request.description || 'No description'}</p>
       <div className="flex items-center justify-between text-xs">
-        <span className="text-gray-300 bg-black/20 px-2 py-0.5 rounded border border-white/5">{request.equipment?.name || 'N/A'}</span>
+        <span className="text-gray-300 bg-black/20 px-2 py-0.5 rounded border border-white/5">{request.equipment_name || 'N/A'}</span>
         <span
           className={`px-2 py-0.5 rounded-full font-medium ${request.request_type === 'PREVENTIVE'
               ? 'bg-blue-500/20 text-blue-300 border border-blue-500/10'
@@ -45,12 +45,12 @@ export default function KanbanCard({ request }: KanbanCardProps) {
           {request.request_type}
         </span>
       </div>
-      {request.assigned_technician && (
+      {request.assigned_technician_name && (
         <div className="mt-3 pt-3 border-t border-white/5 flex items-center text-xs text-gray-400">
           <div className="w-5 h-5 rounded-full bg-indigo-500/20 flex items-center justify-center mr-2 text-indigo-300 border border-indigo-500/10">
             <User className="h-3 w-3" />
           </div>
-          {request.assigned_technician.full_name || request.assigned_technician.username}
+          {request.assigned_technician_name}
         </div>
       )}
       {request.scheduled_date && (
@@ -1,14 +1,15 @@
 import { useDroppable } from '@dnd-kit/core'
-import { MaintenanceRequest, RequestStatus } from '../api/maintenanceRequest'
+import { MaintenanceRequestCard, RequestStatus } from '../api/maintenanceRequest'
 import KanbanCard from './KanbanCard'
 
 interface KanbanColumnProps {
   status: RequestStatus
-  requests: MaintenanceRequest[]
+  total: number
+  requests: MaintenanceRequestCard[]
   onUpdate: (data: { id: number; status: RequestStatus }) => void
 }
 
-export default function KanbanColumn({ status, requests, onUpdate }: KanbanColumnProps) {
+export default function KanbanColumn({ status, total, requests, onUpdate }: KanbanColumnProps) {
   const { setNodeRef } = useDroppable({ id: status })
 
   const statusColors = {
@@ -30,7 +31,7 @@ export default function KanbanColumn({ status, requests, onUpdate }: KanbanColum
       <div className="flex justify-between items-center mb-4">
         <h3 className="font-semibold text-white tracking-wide">{statusLabels[status]}</h3>
         <span className="bg-white/10 text-white rounded-lg px-2.5 py-1 text-xs font-semibold border border-white/5">
-          {requests.length}
+          {total}
         </span>
       </div>
       <div className="space-y-3">
@@ -1,18 +1,28 @@
 import { useQuery } from '@tanstack/react-query'
-import { maintenanceRequestApi } from '../api/maintenanceRequest'
-import { equipmentApi } from '../api/equipment'
+import { batchApi } from '../api/batch'
+import { MaintenanceRequest } from '../api/maintenanceRequest'
+import { EquipmentListResponse } from '../api/equipment'
 import { BarChart3, Package, Wrench, AlertCircle } from 'lucide-react'
 
 export default function Dashboard() {
-  const { data: requests } = useQuery({
-    queryKey: ['maintenance-requests'],
-    queryFn: () => maintenanceRequestApi.list({ limit: 1000 }),
-  })
-
-  const { data: equipment } = useQuery({
-    queryKey: ['equipment'],
-    queryFn: () => equipmentApi.list({ limit: 1000 }),
+  // Both lists in one round trip
+  const { data } = useQuery({
+    queryKey: ['dashboard'],
+    queryFn: async () => {
+      const [requests, equipment] = await batchApi.get([
+        '/api/maintenance-requests/?limit=1000',
+        '/api/equipment/?limit=1000',
+      ])
+      const failed = [requests, equipment].find((result) => result.status !== 200)
+      if (failed) throw new Error(`Dashboard request failed with status ${failed.status}`)
+      return {
+        requests: requests.body as MaintenanceRequest[],
+        equipment: equipment.body as EquipmentListResponse,
+      }
+    },
   })
+  const requests = data?.requests
+  const equipment = data?.equipment
 
   const stats = {
     totalEquipment: equipment?.total || 0,